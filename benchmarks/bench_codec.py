@@ -0,0 +1,91 @@
+import json
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from dynamic_graph_agent_framework.ai_tools import codec, SystemMessage, UserMessage, AIMessage
+from dynamic_graph_agent_framework.ai_tools.messages import MessageList, encode_payload
+from dynamic_graph_agent_framework.ai_tools.sse import StreamDelta
+
+ITERATIONS = 2_000
+HISTORY = 200
+
+def build_payload() -> dict:
+    messages = [SystemMessage("你是一个助手。")]
+    for i in range(HISTORY):
+        messages.append(UserMessage(f"问题 {i}: " + "请解释一下这段代码。" * 5))
+        messages.append(AIMessage(f"回答 {i}: " + "这段代码的作用是……" * 10))
+    return {"model": "bench-model", "temperature": 0.1, "stream": False, "messages": messages}
+
+def build_completion() -> bytes:
+    return json.dumps({
+        "id": "chatcmpl-bench",
+        "object": "chat.completion",
+        "created": 1700000000,
+        "model": "bench-model",
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": "{\"answer\": \"" + "结果" * 400 + "\"}"},
+            "logprobs": None,
+            "finish_reason": "stop"
+        }],
+        "usage": {"prompt_tokens": 5000, "completion_tokens": 800, "total_tokens": 5800,
+                  "prompt_tokens_details": {"cached_tokens": 4096}},
+        "system_fingerprint": "fp_bench"
+    }, ensure_ascii=False).encode("utf-8")
+
+CHUNKS = [
+    b'{"id":"c","choices":[{"index":0,"delta":{"role":"assistant","content":""},"finish_reason":null}]}',
+    b'{"id":"c","choices":[{"index":0,"delta":{},"finish_reason":"stop"}]}',
+    b'{"id":"c","choices":[],"usage":{"prompt_tokens":5000,"completion_tokens":800,"total_tokens":5800}}'
+]
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        fn()
+    return (time.perf_counter() - start) / ITERATIONS * 1e6
+
+def main():
+    payload = build_payload()
+    body = build_completion()
+    
+    def encode_plain():
+        codec.dumps(dict(payload, messages=[message.to_dict() for message in payload["messages"]]))
+    
+    def encode_cached():
+        encode_payload(dict(payload, messages=MessageList(payload["messages"])))
+    
+    def decode_generic():
+        data = codec.loads(body)
+        return data["choices"][0]["message"]["content"], data["usage"]
+    
+    def decode_typed():
+        completion = codec.completion_decoder.decode(body)
+        return completion.choices[0].message.content, completion.usage
+    
+    def parse_chunks():
+        for raw in CHUNKS:
+            delta = StreamDelta.parse(raw)
+            delta.role, delta.finish_reason, delta.usage
+    
+    previous = codec.backend
+    print(f"{HISTORY * 2 + 1} 条消息的请求体，{len(body)} 字节的响应")
+    print(f"{'backend':>8} | {'encode (µs)':>11} | {'cached (µs)':>11} | {'decode (µs)':>11} | {'typed (µs)':>10} | {'chunks (µs)':>11}")
+    print("-" * 78)
+    try:
+        for backend in codec.available_backends():
+            codec.set_backend(backend)
+            for message in payload["messages"]:
+                message._invalidate()
+            print(
+                f"{backend:>8} | {timed(encode_plain):>11.1f} | {timed(encode_cached):>11.1f} | "
+                f"{timed(decode_generic):>11.1f} | {timed(decode_typed):>10.1f} | {timed(parse_chunks):>11.1f}"
+            )
+    finally:
+        codec.set_backend(previous)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import asyncio
+import sys
+import os
+import time
+import gc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from dynamic_graph_agent_framework.graph import Node, Graph, TransitionCommand, Executor
+
+SIZES = [10, 100, 1_000, 10_000, 100_000]
+LOOKUPS = 20_000
+
+def build_graph(size: int) -> Graph:
+    nodes = [Node(f"n{i}") for i in range(size)]
+    graph = Graph(nodes[0])
+    for source, target in zip(nodes, nodes[1:]):
+        graph.link(source, target)
+    return graph
+
+def bench_lookup(graph: Graph) -> tuple:
+    nodes = graph.nodes
+    probe = nodes[-1]
+    
+    start = time.perf_counter()
+    for _ in range(LOOKUPS):
+        graph.get_node_by_id(probe.node_id)
+    by_id = (time.perf_counter() - start) / LOOKUPS
+    
+    start = time.perf_counter()
+    for _ in range(LOOKUPS):
+        graph.get_node_by_name(probe.name)
+    by_name = (time.perf_counter() - start) / LOOKUPS
+    
+    return by_id, by_name
+
+async def bench_transition(graph: Graph, target_name: str) -> float:
+    """测量从入口节点出发的单次转移开销"""
+    executor = Executor(graph)
+    source = graph.entry_node
+    command = TransitionCommand(target=target_name)
+    queue = []
+    
+    start = time.perf_counter()
+    for _ in range(LOOKUPS):
+        await executor._process_transition(command, source, queue)
+        queue.clear()
+    return (time.perf_counter() - start) / LOOKUPS
+
+def main():
+    gc.disable()
+    print(f"{'nodes':>8} | {'by_id (ns)':>10} | {'by_name (ns)':>12} | {'far (ns)':>9} | {'link (ns)':>9} | {'compiled (ns)':>13}")
+    print("-" * 76)
+    for size in SIZES:
+        graph = build_graph(size)
+        by_id, by_name = bench_lookup(graph)
+        far_name = graph.nodes[-1].name
+        link_name = graph.nodes[min(1, size - 1)].name
+        far = asyncio.run(bench_transition(graph, far_name))
+        linked = asyncio.run(bench_transition(graph, link_name))
+        compiled = asyncio.run(bench_transition(graph.compile(), link_name))
+        print(
+            f"{size:>8} | {by_id * 1e9:>10.0f} | {by_name * 1e9:>12.0f} | "
+            f"{far * 1e9:>9.0f} | {linked * 1e9:>9.0f} | {compiled * 1e9:>13.0f}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+from dataclasses import dataclass, field
+import gc
+import json
+import sys
+import os
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from dynamic_graph_agent_framework.ai_tools import Context, SystemMessage, UserMessage, AIMessage, encode_messages
+
+MESSAGES = 200_000
+ENCODES = 20
+CONTEXT_SIZE = 2_000
+
+@dataclass
+class LegacySystemMessage:
+    """重构前的数据类消息，作为对照"""
+    content: str
+    role: str = field(default="system", init=False)
+    
+    def to_dict(self):
+        return {"role": self.role, "content": self.content}
+
+@dataclass
+class LegacyUserMessage:
+    content: str
+    role: str = field(default="user", init=False)
+    
+    def to_dict(self):
+        return {"role": self.role, "content": self.content}
+
+@dataclass
+class LegacyAIMessage:
+    content: str
+    role: str = field(default="assistant", init=False)
+    
+    def to_dict(self):
+        return {"role": self.role, "content": self.content}
+
+CURRENT = (SystemMessage, UserMessage, AIMessage)
+LEGACY = (LegacySystemMessage, LegacyUserMessage, LegacyAIMessage)
+
+def contents(count: int) -> list:
+    return [f"message {i}: " + "内容" * (i % 20) for i in range(count)]
+
+def build(classes: tuple, texts: list) -> list:
+    return [classes[i % 3](text) for i, text in enumerate(texts)]
+
+def measure_memory(classes: tuple, texts: list) -> tuple:
+    """返回 (消息对象占用字节, 序列化一次后的总占用字节)，不含内容字符串本身"""
+    gc.collect()
+    tracemalloc.start()
+    messages = build(classes, texts)
+    objects = tracemalloc.get_traced_memory()[0]
+    if classes is CURRENT:
+        # 缓存在消息上的字典（to_dict 返回其副本）
+        payload = [message._data() for message in messages]
+    else:
+        payload = [message.to_dict() for message in messages]
+    total = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return objects, total
+
+def bench_encode(classes: tuple, texts: list) -> tuple:
+    """同一上下文反复编码为请求体：每次追加一条消息后编码整个列表"""
+    messages = build(classes, texts)
+    start = time.perf_counter()
+    for i in range(ENCODES):
+        messages.append(classes[1](f"turn {i}"))
+        if classes is CURRENT:
+            encode_messages(messages)
+        else:
+            json.dumps([message.to_dict() for message in messages], ensure_ascii=False)
+    return (time.perf_counter() - start) / ENCODES
+
+def main():
+    texts = contents(MESSAGES)
+    print(f"{MESSAGES} 条消息")
+    print(f"{'classes':>8} | {'objects (MB)':>12} | {'+ dicts (MB)':>12} | {'B/msg':>6} | {f'encode {CONTEXT_SIZE} (ms)':>17}")
+    print("-" * 68)
+    small = contents(CONTEXT_SIZE)
+    for name, classes in (("legacy", LEGACY), ("slotted", CURRENT)):
+        objects, total = measure_memory(classes, texts)
+        encode = bench_encode(classes, small)
+        print(
+            f"{name:>8} | {objects / 1e6:>12.1f} | {total / 1e6:>12.1f} | "
+            f"{objects / MESSAGES:>6.0f} | {encode * 1e3:>17.3f}"
+        )
+    
+    context = Context()
+    context.extend(build(CURRENT, small))
+    start = time.perf_counter()
+    for i in range(ENCODES):
+        context.append(UserMessage(f"turn {i}"))
+        context.to_messages()
+    print(f"\nContext.to_messages（{CONTEXT_SIZE} 条，增量）: {(time.perf_counter() - start) / ENCODES * 1e3:.3f} ms")
+
+if __name__ == "__main__":
+    main()
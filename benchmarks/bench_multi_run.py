@@ -0,0 +1,59 @@
+import asyncio
+import sys
+import os
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from dynamic_graph_agent_framework.graph import Node, Graph, TransitionCommand, END
+
+RUNS = 1000
+NODES = 200
+
+async def on_enter_router(node, graph):
+    user = graph.global_memory.get("user")
+    node.local_memory.set("user", user)
+    await asyncio.sleep(0.001)
+    return TransitionCommand(target=f"worker_{user % NODES}")
+
+def on_enter_worker(node, graph):
+    graph.global_memory.set("result", f"{node.name}:{graph.global_memory.get('user')}")
+    return TransitionCommand(target=END)
+
+def build_graph() -> Graph:
+    """路由图：入口节点按用户分派到NODES个工作节点之一，每次执行只触及两个节点"""
+    router = Node("router", on_enter=on_enter_router)
+    graph = Graph(router)
+    for i in range(NODES):
+        graph.link(router, Node(f"worker_{i}", on_enter=on_enter_worker))
+    return graph
+
+async def rebuild_per_run() -> list:
+    async def one(user: int):
+        graph = build_graph()
+        await graph.execute({"user": user})
+        return graph
+    return await asyncio.gather(*[one(user) for user in range(RUNS)])
+
+async def shared_graph() -> list:
+    graph = build_graph().compile()
+    return await asyncio.gather(*[graph.run({"user": user}) for user in range(RUNS)])
+
+def measure(name: str, strategy):
+    tracemalloc.start()
+    start = time.perf_counter()
+    results = asyncio.run(strategy())
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(results) == RUNS
+    print(f"{name:>16}: {elapsed * 1000:.0f} ms, 峰值内存 {peak / 1024 / 1024:.1f} MiB ({peak / RUNS / 1024:.1f} KiB/执行)")
+
+def main():
+    print(f"{RUNS} 个并发执行, 图中 {NODES + 1} 个节点")
+    measure("rebuild per run", rebuild_per_run)
+    measure("shared graph", shared_graph)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import asyncio
+import sys
+import os
+import random
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from dynamic_graph_agent_framework.graph import Node, Graph, TransitionCommand, END, SCHEDULER_BFS, SCHEDULER_QUEUE
+
+BRANCHES = 20
+DEPTH = 5
+
+def build_fanout(scheduler: str, latencies: list) -> Graph:
+    """扇出图：入口节点分出BRANCHES条长度为DEPTH的链，每个节点的延迟不同"""
+    def on_enter_start(node, graph):
+        return [TransitionCommand(target=f"b{b}_0") for b in range(BRANCHES)]
+    
+    def make_step(delay: float, next_target):
+        async def on_enter(node, graph):
+            await asyncio.sleep(delay)
+            return TransitionCommand(target=next_target)
+        return on_enter
+    
+    start = Node("start", on_enter=on_enter_start)
+    graph = Graph(start, parallel_execution=True, scheduler=scheduler, max_concurrency=BRANCHES)
+    for b in range(BRANCHES):
+        previous = start
+        for d in range(DEPTH):
+            next_target = f"b{b}_{d + 1}" if d + 1 < DEPTH else END
+            node = Node(f"b{b}_{d}", on_enter=make_step(latencies[b][d], next_target))
+            graph.link(previous, node)
+            previous = node
+    return graph
+
+def main():
+    rng = random.Random(0)
+    latencies = [[rng.choice([0.005, 0.01, 0.08]) for _ in range(DEPTH)] for _ in range(BRANCHES)]
+    critical_path = max(sum(branch) for branch in latencies)
+    wave_sum = sum(max(branch[d] for branch in latencies) for d in range(DEPTH))
+    
+    print(f"关键路径: {critical_path * 1000:.0f} ms, 逐层最慢节点之和: {wave_sum * 1000:.0f} ms")
+    for scheduler in (SCHEDULER_BFS, SCHEDULER_QUEUE):
+        graph = build_fanout(scheduler, latencies)
+        start = time.perf_counter()
+        asyncio.run(graph.execute())
+        elapsed = time.perf_counter() - start
+        print(f"{scheduler:>6}: {elapsed * 1000:.0f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import asyncio
+import json
+import sys
+import os
+import time
+import types
+
+import aiohttp
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from dynamic_graph_agent_framework.ai_tools.sse import DONE, SSEDecoder, StreamDelta
+
+TOKENS = 200_000
+NETWORK_CHUNK = 1400
+
+def build_stream() -> bytes:
+    events = []
+    for i in range(TOKENS):
+        chunk = {
+            "id": "chatcmpl-bench",
+            "object": "chat.completion.chunk",
+            "created": 1700000000,
+            "model": "bench-model",
+            "choices": [{"index": 0, "delta": {"content": f"tok{i % 97} "}, "finish_reason": None}]
+        }
+        events.append(f"data: {json.dumps(chunk, separators=(',', ':'))}\n\n")
+    events.append("data: [DONE]\n\n")
+    return "".join(events).encode("utf-8")
+
+def split_network(body: bytes) -> list:
+    return [body[i:i + NETWORK_CHUNK] for i in range(0, len(body), NETWORK_CHUNK)]
+
+def make_reader(chunks: list) -> tuple:
+    """用真实的aiohttp StreamReader模拟网络：每次事件循环迭代到达一个网络分块"""
+    protocol = types.SimpleNamespace(
+        _reading_paused=False,
+        connected=True,
+        pause_reading=lambda *args, **kwargs: None,
+        resume_reading=lambda *args, **kwargs: None
+    )
+    reader = aiohttp.StreamReader(protocol, 2 ** 16, loop=asyncio.get_running_loop())
+    
+    async def produce():
+        for chunk in chunks:
+            reader.feed_data(chunk)
+            await asyncio.sleep(0)
+        reader.feed_eof()
+    
+    return reader, asyncio.ensure_future(produce())
+
+async def legacy_path(chunks: list) -> int:
+    """旧实现：逐行读取、解码、strip、切片，再在text_call中对每个分块执行json.loads"""
+    count = 0
+    reader, producer = make_reader(chunks)
+    async for line in reader:
+        line_str = line.decode('utf-8').strip()
+        if line_str.startswith('data: '):
+            data = line_str[6:]
+            if data == '[DONE]':
+                break
+            parsed = json.loads(data)
+            if 'choices' in parsed and len(parsed['choices']) > 0:
+                delta = parsed['choices'][0].get('delta', {})
+                if 'content' in delta:
+                    count += 1
+    await producer
+    return count
+
+async def decoder_path(chunks: list) -> int:
+    count = 0
+    reader, producer = make_reader(chunks)
+    decoder = SSEDecoder()
+    finished = False
+    async for chunk in reader.iter_any():
+        for data in decoder.feed(chunk):
+            if data == DONE:
+                finished = True
+                break
+            delta = StreamDelta.parse(data)
+            if delta is not None and delta.content:
+                count += 1
+        if finished:
+            break
+    await producer
+    return count
+
+def main():
+    chunks = split_network(build_stream())
+    print(f"{TOKENS} 个token, {len(chunks)} 个网络分块")
+    for name, path in (("legacy", legacy_path), ("decoder", decoder_path)):
+        best = float("inf")
+        for _ in range(3):
+            start = time.perf_counter()
+            count = asyncio.run(path(chunks))
+            best = min(best, time.perf_counter() - start)
+        assert count == TOKENS
+        print(f"{name:>8}: {TOKENS / best:,.0f} tokens/s/core")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import asyncio
+import sys
+import os
+import gc
+import time
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from dynamic_graph_agent_framework import tracing
+from dynamic_graph_agent_framework.graph import Node, Graph, TransitionCommand, END
+
+NODES = 5000
+REPEAT = 5
+
+def build_chain() -> Graph:
+    """长链图：每个节点只做一次记忆写入，节点本身的开销即为框架开销"""
+    def make_step(next_target):
+        def on_enter(node, graph):
+            graph.global_memory.set("last", node.name)
+            return TransitionCommand(target=next_target)
+        return on_enter
+    
+    nodes = [Node(f"n{i}", on_enter=make_step(f"n{i + 1}" if i + 1 < NODES else END)) for i in range(NODES)]
+    graph = Graph(nodes[0])
+    for source, target in zip(nodes, nodes[1:]):
+        graph.link(source, target)
+    return graph.compile()
+
+def best_per_node(graph: Graph) -> float:
+    best = float("inf")
+    gc.disable()
+    try:
+        for _ in range(REPEAT):
+            start = time.perf_counter()
+            asyncio.run(graph.execute())
+            best = min(best, time.perf_counter() - start)
+    finally:
+        gc.enable()
+    return best / NODES
+
+def main():
+    graph = build_chain()
+    
+    disabled = best_per_node(graph)
+    guard = min(timeit.repeat("tracing.tracers", globals={"tracing": tracing}, number=1_000_000, repeat=5)) / 1_000_000
+    
+    tracer = tracing.add_tracer(tracing.HistogramTracer())
+    try:
+        enabled = best_per_node(graph)
+    finally:
+        tracing.remove_tracer(tracer)
+    
+    print(f"{NODES} 个节点的链式图, 取 {REPEAT} 次最好成绩")
+    print(f"  追踪关闭: {disabled * 1e6:.2f} µs/节点")
+    print(f"  关闭时每个节点的检查开销: 3 × {guard * 1e9:.1f} ns = {3 * guard / disabled * 100:.2f}%")
+    print(f"  HistogramTracer: {enabled * 1e6:.2f} µs/节点 (+{(enabled - disabled) * 1e6:.2f} µs)")
+
+if __name__ == "__main__":
+    main()
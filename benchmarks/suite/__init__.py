@@ -0,0 +1,17 @@
+from .mock_server import MockLLMServer
+from .runner import measure, run_scenarios, compare, save_baseline, load_baseline
+from .scenarios import Scenario, default_scenarios, graph_scenario, json_call_scenario, text_stream_scenario
+
+__all__ = [
+    'MockLLMServer',
+    'measure',
+    'run_scenarios',
+    'compare',
+    'save_baseline',
+    'load_baseline',
+    'Scenario',
+    'default_scenarios',
+    'graph_scenario',
+    'json_call_scenario',
+    'text_stream_scenario'
+]
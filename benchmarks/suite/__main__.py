@@ -0,0 +1,38 @@
+import argparse
+import asyncio
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from benchmarks.suite.runner import run_scenarios, save_baseline, load_baseline, compare, format_row
+from benchmarks.suite.scenarios import default_scenarios
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="执行器与AI工具热路径基准测试")
+    parser.add_argument("--filter", default="", help="只运行名称包含该字符串的场景")
+    parser.add_argument("--iterations", type=int, default=None, help="覆盖每个场景的迭代次数")
+    parser.add_argument("--save", metavar="PATH", help="将结果保存为基线")
+    parser.add_argument("--compare", metavar="PATH", help="与已保存的基线比较，出现回归时退出码为1")
+    parser.add_argument("--threshold", type=float, default=0.25, help="回归阈值（相对变化），默认0.25")
+    args = parser.parse_args()
+    
+    scenarios = [scenario for scenario in default_scenarios() if args.filter in scenario.name]
+    results = asyncio.run(run_scenarios(scenarios, args.iterations, report=lambda name, result: print(format_row(name, result), flush=True)))
+    
+    if args.save:
+        save_baseline(args.save, results)
+        print(f"基线已保存到 {args.save}")
+    
+    if args.compare:
+        regressions = compare(results, load_baseline(args.compare), args.threshold)
+        if regressions:
+            print(f"\n发现 {len(regressions)} 处回归（阈值 {args.threshold:.0%}）：")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print(f"\n与基线 {args.compare} 相比没有回归")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
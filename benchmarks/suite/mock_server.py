@@ -0,0 +1,90 @@
+import asyncio
+import json
+import random
+import time
+from typing import Optional
+from aiohttp import web
+
+class MockLLMServer:
+    """模拟OpenAI兼容接口：可配置响应延迟、流式token速率和错误率"""
+    
+    def __init__(
+        self,
+        latency: float = 0.0,
+        tokens_per_second: Optional[float] = None,
+        stream_tokens: int = 50,
+        error_rate: float = 0.0,
+        content: str = '{"ok": true}',
+        seed: int = 0
+    ):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.stream_tokens = stream_tokens
+        self.error_rate = error_rate
+        self.content = content
+        self.requests = 0
+        self.errors = 0
+        self._rng = random.Random(seed)
+        self._runner = None
+        self.port = None
+        self._events = [self._event(f"tok{i} ") for i in range(stream_tokens)]
+        self._events.append(self._event(None, usage={"prompt_tokens": 10, "completion_tokens": stream_tokens, "total_tokens": 10 + stream_tokens}))
+    
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/v1"
+    
+    def _event(self, content: Optional[str], usage: Optional[dict] = None) -> bytes:
+        chunk = {
+            "id": "chatcmpl-mock",
+            "object": "chat.completion.chunk",
+            "model": "mock",
+            "choices": [{"index": 0, "delta": {"content": content} if content else {}, "finish_reason": None if content else "stop"}]
+        }
+        if usage:
+            chunk["usage"] = usage
+        return f"data: {json.dumps(chunk, separators=(',', ':'))}\n\n".encode("utf-8")
+    
+    async def _handle_chat(self, request: web.Request) -> web.StreamResponse:
+        payload = await request.json()
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        
+        if self.error_rate and self._rng.random() < self.error_rate:
+            self.errors += 1
+            return web.Response(status=503, text="overloaded")
+        
+        if not payload.get("stream"):
+            return web.json_response({
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": self.content}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15}
+            })
+        
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        if self.tokens_per_second is None:
+            await response.write(b"".join(self._events))
+        else:
+            start = time.perf_counter()
+            for i, event in enumerate(self._events):
+                await response.write(event)
+                ahead = start + (i + 1) / self.tokens_per_second - time.perf_counter()
+                if ahead > 0.001:
+                    await asyncio.sleep(ahead)
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+    
+    async def __aenter__(self):
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", self._handle_chat)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self._runner.cleanup()
@@ -0,0 +1,90 @@
+from typing import Any, Dict, List, Optional
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from .scenarios import Scenario
+
+HIGHER_IS_BETTER = ("throughput",)
+LOWER_IS_BETTER = ("p50", "p99", "peak_memory")
+
+def percentile(samples: List[float], p: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(p / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+async def measure(scenario: Scenario, iterations: Optional[int] = None) -> Dict[str, Any]:
+    iterations = iterations or scenario.iterations
+    async with scenario.factory() as step:
+        for _ in range(scenario.warmup):
+            await step()
+        
+        gc.collect()
+        latencies = []
+        units = 0
+        start = time.perf_counter()
+        for _ in range(iterations):
+            began = time.perf_counter()
+            units += await step()
+            latencies.append(time.perf_counter() - began)
+        elapsed = time.perf_counter() - start
+        
+        tracemalloc.start()
+        try:
+            await step()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    
+    return {
+        "unit": scenario.unit,
+        "iterations": iterations,
+        "throughput": units / elapsed,
+        "p50": percentile(latencies, 50),
+        "p99": percentile(latencies, 99),
+        "peak_memory": peak
+    }
+
+async def run_scenarios(scenarios: List[Scenario], iterations: Optional[int] = None, report=None) -> Dict[str, Dict[str, Any]]:
+    results = {}
+    for scenario in scenarios:
+        results[scenario.name] = await measure(scenario, iterations)
+        if report:
+            report(scenario.name, results[scenario.name])
+    return results
+
+def environment() -> Dict[str, str]:
+    return {"python": sys.version.split()[0], "platform": platform.platform(), "machine": platform.machine()}
+
+def save_baseline(path: str, results: Dict[str, Dict[str, Any]]):
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump({"environment": environment(), "results": results}, file, indent=2, ensure_ascii=False)
+
+def load_baseline(path: str) -> Dict[str, Dict[str, Any]]:
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)["results"]
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], threshold: float = 0.25) -> List[str]:
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        for metric in HIGHER_IS_BETTER:
+            if previous[metric] and current[metric] < previous[metric] * (1 - threshold):
+                regressions.append(f"{name}: {metric} {previous[metric]:,.1f} -> {current[metric]:,.1f} {current['unit']}/s")
+        for metric in LOWER_IS_BETTER:
+            if previous[metric] and current[metric] > previous[metric] * (1 + threshold):
+                regressions.append(f"{name}: {metric} {previous[metric]:,.6g} -> {current[metric]:,.6g}")
+    return regressions
+
+def format_row(name: str, result: Dict[str, Any]) -> str:
+    return (
+        f"{name:<36} {result['throughput']:>14,.0f} {result['unit'] + '/s':<11}"
+        f" p50 {result['p50'] * 1000:>8.2f} ms  p99 {result['p99'] * 1000:>8.2f} ms"
+        f"  peak {result['peak_memory'] / 1024:>9,.0f} KiB"
+    )
@@ -0,0 +1,102 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, List
+import asyncio
+from dynamic_graph_agent_framework.ai_tools import AIConfig, OpenAIClient, UserMessage, json_call, text_call, close_shared_sessions
+from . import topologies
+from .mock_server import MockLLMServer
+
+Step = Callable[[], Awaitable[int]]
+
+class Scenario:
+    def __init__(self, name: str, unit: str, factory: Callable[[], AsyncIterator[Step]], iterations: int = 20, warmup: int = 2):
+        self.name = name
+        self.unit = unit
+        self.factory = factory
+        self.iterations = iterations
+        self.warmup = warmup
+
+def graph_scenario(topology: str, size: int, parallel: bool, iterations: int = 20) -> Scenario:
+    @asynccontextmanager
+    async def factory():
+        builder = getattr(topologies, topology)
+        graph = builder(size, parallel=parallel)
+        nodes = topologies.node_count(topology, size)
+        
+        async def step() -> int:
+            await graph.run()
+            return nodes
+        yield step
+    
+    mode = "parallel" if parallel else "sequential"
+    return Scenario(f"graph.{topology}.{mode}", "nodes", factory, iterations)
+
+def client_config(server: MockLLMServer, **overrides) -> AIConfig:
+    config = {
+        "api_key": "bench-key",
+        "base_url": server.base_url,
+        "model": "mock",
+        "max_retries": 3,
+        "backoff_base": 0.001,
+        "backoff_max": 0.01,
+        "timeout": 30,
+        "shared_session": True
+    }
+    config.update(overrides)
+    return AIConfig.from_dict(config)
+
+def json_call_scenario(concurrency: int, latency: float, error_rate: float, iterations: int = 20) -> Scenario:
+    @asynccontextmanager
+    async def factory():
+        async with MockLLMServer(latency=latency, error_rate=error_rate) as server:
+            client = OpenAIClient(client_config(server))
+            
+            async def step() -> int:
+                results = await asyncio.gather(*[json_call(client, [UserMessage(f"q{i}")]) for i in range(concurrency)])
+                assert all(result == {"ok": True} for result in results)
+                return concurrency
+            
+            try:
+                yield step
+            finally:
+                await close_shared_sessions()
+    
+    suffix = f".errors{int(error_rate * 100)}" if error_rate else ""
+    return Scenario(f"ai.json_call.c{concurrency}{suffix}", "requests", factory, iterations)
+
+def text_stream_scenario(tokens: int, tokens_per_second, concurrency: int = 1, iterations: int = 20) -> Scenario:
+    @asynccontextmanager
+    async def factory():
+        async with MockLLMServer(tokens_per_second=tokens_per_second, stream_tokens=tokens) as server:
+            client = OpenAIClient(client_config(server))
+            
+            async def one(i: int) -> int:
+                count = 0
+                async for _ in text_call(client, [UserMessage(f"s{i}")], stream=True):
+                    count += 1
+                return count
+            
+            async def step() -> int:
+                counts = await asyncio.gather(*[one(i) for i in range(concurrency)])
+                assert all(count == tokens for count in counts)
+                return sum(counts)
+            
+            try:
+                yield step
+            finally:
+                await close_shared_sessions()
+    
+    rate = "burst" if tokens_per_second is None else f"{int(tokens_per_second)}tps"
+    return Scenario(f"ai.text_stream.{rate}.c{concurrency}", "tokens", factory, iterations)
+
+def default_scenarios() -> List[Scenario]:
+    scenarios = []
+    for parallel in (False, True):
+        scenarios.append(graph_scenario("chain", 500, parallel))
+        scenarios.append(graph_scenario("fanout", 200, parallel))
+        scenarios.append(graph_scenario("diamond", 6, parallel))
+        scenarios.append(graph_scenario("cycle", 100, parallel))
+    scenarios.append(json_call_scenario(concurrency=50, latency=0.005, error_rate=0.0))
+    scenarios.append(json_call_scenario(concurrency=50, latency=0.005, error_rate=0.1))
+    scenarios.append(text_stream_scenario(tokens=2000, tokens_per_second=None, concurrency=4))
+    scenarios.append(text_stream_scenario(tokens=100, tokens_per_second=5000, concurrency=20, iterations=10))
+    return scenarios
@@ -0,0 +1,78 @@
+import asyncio
+from dynamic_graph_agent_framework.graph import Node, Graph, TransitionCommand, END
+
+def _step(next_target, delay: float = 0.0):
+    async def on_enter(node, graph):
+        if delay:
+            await asyncio.sleep(delay)
+        graph.global_memory.set("last", node.name)
+        return TransitionCommand(target=next_target)
+    return on_enter
+
+def chain(length: int, parallel: bool = False, delay: float = 0.0) -> Graph:
+    """长链：n0 -> n1 -> ... -> END"""
+    nodes = [Node(f"n{i}", on_enter=_step(f"n{i + 1}" if i + 1 < length else END, delay)) for i in range(length)]
+    graph = Graph(nodes[0], parallel_execution=parallel)
+    for source, target in zip(nodes, nodes[1:]):
+        graph.link(source, target)
+    return graph.compile()
+
+def fanout(width: int, parallel: bool = False, delay: float = 0.0) -> Graph:
+    """宽扇出：入口节点一次转移到 width 个叶子节点"""
+    def on_enter_start(node, graph):
+        return [TransitionCommand(target=f"leaf{i}") for i in range(width)]
+    
+    start = Node("start", on_enter=on_enter_start)
+    graph = Graph(start, parallel_execution=parallel)
+    for i in range(width):
+        graph.link(start, Node(f"leaf{i}", on_enter=_step(END, delay)))
+    return graph.compile()
+
+def diamond(depth: int, parallel: bool = False, delay: float = 0.0) -> Graph:
+    """串联的菱形：每层 split -> (left, right) -> merge，merge 是汇合节点，两条路径都到达后执行一次"""
+    def on_enter_split(left, right):
+        def on_enter(node, graph):
+            return [TransitionCommand(target=left), TransitionCommand(target=right)]
+        return on_enter
+    
+    entry = Node("split0", on_enter=on_enter_split("left0", "right0"))
+    graph = Graph(entry, parallel_execution=parallel)
+    split = entry
+    for d in range(depth):
+        next_target = f"split{d + 1}" if d + 1 < depth else END
+        merge = Node(f"merge{d}", on_enter=_step(next_target), join=True)
+        for side in ("left", "right"):
+            branch = Node(f"{side}{d}", on_enter=_step(f"merge{d}", delay))
+            graph.link(split, branch)
+            graph.link(branch, merge)
+        if d + 1 < depth:
+            split = Node(f"split{d + 1}", on_enter=on_enter_split(f"left{d + 1}", f"right{d + 1}"))
+            graph.link(merge, split)
+    return graph.compile()
+
+def cycle(laps: int, size: int = 3, parallel: bool = False) -> Graph:
+    """环：c0 -> c1 -> ... -> c0，计数达到 laps 圈后转移到 END"""
+    def make_step(i):
+        def on_enter(node, graph):
+            count = graph.global_memory.get("count", 0) + 1
+            graph.global_memory.set("count", count)
+            if count >= laps * size:
+                return TransitionCommand(target=END)
+            return TransitionCommand(target=f"c{(i + 1) % size}")
+        return on_enter
+    
+    nodes = [Node(f"c{i}", on_enter=make_step(i)) for i in range(size)]
+    graph = Graph(nodes[0], parallel_execution=parallel)
+    for i, node in enumerate(nodes):
+        graph.link(node, nodes[(i + 1) % size])
+    return graph.compile()
+
+def node_count(name: str, size: int) -> int:
+    """每次执行实际进入的节点数"""
+    if name == "diamond":
+        return 4 * size
+    if name == "cycle":
+        return size * 3
+    if name == "fanout":
+        return size + 1
+    return size
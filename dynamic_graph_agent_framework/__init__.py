@@ -1,5 +1,7 @@
 from .ai_tools import *
 from .graph import *
+from .tracing import Tracer, HistogramTracer, JSONLTracer, OpenTelemetryTracer, Span, Event, add_tracer, remove_tracer
+from .usage import UsageMeter
 
 __all__ = [
     'AIConfig',
@@ -9,14 +11,92 @@ __all__ = [
     'AIMessage',
     'ToolMessage',
     'CustomMessage',
+    'encode_messages',
     'OpenAIClient',
     'json_call',
     'text_call',
+    'json_stream_call',
+    'IncrementalJSONParser',
+    'JSONStreamError',
     'Context',
+    'FIT_SLIDING_WINDOW',
+    'FIT_PIN_SYSTEM',
+    'count_tokens',
+    'tiktoken_tokenizer',
+    'Prompt',
+    'PrefixMessage',
+    'PrefixStats',
+    'with_schema',
+    'close_shared_sessions',
+    'RequestBatcher',
+    'BatchStats',
+    'ResponseCache',
+    'MemoryCache',
+    'SQLiteCache',
+    'TieredCache',
+    'CacheStats',
+    'cache_key',
+    'SingleFlight',
+    'SingleFlightStats',
+    'APIError',
+    'RateLimiter',
+    'TokenBucket',
+    'AdaptiveConcurrency',
+    'backoff_delay',
+    'SSEDecoder',
+    'StreamDelta',
+    'Shape',
+    'Decoder',
+    'Completion',
+    'Hedger',
+    'HedgeStats',
+    'LatencyTracker',
+    'Validator',
+    'ValidationStats',
+    'SchemaValidationError',
+    'compile_schema',
     'Node',
+    'JOIN_RESULTS',
     'Graph',
     'TransitionCommand',
     'END',
     'Memory',
-    'Executor'
+    'MemorySnapshot',
+    'BranchMemory',
+    'MergeConflictError',
+    'MERGE_LAST_WRITER_WINS',
+    'MERGE_FIRST_WRITER_WINS',
+    'MERGE_RAISE',
+    'DELETED',
+    'Executor',
+    'RunContext',
+    'Budget',
+    'StopReason',
+    'STOP_COMPLETED',
+    'STOP_MAX_STEPS',
+    'STOP_MAX_VISITS',
+    'STOP_DEADLINE',
+    'STOP_MAX_TOKENS',
+    'STOP_MAX_COST',
+    'SCHEDULER_BFS',
+    'SCHEDULER_QUEUE',
+    'Checkpointer',
+    'CheckpointStore',
+    'FileCheckpointStore',
+    'SQLiteCheckpointStore',
+    'EXECUTION_INLINE',
+    'EXECUTION_THREAD',
+    'EXECUTION_PROCESS',
+    'set_process_pool',
+    'set_thread_pool',
+    'shutdown_pools',
+    'Tracer',
+    'HistogramTracer',
+    'JSONLTracer',
+    'OpenTelemetryTracer',
+    'Span',
+    'Event',
+    'add_tracer',
+    'remove_tracer',
+    'UsageMeter'
 ]
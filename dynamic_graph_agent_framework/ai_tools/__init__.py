@@ -1,9 +1,22 @@
 from .config import AIConfig
-from .messages import BaseMessage, SystemMessage, UserMessage, AIMessage, ToolMessage, CustomMessage
+from .messages import BaseMessage, SystemMessage, UserMessage, AIMessage, ToolMessage, CustomMessage, encode_messages
 from .client import OpenAIClient
 from .json_call import json_call
 from .text_call import text_call
-from .context import Context
+from .json_stream import json_stream_call, IncrementalJSONParser, JSONStreamError
+from .context import Context, FIT_SLIDING_WINDOW, FIT_PIN_SYSTEM
+from .prompt import Prompt, PrefixMessage, PrefixStats, with_schema
+from .tokens import count_tokens, tiktoken_tokenizer
+from .session import close_shared_sessions
+from .batching import RequestBatcher, BatchStats
+from .cache import ResponseCache, MemoryCache, SQLiteCache, TieredCache, CacheStats, cache_key
+from .singleflight import SingleFlight, SingleFlightStats
+from .errors import APIError
+from .rate_limit import RateLimiter, TokenBucket, AdaptiveConcurrency, backoff_delay
+from .sse import SSEDecoder, StreamDelta
+from .codec import Shape, Decoder, Completion
+from .hedging import Hedger, HedgeStats, LatencyTracker
+from .validation import Validator, ValidationStats, SchemaValidationError, compile_schema
 
 __all__ = [
     'AIConfig',
@@ -13,8 +26,48 @@ __all__ = [
     'AIMessage',
     'ToolMessage',
     'CustomMessage',
+    'encode_messages',
     'OpenAIClient',
     'json_call',
     'text_call',
-    'Context'
+    'json_stream_call',
+    'IncrementalJSONParser',
+    'JSONStreamError',
+    'Context',
+    'FIT_SLIDING_WINDOW',
+    'FIT_PIN_SYSTEM',
+    'count_tokens',
+    'tiktoken_tokenizer',
+    'Prompt',
+    'PrefixMessage',
+    'PrefixStats',
+    'with_schema',
+    'close_shared_sessions',
+    'RequestBatcher',
+    'BatchStats',
+    'ResponseCache',
+    'MemoryCache',
+    'SQLiteCache',
+    'TieredCache',
+    'CacheStats',
+    'cache_key',
+    'SingleFlight',
+    'SingleFlightStats',
+    'APIError',
+    'RateLimiter',
+    'TokenBucket',
+    'AdaptiveConcurrency',
+    'backoff_delay',
+    'SSEDecoder',
+    'StreamDelta',
+    'Shape',
+    'Decoder',
+    'Completion',
+    'Hedger',
+    'HedgeStats',
+    'LatencyTracker',
+    'Validator',
+    'ValidationStats',
+    'SchemaValidationError',
+    'compile_schema'
 ]
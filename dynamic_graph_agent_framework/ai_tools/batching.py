@@ -0,0 +1,133 @@
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+
+class BatchStats:
+    def __init__(self):
+        self.batches = 0
+        self.requests = 0
+        self.sizes: Counter = Counter()
+    
+    def record(self, size: int):
+        self.batches += 1
+        self.requests += size
+        self.sizes[size] += 1
+    
+    @property
+    def mean_batch_size(self) -> float:
+        return self.requests / self.batches if self.batches else 0.0
+    
+    @property
+    def max_batch_size(self) -> int:
+        return max(self.sizes) if self.sizes else 0
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "mean_batch_size": self.mean_batch_size,
+            "max_batch_size": self.max_batch_size,
+            "sizes": dict(sorted(self.sizes.items()))
+        }
+    
+    def __repr__(self) -> str:
+        return f"BatchStats(batches={self.batches}, requests={self.requests}, mean={self.mean_batch_size:.2f})"
+
+class RequestBatcher:
+    def __init__(
+        self,
+        client,
+        window: Optional[float] = None,
+        max_batch_size: Optional[int] = None,
+        max_in_flight: Optional[int] = None,
+        batch_url: Optional[str] = None
+    ):
+        config = client.config
+        self.client = client
+        self.window = config.batch_window if window is None else window
+        self.max_batch_size = max_batch_size or config.max_batch_size
+        self.max_in_flight = max_in_flight or config.max_in_flight
+        self.batch_url = batch_url or config.batch_url
+        self.stats = BatchStats()
+        self._pending: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._tasks: set = set()
+    
+    def _bind_loop(self) -> asyncio.AbstractEventLoop:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+            self._pending = []
+            self._timer = None
+        return loop
+    
+    async def submit(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        loop = self._bind_loop()
+        future = loop.create_future()
+        self._pending.append((payload, future))
+        
+        if len(self._pending) >= self.max_batch_size:
+            self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self.flush)
+        
+        return await future
+    
+    def flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        
+        batch, self._pending = self._pending, []
+        batch = [(payload, future) for payload, future in batch if not future.done()]
+        if batch:
+            self.stats.record(len(batch))
+            task = asyncio.ensure_future(self._dispatch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+    
+    async def _dispatch(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]):
+        if self.batch_url and len(batch) > 1:
+            await self._dispatch_batch(batch)
+        else:
+            await asyncio.gather(*[self._dispatch_one(payload, future) for payload, future in batch])
+    
+    async def _dispatch_one(self, payload: Dict[str, Any], future: asyncio.Future):
+        async with self._semaphore:
+            if future.done():
+                return
+            try:
+                result = await self.client._post(payload)
+            except Exception as e:
+                _resolve(future, exception=e)
+            else:
+                _resolve(future, result=result)
+    
+    async def _dispatch_batch(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]):
+        async with self._semaphore:
+            try:
+                data = await self.client._post({"requests": [payload for payload, _ in batch]}, url=self.batch_url)
+                responses = data["responses"]
+                if len(responses) != len(batch):
+                    raise ValueError(f"Batch endpoint returned {len(responses)} responses for {len(batch)} requests")
+            except Exception as e:
+                for _, future in batch:
+                    _resolve(future, exception=e)
+                return
+        
+        for (_, future), response in zip(batch, responses):
+            if isinstance(response, dict) and "error" in response and "choices" not in response:
+                _resolve(future, exception=Exception(f"Batched request failed: {response['error']}"))
+            else:
+                _resolve(future, result=response)
+
+def _resolve(future: asyncio.Future, result: Any = None, exception: Optional[BaseException] = None):
+    if future.done():
+        return
+    if exception is not None:
+        future.set_exception(exception)
+    else:
+        future.set_result(result)
@@ -0,0 +1,167 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from . import codec
+
+def cache_key(payload: Dict[str, Any]) -> str:
+    # 键必须与JSON后端无关（各库的浮点数格式不同），因此固定使用标准库
+    canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+def _encode(chunks: List[Any]) -> bytes:
+    return codec.dumps(chunks)
+
+def _decode(value: bytes) -> List[Any]:
+    return codec.loads(value)
+
+class CacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+    
+    def __repr__(self) -> str:
+        return f"CacheStats(hits={self.hits}, misses={self.misses}, evictions={self.evictions})"
+
+class ResponseCache(ABC):
+    def __init__(self):
+        self.stats = CacheStats()
+    
+    @abstractmethod
+    def get(self, key: str) -> Optional[List[Any]]:
+        ...
+    
+    @abstractmethod
+    def set(self, key: str, chunks: List[Any]):
+        ...
+    
+    @abstractmethod
+    def clear(self):
+        ...
+
+class MemoryCache(ResponseCache):
+    def __init__(self, max_entries: int = 1024, max_bytes: Optional[int] = None, ttl: Optional[float] = None):
+        super().__init__()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._bytes = 0
+    
+    def get(self, key: str) -> Optional[List[Any]]:
+        entry = self._entries.get(key)
+        if entry is not None and self.ttl is not None and time.monotonic() - entry[1] > self.ttl:
+            self._remove(key)
+            entry = None
+        
+        if entry is None:
+            self.stats.misses += 1
+            return None
+        
+        self._entries.move_to_end(key)
+        self.stats.hits += 1
+        return _decode(entry[0])
+    
+    def set(self, key: str, chunks: List[Any]):
+        value = _encode(chunks)
+        if self.max_bytes is not None and len(value) > self.max_bytes:
+            return
+        
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (value, time.monotonic())
+        self._bytes += len(value)
+        
+        while len(self._entries) > self.max_entries or (self.max_bytes is not None and self._bytes > self.max_bytes):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.stats.evictions += 1
+    
+    def _remove(self, key: str):
+        value, _ = self._entries.pop(key)
+        self._bytes -= len(value)
+    
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class SQLiteCache(ResponseCache):
+    def __init__(self, path: str, ttl: Optional[float] = None):
+        super().__init__()
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value BLOB NOT NULL, created REAL NOT NULL)"
+        )
+    
+    def get(self, key: str) -> Optional[List[Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None and self.ttl is not None and time.time() - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                row = None
+        
+        if row is None:
+            self.stats.misses += 1
+            return None
+        
+        self.stats.hits += 1
+        return _decode(row[0])
+    
+    def set(self, key: str, chunks: List[Any]):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created) VALUES (?, ?, ?)",
+                (key, _encode(chunks), time.time())
+            )
+    
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class TieredCache(ResponseCache):
+    def __init__(self, memory: MemoryCache, disk: ResponseCache):
+        super().__init__()
+        self.memory = memory
+        self.disk = disk
+    
+    def get(self, key: str) -> Optional[List[Any]]:
+        chunks = self.memory.get(key)
+        if chunks is None:
+            chunks = self.disk.get(key)
+            if chunks is not None:
+                self.memory.set(key, chunks)
+        
+        if chunks is None:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+        return chunks
+    
+    def set(self, key: str, chunks: List[Any]):
+        self.memory.set(key, chunks)
+        self.disk.set(key, chunks)
+    
+    def clear(self):
+        self.memory.clear()
+        self.disk.clear()
@@ -1,43 +1,66 @@
 from typing import Optional, AsyncGenerator, List, Dict, Any
 import aiohttp
 import asyncio
+import time
+from .. import tracing, usage
+from . import codec
 from .config import AIConfig
-from .messages import BaseMessage
+from .messages import BaseMessage, MessageList, encode_payload
+from .session import create_connector, get_shared_session
+from .batching import RequestBatcher
+from .hedging import Hedger
+from .prompt import PrefixStats, cached_tokens
+from .validation import ValidationStats
+from .cache import ResponseCache, cache_key
+from .singleflight import SingleFlight
+from .errors import APIError
+from .rate_limit import RateLimiter, Permit, estimate_tokens, parse_retry_after
+from .sse import DONE, SSEDecoder, StreamDelta
 
 class OpenAIClient:
-    def __init__(self, config: AIConfig):
+    def __init__(self, config: AIConfig, cache: Optional[ResponseCache] = None):
         self.config = config
         self.session: Optional[aiohttp.ClientSession] = None
+        self.batcher = RequestBatcher(self) if config.batching else None
+        self.cache = cache
+        self.single_flight = SingleFlight() if config.single_flight else None
+        self.limiter = RateLimiter.from_config(config)
+        self.hedger = Hedger(self) if config.hedging else None
+        self.prefix_stats = PrefixStats()
+        self.validation_stats = ValidationStats()
     
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession()
+        if not self.config.shared_session:
+            self.session = aiohttp.ClientSession(connector=create_connector(self.config))
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         if self.session:
             await self.session.close()
+            self.session = None
     
-    def _get_headers(self) -> Dict[str, str]:
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self.config.shared_session:
+            return get_shared_session(self.config)
+        if not self.session:
+            raise RuntimeError("Client session not initialized. Use async with statement.")
+        return self.session
+    
+    def _get_headers(self, api_key: Optional[str] = None) -> Dict[str, str]:
         return {
-            "Authorization": f"Bearer {self.config.api_key}",
+            "Authorization": f"Bearer {api_key or self.config.api_key}",
             "Content-Type": "application/json"
         }
     
     def _convert_messages(self, messages: List[BaseMessage]) -> List[Dict[str, str]]:
-        return [msg.to_dict() for msg in messages]
+        return MessageList(messages)
     
-    async def _make_request(
+    def _build_payload(
         self,
         messages: List[BaseMessage],
         stream: bool = False,
         json_mode: bool = False
-    ) -> AsyncGenerator[str, None]:
-        if not self.session:
-            raise RuntimeError("Client session not initialized. Use async with statement.")
-        
-        url = f"{self.config.base_url}/chat/completions"
-        headers = self._get_headers()
-        
+    ) -> Dict[str, Any]:
         payload = {
             "model": self.config.model,
             "messages": self._convert_messages(messages),
@@ -48,33 +71,210 @@ class OpenAIClient:
         if json_mode:
             payload["response_format"] = {"type": "json_object"}
         
-        async with self.session.post(
-            url,
-            headers=headers,
-            json=payload,
-            timeout=aiohttp.ClientTimeout(total=self.config.timeout)
-        ) as response:
-            if response.status != 200:
-                error_text = await response.text()
-                raise Exception(f"API request failed with status {response.status}: {error_text}")
-            
-            if stream:
-                async for line in response.content:
-                    line_str = line.decode('utf-8').strip()
-                    if line_str.startswith('data: '):
-                        data = line_str[6:]
-                        if data == '[DONE]':
+        return payload
+    
+    async def _check_response(self, response: aiohttp.ClientResponse, permit: Optional[Permit]):
+        if response.status == 200:
+            return
+        
+        error_text = await response.text()
+        error = APIError(response.status, error_text, parse_retry_after(response.headers))
+        if permit and error.overloaded:
+            self.limiter.overloaded(permit, error.retry_after)
+        raise error
+    
+    def _start_span(self, payload: Dict[str, Any]) -> Optional[tracing.Span]:
+        if not tracing.tracers:
+            return None
+        span, _ = tracing.start_span(
+            tracing.SPAN_LLM,
+            "chat.completions",
+            activate=False,
+            model=payload.get("model", self.config.model),
+            stream=bool(payload.get("stream")),
+            batch_size=len(payload["requests"]) if "requests" in payload else None
+        )
+        return span
+    
+    def _end_span(self, span: tracing.Span, usage_data: Optional[Dict[str, Any]], error: Optional[BaseException]):
+        if usage_data:
+            span.attributes["prompt_tokens"] = usage_data.get("prompt_tokens")
+            span.attributes["completion_tokens"] = usage_data.get("completion_tokens")
+            span.attributes["cached_tokens"] = cached_tokens(usage_data)
+        if isinstance(error, APIError):
+            span.attributes["status"] = error.status
+        tracing.end_span(span, error=error)
+    
+    def _record_usage(self, payload: Dict[str, Any], usage_data: Optional[Dict[str, Any]], chunks: int = 0):
+        model = payload.get("model", self.config.model)
+        if usage_data:
+            usage.record(model, usage_data.get("prompt_tokens") or 0, usage_data.get("completion_tokens") or 0)
+        else:
+            usage.record(model, estimate_tokens(payload), chunks)
+    
+    async def _post(self, payload: Dict[str, Any], url: Optional[str] = None, api_key: Optional[str] = None) -> Dict[str, Any]:
+        session = self._get_session()
+        span = self._start_span(payload)
+        usage_data = error = None
+        permit = None
+        
+        try:
+            permit = await self.limiter.acquire(estimate_tokens(payload)) if self.limiter else None
+            async with session.post(
+                url or f"{self.config.base_url}/chat/completions",
+                headers=self._get_headers(api_key),
+                data=encode_payload(payload),
+                timeout=aiohttp.ClientTimeout(total=self.config.timeout)
+            ) as response:
+                await self._check_response(response, permit)
+                data = codec.loads(await response.read())
+                usage_data = data.get("usage")
+                
+                if permit:
+                    self.limiter.succeeded(permit, (usage_data or {}).get("total_tokens"))
+                return data
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            if permit:
+                self.limiter.release(permit)
+            if span is not None:
+                self._end_span(span, usage_data, error)
+    
+    async def _stream(
+        self,
+        payload: Dict[str, Any],
+        url: Optional[str] = None,
+        api_key: Optional[str] = None
+    ) -> AsyncGenerator[StreamDelta, None]:
+        session = self._get_session()
+        span = self._start_span(payload)
+        metered = usage.active_meter.get() is not None
+        usage_data = error = None
+        permit = None
+        chunks = 0
+        
+        try:
+            permit = await self.limiter.acquire(estimate_tokens(payload)) if self.limiter else None
+            async with session.post(
+                url or f"{self.config.base_url}/chat/completions",
+                headers=self._get_headers(api_key),
+                data=encode_payload(payload),
+                timeout=aiohttp.ClientTimeout(total=self.config.timeout)
+            ) as response:
+                await self._check_response(response, permit)
+                
+                decoder = SSEDecoder()
+                body = response.content.iter_any()
+                finished = False
+                while not finished:
+                    try:
+                        events = decoder.feed(await body.__anext__())
+                    except StopAsyncIteration:
+                        # 流结束时没有换行结尾的最后一个事件（可能携带 usage）与其他事件同样处理
+                        events = decoder.close()
+                        finished = True
+                    for data in events:
+                        if data == DONE:
+                            finished = True
                             break
-                        yield data
-            else:
-                data = await response.json()
+                        delta = StreamDelta.parse(data)
+                        if delta is not None:
+                            if span is not None or metered:
+                                chunks += 1
+                                if chunks == 1 and span is not None:
+                                    span.attributes["time_to_first_chunk"] = (time.time_ns() - span.start_ns) / 1e9
+                            if b'"usage"' in delta.raw:
+                                usage_data = delta.usage or usage_data
+                            yield delta
+                
+                self.prefix_stats.record(usage_data)
+                if permit:
+                    self.limiter.succeeded(permit)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            if permit:
+                self.limiter.release(permit)
+            if metered and (usage_data or chunks):
+                self._record_usage(payload, usage_data, chunks)
+            if span is not None:
+                span.attributes["chunks"] = chunks
+                self._end_span(span, usage_data, error)
+    
+    async def _send(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        if self.batcher:
+            return await self.batcher.submit(payload)
+        return await self._post(payload)
+    
+    async def _complete(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        if self.hedger:
+            data = await self.hedger.complete(payload, self._send)
+        else:
+            data = await self._send(payload)
+        self.prefix_stats.record(data.get("usage"))
+        if usage.active_meter.get() is not None:
+            self._record_usage(payload, data.get("usage"))
+        return data
+    
+    async def _make_request(
+        self,
+        messages: List[BaseMessage],
+        stream: bool = False,
+        json_mode: bool = False
+    ) -> AsyncGenerator[Any, None]:
+        payload = self._build_payload(messages, stream, json_mode)
+        
+        if self.cache is None and self.single_flight is None:
+            async for data in self._fetch(payload):
+                yield data
+            return
+        
+        key = cache_key(payload)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                if tracing.tracers:
+                    tracing.emit(tracing.EVENT_CACHE_HIT, model=payload["model"], stream=stream)
+                for data in cached:
+                    yield StreamDelta.parse(data) if stream else data
+                return
+        
+        if self.single_flight is not None:
+            source = self.single_flight.stream(key, lambda: self._fetch_and_store(payload, key))
+        else:
+            source = self._fetch_and_store(payload, key)
+        
+        async for data in source:
+            yield data
+    
+    async def _fetch_and_store(self, payload: Dict[str, Any], key: str) -> AsyncGenerator[Any, None]:
+        if self.cache is None:
+            async for data in self._fetch(payload):
+                yield data
+            return
+        
+        chunks = []
+        async for data in self._fetch(payload):
+            chunks.append(data.raw.decode('utf-8') if isinstance(data, StreamDelta) else data)
+            yield data
+        self.cache.set(key, chunks)
+    
+    async def _fetch(self, payload: Dict[str, Any]) -> AsyncGenerator[Any, None]:
+        if payload["stream"]:
+            source = self.hedger.stream(payload) if self.hedger else self._stream(payload)
+            async for data in source:
                 yield data
+        else:
+            yield await self._complete(payload)
     
     async def chat(
         self,
         messages: List[BaseMessage],
         stream: bool = False,
         json_mode: bool = False
-    ) -> AsyncGenerator[str, None]:
+    ) -> AsyncGenerator[Any, None]:
         async for chunk in self._make_request(messages, stream, json_mode):
             yield chunk
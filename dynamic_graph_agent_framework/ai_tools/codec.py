@@ -0,0 +1,159 @@
+from typing import Any, Dict, List, Optional, Union
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+BACKEND_ORJSON = "orjson"
+BACKEND_MSGSPEC = "msgspec"
+BACKEND_STDLIB = "json"
+
+_stdlib_encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+_stdlib_sorted_encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+
+def available_backends() -> List[str]:
+    backends = []
+    if orjson is not None:
+        backends.append(BACKEND_ORJSON)
+    if msgspec is not None:
+        backends.append(BACKEND_MSGSPEC)
+    backends.append(BACKEND_STDLIB)
+    return backends
+
+backend = available_backends()[0]
+
+def set_backend(name: str):
+    global backend
+    if name not in available_backends():
+        raise ValueError(f"JSON backend '{name}' is not available")
+    backend = name
+
+def _stdlib_dumps(obj: Any, sort_keys: bool) -> bytes:
+    return (_stdlib_sorted_encoder if sort_keys else _stdlib_encoder).encode(obj).encode("utf-8")
+
+def dumps(obj: Any, sort_keys: bool = False) -> bytes:
+    """编码为紧凑的UTF-8 JSON；加速库不支持的值（如超过64位的整数、非字符串键）退回标准库"""
+    if backend == BACKEND_ORJSON:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS if sort_keys else 0)
+        except TypeError:
+            pass
+    elif backend == BACKEND_MSGSPEC:
+        try:
+            return msgspec.json.encode(obj, order="sorted" if sort_keys else None)
+        except (TypeError, msgspec.EncodeError):
+            pass
+    return _stdlib_dumps(obj, sort_keys)
+
+def dumps_str(obj: Any, sort_keys: bool = False) -> str:
+    if backend == BACKEND_STDLIB:
+        return (_stdlib_sorted_encoder if sort_keys else _stdlib_encoder).encode(obj)
+    return dumps(obj, sort_keys).decode("utf-8")
+
+def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+    """解码JSON，格式错误时统一抛出 json.JSONDecodeError"""
+    if backend == BACKEND_ORJSON:
+        return orjson.loads(data)
+    if backend == BACKEND_MSGSPEC:
+        try:
+            return msgspec.json.decode(data)
+        except msgspec.DecodeError as e:
+            text = data if isinstance(data, str) else bytes(data).decode("utf-8", "replace")
+            raise json.JSONDecodeError(str(e), text, 0) from None
+    return json.loads(data)
+
+class Shape:
+    """已知响应结构的类型化视图：__fields__ 声明字段及其类型（嵌套 Shape、[Shape] 或 Any），
+    访问时才从底层字典读取，未声明的字段不可见"""
+    
+    __slots__ = ("_obj",)
+    __fields__: Dict[str, Any] = {}
+    
+    def __init__(self, obj: Dict[str, Any]):
+        self._obj = obj
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for name, kind in cls.__fields__.items():
+            setattr(cls, name, property(_field_getter(name, kind)))
+    
+    @classmethod
+    def from_obj(cls, obj: Any) -> 'Shape':
+        if not isinstance(obj, dict):
+            raise ValueError(f"{cls.__name__} expects a JSON object")
+        return cls(obj)
+    
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__fields__)
+        return f"{type(self).__name__}({fields})"
+
+def _field_getter(name: str, kind: Any):
+    if kind is Any:
+        return lambda self: self._obj.get(name)
+    
+    if isinstance(kind, list):
+        item_shape = kind[0]
+        def get_list(self):
+            value = self._obj.get(name)
+            return [item_shape(item) for item in value if isinstance(item, dict)] if isinstance(value, list) else None
+        return get_list
+    
+    def get_shape(self):
+        value = self._obj.get(name)
+        return kind(value) if isinstance(value, dict) else None
+    return get_shape
+
+_structs: Dict[type, Any] = {}
+
+def _struct(shape: type) -> Any:
+    struct = _structs.get(shape)
+    if struct is None:
+        fields = []
+        for name, kind in shape.__fields__.items():
+            if isinstance(kind, list):
+                kind = List[_struct(kind[0])]
+            elif kind is not Any:
+                kind = _struct(kind)
+            fields.append((name, Optional[kind], None))
+        struct = _structs[shape] = msgspec.defstruct(shape.__name__, fields)
+    return struct
+
+class Decoder:
+    """将JSON解码为 Shape：使用 msgspec 时直接解码为只含声明字段的结构体，不构建中间字典"""
+    
+    def __init__(self, shape: type):
+        self.shape = shape
+        self._decoder = None
+    
+    def decode(self, data: Union[bytes, str]) -> Any:
+        if backend == BACKEND_MSGSPEC:
+            if self._decoder is None:
+                self._decoder = msgspec.json.Decoder(_struct(self.shape))
+            try:
+                return self._decoder.decode(data)
+            except msgspec.DecodeError:
+                pass
+        return self.shape.from_obj(loads(data))
+
+class ChatMessage(Shape):
+    __slots__ = ()
+    __fields__ = {"role": Any, "content": Any, "tool_calls": Any}
+
+class Choice(Shape):
+    __slots__ = ()
+    __fields__ = {"index": Any, "message": ChatMessage, "delta": ChatMessage, "finish_reason": Any}
+
+class Completion(Shape):
+    """chat.completions 响应及流式分块共用的结构"""
+    
+    __slots__ = ()
+    __fields__ = {"id": Any, "model": Any, "choices": [Choice], "usage": Any}
+
+completion_decoder = Decoder(Completion)
@@ -11,7 +11,33 @@ class AIConfig:
     temperature: float = 0.1
     streaming: bool = True
     max_retries: int = 3
+    max_repairs: int = 2
     timeout: int = 60
+    shared_session: bool = False
+    connector_limit: int = 100
+    connector_limit_per_host: int = 0
+    keepalive_timeout: float = 30.0
+    dns_cache_ttl: int = 300
+    batching: bool = False
+    batch_window: float = 0.005
+    max_batch_size: int = 16
+    max_in_flight: int = 32
+    batch_url: Optional[str] = None
+    single_flight: bool = False
+    requests_per_minute: Optional[float] = None
+    tokens_per_minute: Optional[float] = None
+    max_concurrency: Optional[int] = None
+    min_concurrency: int = 1
+    backoff_base: float = 0.5
+    backoff_max: float = 30.0
+    hedging: bool = False
+    hedge_percentile: float = 95.0
+    hedge_min_samples: int = 20
+    hedge_min_delay: float = 0.05
+    hedge_max_ratio: float = 0.1
+    hedge_base_url: Optional[str] = None
+    hedge_model: Optional[str] = None
+    hedge_api_key: Optional[str] = None
     
     @classmethod
     def from_yaml(cls, config_path: str) -> 'AIConfig':
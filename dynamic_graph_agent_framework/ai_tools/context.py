@@ -1,9 +1,60 @@
-from typing import List, Dict, Any
+from typing import Any, Awaitable, Callable, Coroutine, Dict, List, Optional, Union
+from . import codec
 from .messages import BaseMessage
+from .tokens import Tokenizer, count_tokens
+
+FIT_SLIDING_WINDOW = "sliding_window"
+FIT_PIN_SYSTEM = "pin_system"
+FIT_POLICIES = (FIT_SLIDING_WINDOW, FIT_PIN_SYSTEM)
+MESSAGE_OVERHEAD = 4
+
+FitPolicy = Union[str, Callable[['Context', int], List[int]]]
+Summarizer = Callable[[List[BaseMessage]], Union[BaseMessage, Awaitable[BaseMessage]]]
+
+class _Entry:
+    __slots__ = ("message", "data", "tokens")
+    
+    def __init__(self, message: BaseMessage, data: Dict[str, Any], tokens: int):
+        self.message = message
+        self.data = data
+        self.tokens = tokens
 
 class Context:
-    def __init__(self):
+    def __init__(self, tokenizer: Optional[Tokenizer] = None, message_overhead: int = MESSAGE_OVERHEAD):
         self.messages: List[BaseMessage] = []
+        self.tokenizer = tokenizer or count_tokens
+        self.message_overhead = message_overhead
+        self._entries: List[_Entry] = []
+        self._total = 0
+    
+    def _count(self, data: Dict[str, Any]) -> int:
+        tokens = self.message_overhead
+        for key, value in data.items():
+            if key == "role" or value is None:
+                continue
+            tokens += self.tokenizer(value if isinstance(value, str) else codec.dumps_str(value))
+        return tokens
+    
+    def _entry(self, message: BaseMessage) -> _Entry:
+        data = message._data()
+        return _Entry(message, data, self._count(data))
+    
+    def _sync(self) -> List[_Entry]:
+        # messages 可能被直接修改（替换、删除、插入或修改消息字段），按对象身份找到第一处不一致后重建其后的缓存
+        entries = self._entries
+        messages = self.messages
+        valid = 0
+        limit = min(len(entries), len(messages))
+        while valid < limit and entries[valid].message is messages[valid] and entries[valid].data is messages[valid]._data():
+            valid += 1
+        if valid < len(entries):
+            self._total -= sum(entry.tokens for entry in entries[valid:])
+            del entries[valid:]
+        for message in messages[valid:]:
+            entry = self._entry(message)
+            entries.append(entry)
+            self._total += entry.tokens
+        return entries
     
     def append(self, message: BaseMessage):
         self.messages.append(message)
@@ -11,12 +62,82 @@ class Context:
     def extend(self, messages: List[BaseMessage]):
         self.messages.extend(messages)
     
-    def to_messages(self) -> List[Dict[str, str]]:
-        return [msg.to_dict() for msg in self.messages]
+    @property
+    def token_count(self) -> int:
+        self._sync()
+        return self._total
+    
+    def message_tokens(self, index: int) -> int:
+        return self._sync()[index].tokens
+    
+    def _select(self, max_tokens: int, policy: FitPolicy) -> List[int]:
+        if callable(policy):
+            return policy(self, max_tokens)
+        if policy not in FIT_POLICIES:
+            raise ValueError(f"Unknown fit policy '{policy}'")
+        
+        entries = self._sync()
+        if self._total <= max_tokens:
+            return list(range(len(entries)))
+        
+        pinned = [i for i, entry in enumerate(entries) if entry.message.role == "system"] if policy == FIT_PIN_SYSTEM else []
+        budget = max_tokens - sum(entries[i].tokens for i in pinned)
+        if budget < 0:
+            raise ValueError(f"Pinned messages need more than {max_tokens} tokens")
+        
+        window = []
+        pinned_set = set(pinned)
+        for i in range(len(entries) - 1, -1, -1):
+            if i in pinned_set:
+                continue
+            if entries[i].tokens > budget:
+                break
+            budget -= entries[i].tokens
+            window.append(i)
+        return sorted(pinned + window)
+    
+    def fit(self, max_tokens: int, policy: FitPolicy = FIT_PIN_SYSTEM) -> List[BaseMessage]:
+        """返回不超过 max_tokens 的消息子集（保持原顺序），不修改上下文"""
+        return [self.messages[i] for i in self._select(max_tokens, policy)]
+    
+    async def compact(
+        self,
+        max_tokens: int,
+        summarize: Summarizer,
+        policy: FitPolicy = FIT_PIN_SYSTEM,
+        summary_tokens: int = 0
+    ) -> bool:
+        """将窗口外的消息交给 summarize 压缩为一条消息并替换它们，summary_tokens 为摘要预留的token数"""
+        if self.token_count <= max_tokens:
+            return False
+        
+        kept = set(self._select(max_tokens - summary_tokens, policy))
+        dropped = [i for i in range(len(self.messages)) if i not in kept]
+        if not dropped:
+            return False
+        
+        summary = summarize([self.messages[i] for i in dropped])
+        if isinstance(summary, Coroutine):
+            summary = await summary
+        
+        messages = [message for i, message in enumerate(self.messages) if i in kept]
+        messages.insert(sum(1 for i in kept if i < dropped[0]), summary)
+        self.messages[:] = messages
+        return True
+    
+    def to_messages(self, max_tokens: Optional[int] = None, policy: FitPolicy = FIT_PIN_SYSTEM) -> List[Dict[str, str]]:
+        """序列化结果按消息缓存，未变化的消息不会重新序列化；返回的是缓存字典的副本"""
+        entries = self._sync()
+        if max_tokens is None:
+            return [dict(entry.data) for entry in entries]
+        return [dict(entries[i].data) for i in self._select(max_tokens, policy)]
     
     def get_last_n(self, n: int) -> List[BaseMessage]:
         return self.messages[-n:] if n > 0 else []
     
+    def get_last_tokens(self, max_tokens: int) -> List[BaseMessage]:
+        return self.fit(max_tokens, FIT_SLIDING_WINDOW)
+    
     def clear(self):
         self.messages.clear()
     
@@ -27,4 +148,4 @@ class Context:
         return self.messages[index]
     
     def __repr__(self) -> str:
-        return f"Context(messages={len(self.messages)})"
+        return f"Context(messages={len(self.messages)}, tokens={self.token_count})"
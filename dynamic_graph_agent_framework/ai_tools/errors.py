@@ -0,0 +1,16 @@
+from typing import Optional
+
+class APIError(Exception):
+    def __init__(self, status: int, body: str, retry_after: Optional[float] = None):
+        super().__init__(f"API request failed with status {status}: {body}")
+        self.status = status
+        self.body = body
+        self.retry_after = retry_after
+    
+    @property
+    def overloaded(self) -> bool:
+        return self.status == 429 or self.status >= 500
+    
+    @property
+    def retryable(self) -> bool:
+        return self.overloaded or self.status in (408, 409)
@@ -0,0 +1,225 @@
+from collections import deque
+from typing import Any, AsyncGenerator, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+import asyncio
+import math
+import time
+from .. import tracing
+
+class LatencyTracker:
+    """按模型记录最近 window 次请求的延迟"""
+    
+    def __init__(self, window: int = 512):
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+        self._sorted: Dict[str, List[float]] = {}
+    
+    def record(self, model: str, seconds: float):
+        samples = self._samples.get(model)
+        if samples is None:
+            samples = self._samples[model] = deque(maxlen=self.window)
+        samples.append(seconds)
+        self._sorted.pop(model, None)
+    
+    def count(self, model: str) -> int:
+        samples = self._samples.get(model)
+        return len(samples) if samples else 0
+    
+    def percentile(self, model: str, p: float) -> Optional[float]:
+        ordered = self._sorted.get(model)
+        if ordered is None:
+            samples = self._samples.get(model)
+            if not samples:
+                return None
+            ordered = self._sorted[model] = sorted(samples)
+        index = min(len(ordered) - 1, max(0, math.ceil(p / 100 * len(ordered)) - 1))
+        return ordered[index]
+    
+    def to_dict(self) -> Dict[str, Dict[str, float]]:
+        return {
+            model: {"count": self.count(model), "p50": self.percentile(model, 50), "p99": self.percentile(model, 99)}
+            for model in self._samples
+        }
+
+class HedgeBudget:
+    """每个请求存入 ratio 个额度、每次对冲消耗 1 个，长期对冲比例不超过 ratio"""
+    
+    def __init__(self, ratio: float, burst: float = 10.0):
+        if not 0 < ratio <= 1:
+            raise ValueError("hedge ratio must be in (0, 1]")
+        self.ratio = ratio
+        self.burst = max(burst, 1.0)
+        self.tokens = 0.0
+    
+    def deposit(self):
+        self.tokens = min(self.burst, self.tokens + self.ratio)
+    
+    def withdraw(self) -> bool:
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        return False
+
+class HedgeStats:
+    def __init__(self):
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.denied = 0
+    
+    @property
+    def hedge_rate(self) -> float:
+        return self.hedged / self.requests if self.requests else 0.0
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "denied": self.denied,
+            "hedge_rate": self.hedge_rate
+        }
+    
+    def __repr__(self) -> str:
+        return f"HedgeStats(requests={self.requests}, hedged={self.hedged}, hedge_wins={self.hedge_wins}, denied={self.denied})"
+
+class Hedger:
+    def __init__(
+        self,
+        client,
+        percentile: Optional[float] = None,
+        min_samples: Optional[int] = None,
+        min_delay: Optional[float] = None,
+        max_ratio: Optional[float] = None,
+        base_url: Optional[str] = None,
+        model: Optional[str] = None,
+        api_key: Optional[str] = None
+    ):
+        config = client.config
+        self.client = client
+        self.percentile = config.hedge_percentile if percentile is None else percentile
+        self.min_samples = config.hedge_min_samples if min_samples is None else min_samples
+        self.min_delay = config.hedge_min_delay if min_delay is None else min_delay
+        self.base_url = base_url or config.hedge_base_url
+        self.model = model or config.hedge_model
+        self.api_key = api_key or config.hedge_api_key
+        if not 0 < self.percentile < 100:
+            raise ValueError("hedge_percentile must be in (0, 100)")
+        
+        self.budget = HedgeBudget(config.hedge_max_ratio if max_ratio is None else max_ratio)
+        self.tracker = LatencyTracker()
+        self.stream_tracker = LatencyTracker()
+        self.stats = HedgeStats()
+    
+    def delay(self, model: str, stream: bool = False) -> Optional[float]:
+        tracker = self.stream_tracker if stream else self.tracker
+        if tracker.count(model) < self.min_samples:
+            return None
+        return max(self.min_delay, tracker.percentile(model, self.percentile))
+    
+    def _alternate(self, payload: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[str], Optional[str]]:
+        hedge_payload = dict(payload, model=self.model) if self.model else payload
+        url = f"{self.base_url}/chat/completions" if self.base_url else None
+        return hedge_payload, url, self.api_key
+    
+    async def _hedged(
+        self,
+        model: str,
+        primary: Callable[[], Awaitable[Any]],
+        hedge: Callable[[], Awaitable[Any]],
+        hedge_model: str,
+        stream: bool = False,
+        discard: Optional[Callable[[Any], Awaitable[None]]] = None
+    ) -> Any:
+        self.stats.requests += 1
+        self.budget.deposit()
+        tracker = self.stream_tracker if stream else self.tracker
+        delay = self.delay(model, stream)
+        
+        started = time.monotonic()
+        primary_task = asyncio.ensure_future(primary())
+        attempts = {primary_task: (model, started)}
+        winner = None
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait({primary_task}, timeout=delay)
+                if not done:
+                    if self.budget.withdraw():
+                        self.stats.hedged += 1
+                        if tracing.tracers:
+                            tracing.emit(tracing.EVENT_HEDGE, model=model, hedge_model=hedge_model, stream=stream, delay=delay)
+                        attempts[asyncio.ensure_future(hedge())] = (hedge_model, time.monotonic())
+                    else:
+                        self.stats.denied += 1
+            
+            pending = set(attempts)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in attempts:
+                    if task not in done:
+                        continue
+                    if task.exception() is None:
+                        winner = task
+                        break
+                    if error is None or task is primary_task:
+                        error = task.exception()
+                if winner is not None:
+                    break
+            
+            if winner is None:
+                raise error
+            attempt_model, attempt_started = attempts[winner]
+            tracker.record(attempt_model, time.monotonic() - attempt_started)
+            if winner is not primary_task:
+                self.stats.hedge_wins += 1
+            return winner.result()
+        finally:
+            for task, (attempt_model, attempt_started) in attempts.items():
+                if task is winner:
+                    continue
+                if not task.done():
+                    # 被取消的请求按已等待时间记录，避免延迟分布只剩下较快的一方
+                    tracker.record(attempt_model, time.monotonic() - attempt_started)
+                    task.cancel()
+                elif discard is not None and not task.cancelled() and task.exception() is None:
+                    await discard(task.result())
+            await asyncio.gather(*(task for task in attempts if task is not winner), return_exceptions=True)
+    
+    async def complete(self, payload: Dict[str, Any], send: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        model = payload.get("model", self.client.config.model)
+        hedge_payload, url, api_key = self._alternate(payload)
+        return await self._hedged(
+            model,
+            lambda: send(payload),
+            lambda: self.client._post(hedge_payload, url=url, api_key=api_key),
+            hedge_payload.get("model", model)
+        )
+    
+    async def stream(self, payload: Dict[str, Any]) -> AsyncGenerator[Any, None]:
+        model = payload.get("model", self.client.config.model)
+        hedge_payload, url, api_key = self._alternate(payload)
+        
+        async def open_stream(stream: AsyncGenerator[Any, None]) -> Tuple[AsyncGenerator[Any, None], bool, Any]:
+            try:
+                return stream, True, await stream.__anext__()
+            except StopAsyncIteration:
+                return stream, False, None
+        
+        async def discard(opened: Tuple[AsyncGenerator[Any, None], bool, Any]):
+            await opened[0].aclose()
+        
+        stream, has_first, first = await self._hedged(
+            model,
+            lambda: open_stream(self.client._stream(payload)),
+            lambda: open_stream(self.client._stream(hedge_payload, url=url, api_key=api_key)),
+            hedge_payload.get("model", model),
+            True,
+            discard
+        )
+        try:
+            if has_first:
+                yield first
+                async for delta in stream:
+                    yield delta
+        finally:
+            await stream.aclose()
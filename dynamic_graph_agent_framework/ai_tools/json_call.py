@@ -1,26 +1,39 @@
+import asyncio
 import json
 import re
 from typing import Any, Dict, Optional, List
+from .. import tracing
+from . import codec
 from .client import OpenAIClient
 from .config import AIConfig
-from .messages import BaseMessage
+from .errors import APIError
+from .messages import AIMessage, BaseMessage, UserMessage
+from .prompt import with_schema
+from .rate_limit import backoff_delay
+from .validation import SchemaLike, SchemaValidationError, compile_schema
+
+REPAIR_INSTRUCTION = "Your JSON response does not match the schema:\n{errors}\nReply with the corrected JSON only."
 
 async def json_call(
     client: OpenAIClient,
     messages: List[BaseMessage],
-    schema: Optional[Dict[str, Any]] = None,
-    max_retries: Optional[int] = None
+    schema: Optional[SchemaLike] = None,
+    max_retries: Optional[int] = None,
+    max_repairs: Optional[int] = None
 ) -> Dict[str, Any]:
     config = client.config
     retries = max_retries if max_retries is not None else config.max_retries
+    repairs = max_repairs if max_repairs is not None else config.max_repairs
     
-    if schema:
-        messages.append(BaseMessage(
-            role="system",
-            content=f"Please respond with valid JSON following this schema: {json.dumps(schema)}"
-        ))
+    validator = compile_schema(schema) if schema is not None else None
+    messages = with_schema(messages, validator.schema if validator else None)
+    stats = client.validation_stats
+    if validator:
+        stats.calls += 1
     
-    for attempt in range(retries + 1):
+    attempt = 0
+    repair = 0
+    while True:
         try:
             response_chunks = []
             async for chunk in client.chat(messages, stream=False, json_mode=True):
@@ -31,21 +44,54 @@ async def json_call(
             
             parsed_json = _parse_and_fix_json(content)
             
-            if parsed_json:
-                return parsed_json
-            elif attempt < retries:
-                continue
-            else:
+            if not parsed_json:
+                if attempt < retries:
+                    attempt += 1
+                    if tracing.tracers:
+                        tracing.emit(tracing.EVENT_RETRY, call="json_call", attempt=attempt, delay=0.0, error="InvalidJSON")
+                    continue
                 raise ValueError(f"Failed to parse JSON after {retries + 1} attempts")
         
         except Exception as e:
-            if attempt < retries:
-                await asyncio.sleep(1)
+            if attempt < retries and not (isinstance(e, APIError) and not e.retryable):
+                delay = _retry_delay(e, attempt, config)
+                attempt += 1
+                if tracing.tracers:
+                    tracing.emit(tracing.EVENT_RETRY, call="json_call", attempt=attempt, delay=delay, error=type(e).__name__)
+                await asyncio.sleep(delay)
                 continue
             else:
                 raise e
-    
-    raise RuntimeError("Unexpected error in json_call")
+        
+        if validator is None:
+            return parsed_json
+        
+        errors = validator.validate(parsed_json)
+        if not errors:
+            if repair:
+                stats.repaired += 1
+            else:
+                stats.first_pass += 1
+            return parsed_json
+        
+        if repair >= repairs:
+            stats.failed += 1
+            raise SchemaValidationError(errors, parsed_json)
+        
+        # 只回传校验错误，保留原对话前缀，而不是盲目重发整个请求
+        repair += 1
+        stats.repair_attempts += 1
+        if tracing.tracers:
+            tracing.emit(tracing.EVENT_REPAIR, call="json_call", attempt=repair, errors=len(errors))
+        messages = [*messages, AIMessage(content), UserMessage(_repair_prompt(errors))]
+
+def _repair_prompt(errors: List[str]) -> str:
+    return REPAIR_INSTRUCTION.format(errors="\n".join(f"- {error}" for error in errors))
+
+def _retry_delay(error: Exception, attempt: int, config: AIConfig) -> float:
+    if isinstance(error, APIError) and error.retry_after is not None:
+        return error.retry_after
+    return backoff_delay(attempt, config.backoff_base, config.backoff_max)
 
 def _parse_and_fix_json(content: str) -> Optional[Dict[str, Any]]:
     content = content.strip()
@@ -54,19 +100,19 @@ def _parse_and_fix_json(content: str) -> Optional[Dict[str, Any]]:
     content = re.sub(r'```\s*', '', content)
     
     try:
-        return json.loads(content)
+        return codec.loads(content)
     except json.JSONDecodeError:
         pass
     
     try:
         content = content.replace("'", '"')
-        return json.loads(content)
+        return codec.loads(content)
     except json.JSONDecodeError:
         pass
     
     try:
         content = re.sub(r',\s*([}\]])', r'\1', content)
-        return json.loads(content)
+        return codec.loads(content)
     except json.JSONDecodeError:
         pass
     
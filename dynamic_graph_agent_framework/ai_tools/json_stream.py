@@ -0,0 +1,195 @@
+import json
+from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple
+from . import codec
+from .client import OpenAIClient
+from .messages import BaseMessage
+from .prompt import with_schema
+from .text_call import text_call
+from .validation import SchemaLike, schema_of
+
+_FENCE = "```json"
+_VALUE_START = set('{["-0123456789tfn')
+_CLOSERS = {'{': '}', '[': ']'}
+
+_PREAMBLE = 0
+_KEY_OR_END = 1
+_KEY = 2
+_COLON = 3
+_VALUE_START_STATE = 4
+_VALUE = 5
+_AFTER_VALUE = 6
+_DONE = 7
+
+class JSONStreamError(ValueError):
+    pass
+
+class IncrementalJSONParser:
+    def __init__(self):
+        self.fields: Dict[str, Any] = {}
+        self._state = _PREAMBLE
+        self._noise: List[str] = []
+        self._key: List[str] = []
+        self._value: List[str] = []
+        self._current_key: Optional[str] = None
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._expect_key = False
+        self._offset = 0
+    
+    @property
+    def done(self) -> bool:
+        return self._state == _DONE
+    
+    def snapshot(self) -> Dict[str, Any]:
+        return dict(self.fields)
+    
+    def _fail(self, message: str):
+        raise JSONStreamError(f"{message} at offset {self._offset}")
+    
+    def feed(self, text: str) -> List[Tuple[str, Any]]:
+        completed: List[Tuple[str, Any]] = []
+        for char in text:
+            self._consume(char, completed)
+            self._offset += 1
+        return completed
+    
+    def close(self) -> Dict[str, Any]:
+        if self._state == _VALUE and not self._stack and not self._in_string:
+            self._finish_value([])
+        if self._state != _DONE:
+            self._fail("Truncated JSON object")
+        return self.fields
+    
+    def _consume(self, char: str, completed: List[Tuple[str, Any]]):
+        state = self._state
+        
+        if state == _VALUE:
+            self._consume_value(char, completed)
+        elif state == _KEY:
+            self._key.append(char)
+            if self._escape:
+                self._escape = False
+            elif char == '\\':
+                self._escape = True
+            elif char == '"':
+                self._current_key = codec.loads(''.join(self._key))
+                self._key = []
+                self._state = _COLON
+        elif char.isspace():
+            return
+        elif state == _PREAMBLE:
+            if char == '{':
+                self._state = _KEY_OR_END
+                self._expect_key = False
+                return
+            self._noise.append(char)
+            noise = ''.join(self._noise)
+            if not _FENCE.startswith(noise):
+                self._fail(f"Expected '{{' but got {noise!r}")
+        elif state == _KEY_OR_END:
+            if char == '"':
+                self._key = [char]
+                self._state = _KEY
+            elif char == '}' and not self._expect_key:
+                self._state = _DONE
+                self._noise = []
+            else:
+                self._fail(f"Expected object key but got {char!r}")
+        elif state == _COLON:
+            if char != ':':
+                self._fail(f"Expected ':' after key {self._current_key!r} but got {char!r}")
+            self._state = _VALUE_START_STATE
+        elif state == _VALUE_START_STATE:
+            if char not in _VALUE_START:
+                self._fail(f"Invalid start of value for key {self._current_key!r}: {char!r}")
+            self._state = _VALUE
+            self._consume_value(char, completed)
+        elif state == _AFTER_VALUE:
+            if char == ',':
+                self._state = _KEY_OR_END
+                self._expect_key = True
+            elif char == '}':
+                self._state = _DONE
+                self._noise = []
+            else:
+                self._fail(f"Expected ',' or '}}' but got {char!r}")
+        elif state == _DONE:
+            self._noise.append(char)
+            if not "```".startswith(''.join(self._noise)):
+                self._fail(f"Unexpected data after JSON object: {char!r}")
+    
+    def _consume_value(self, char: str, completed: List[Tuple[str, Any]]):
+        if self._in_string:
+            self._value.append(char)
+            if self._escape:
+                self._escape = False
+            elif char == '\\':
+                self._escape = True
+            elif char == '"':
+                self._in_string = False
+                if not self._stack:
+                    self._finish_value(completed)
+            return
+        
+        if char == '"':
+            self._value.append(char)
+            self._in_string = True
+        elif char in _CLOSERS:
+            self._value.append(char)
+            self._stack.append(_CLOSERS[char])
+        elif char in '}]':
+            if not self._stack:
+                if char == ']':
+                    self._fail(f"Unexpected ']' in value for key {self._current_key!r}")
+                self._finish_value(completed)
+                self._consume(char, completed)
+                return
+            if char != self._stack.pop():
+                self._fail(f"Mismatched {char!r} in value for key {self._current_key!r}")
+            self._value.append(char)
+            if not self._stack:
+                self._finish_value(completed)
+        elif not self._stack and (char == ',' or char.isspace()):
+            self._finish_value(completed)
+            self._consume(char, completed)
+        else:
+            self._value.append(char)
+    
+    def _finish_value(self, completed: List[Tuple[str, Any]]):
+        text = ''.join(self._value)
+        try:
+            value = codec.loads(text)
+        except json.JSONDecodeError as e:
+            self._fail(f"Invalid value for key {self._current_key!r}: {e.msg}")
+        self.fields[self._current_key] = value
+        completed.append((self._current_key, value))
+        self._value = []
+        self._state = _AFTER_VALUE
+
+async def json_stream_call(
+    client: OpenAIClient,
+    messages: List[BaseMessage],
+    schema: Optional[SchemaLike] = None,
+    max_retries: Optional[int] = None
+) -> AsyncGenerator[Tuple[str, Any], None]:
+    retries = max_retries if max_retries is not None else client.config.max_retries
+    
+    messages = with_schema(messages, schema_of(schema) if schema is not None else None)
+    
+    for attempt in range(retries + 1):
+        parser = IncrementalJSONParser()
+        emitted = False
+        stream = text_call(client, messages, stream=True, json_mode=True)
+        try:
+            async for chunk in stream:
+                for field in parser.feed(chunk):
+                    emitted = True
+                    yield field
+            parser.close()
+            return
+        except JSONStreamError:
+            if emitted or attempt >= retries:
+                raise
+        finally:
+            await stream.aclose()
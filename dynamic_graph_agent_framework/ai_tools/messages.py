@@ -1,75 +1,192 @@
-from dataclasses import dataclass, asdict, field
-from typing import Any, Dict, Optional
-import json
+from typing import Any, Dict, Iterable, List, Optional
+import sys
+from . import codec
+
+ROLE_SYSTEM = "system"
+ROLE_USER = "user"
+ROLE_ASSISTANT = "assistant"
+ROLE_TOOL = "tool"
 
 class BaseMessage:
+    """消息基类：序列化结果在首次使用时缓存，修改字段时失效；to_dict 返回缓存字典的副本"""
+    
+    __slots__ = ("_role", "_content", "_dict", "_json")
+    
     def __init__(self, role: str, content: str):
-        self.role = role
-        self.content = content
+        self._role = sys.intern(role)
+        self._content = content
+        self._dict: Optional[Dict[str, Any]] = None
+        self._json: Optional[str] = None
+    
+    @property
+    def role(self) -> str:
+        return self._role
+    
+    @role.setter
+    def role(self, role: str):
+        self._role = sys.intern(role)
+        self._invalidate()
     
-    def to_dict(self) -> Dict[str, str]:
-        return {"role": self.role, "content": self.content}
+    @property
+    def content(self) -> str:
+        return self._content
+    
+    @content.setter
+    def content(self, content: str):
+        self._content = content
+        self._invalidate()
+    
+    def _invalidate(self):
+        self._dict = None
+        self._json = None
+    
+    def _fields(self) -> Dict[str, Any]:
+        return {"role": self._role, "content": self._content}
+    
+    def _data(self) -> Dict[str, Any]:
+        # 缓存的共享字典，只供内部编码使用，不得修改
+        data = self._dict
+        if data is None:
+            data = self._dict = self._fields()
+        return data
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self._data())
     
     def to_json(self) -> str:
-        return json.dumps(self.to_dict(), ensure_ascii=False)
+        text = self._json
+        if text is None:
+            text = self._json = codec.dumps_str(self._data())
+        return text
+    
+    def __getstate__(self):
+        return self._fields()
+    
+    def __setstate__(self, state: Dict[str, Any]):
+        BaseMessage.__init__(self, state["role"], state["content"])
+    
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{key}={value!r}" for key, value in self._fields().items() if key != "role")
+        return f"{type(self).__name__}({fields}, role={self._role!r})"
+
+def _fields_eq(self, other: Any) -> bool:
+    # 与原数据类一致：同类型且字段相同即相等，因此不可哈希
+    if type(other) is not type(self):
+        return NotImplemented
+    return self._data() == other._data()
 
-@dataclass
-class SystemMessage:
-    content: str
-    role: str = field(default="system", init=False)
+class SystemMessage(BaseMessage):
+    __slots__ = ()
     
-    def to_dict(self) -> Dict[str, str]:
-        return {"role": self.role, "content": self.content}
+    __eq__ = _fields_eq
+    __hash__ = None
     
-    def to_json(self) -> str:
-        return json.dumps(self.to_dict(), ensure_ascii=False)
+    def __init__(self, content: str):
+        BaseMessage.__init__(self, ROLE_SYSTEM, content)
 
-@dataclass
-class UserMessage:
-    content: str
-    role: str = field(default="user", init=False)
+class UserMessage(BaseMessage):
+    __slots__ = ()
     
-    def to_dict(self) -> Dict[str, str]:
-        return {"role": self.role, "content": self.content}
+    __eq__ = _fields_eq
+    __hash__ = None
     
-    def to_json(self) -> str:
-        return json.dumps(self.to_dict(), ensure_ascii=False)
+    def __init__(self, content: str):
+        BaseMessage.__init__(self, ROLE_USER, content)
 
-@dataclass
-class AIMessage:
-    content: str
-    role: str = field(default="assistant", init=False)
+class AIMessage(BaseMessage):
+    __slots__ = ()
     
-    def to_dict(self) -> Dict[str, str]:
-        return {"role": self.role, "content": self.content}
+    __eq__ = _fields_eq
+    __hash__ = None
     
-    def to_json(self) -> str:
-        return json.dumps(self.to_dict(), ensure_ascii=False)
+    def __init__(self, content: str):
+        BaseMessage.__init__(self, ROLE_ASSISTANT, content)
 
-@dataclass
-class ToolMessage:
-    content: str
-    tool_call_id: Optional[str] = None
-    role: str = field(default="tool", init=False)
+class ToolMessage(BaseMessage):
+    __slots__ = ("_tool_call_id",)
     
-    def to_dict(self) -> Dict[str, Any]:
-        result = {"role": self.role, "content": self.content}
-        if self.tool_call_id is not None:
-            result["tool_call_id"] = self.tool_call_id
-        return result
+    __eq__ = _fields_eq
+    __hash__ = None
     
-    def to_json(self) -> str:
-        return json.dumps(self.to_dict(), ensure_ascii=False)
+    def __init__(self, content: str, tool_call_id: Optional[str] = None):
+        BaseMessage.__init__(self, ROLE_TOOL, content)
+        self._tool_call_id = tool_call_id
+    
+    @property
+    def tool_call_id(self) -> Optional[str]:
+        return self._tool_call_id
+    
+    @tool_call_id.setter
+    def tool_call_id(self, tool_call_id: Optional[str]):
+        self._tool_call_id = tool_call_id
+        self._invalidate()
+    
+    def __setstate__(self, state: Dict[str, Any]):
+        ToolMessage.__init__(self, state["content"], state.get("tool_call_id"))
+    
+    def _fields(self) -> Dict[str, Any]:
+        result = {"role": self._role, "content": self._content}
+        if self._tool_call_id is not None:
+            result["tool_call_id"] = self._tool_call_id
+        return result
 
 class CustomMessage(BaseMessage):
+    __slots__ = ("_extra",)
+    
     def __init__(self, role: str, content: str, **kwargs):
-        super().__init__(role=role, content=content)
-        for key, value in kwargs.items():
-            setattr(self, key, value)
+        BaseMessage.__init__(self, role, content)
+        self._extra = kwargs
     
-    def to_dict(self) -> Dict[str, Any]:
-        result = {"role": self.role, "content": self.content}
-        for key, value in self.__dict__.items():
-            if key not in ['role', 'content']:
-                result[key] = value
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        try:
+            return self._extra[name]
+        except KeyError:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'") from None
+    
+    def __setattr__(self, name: str, value: Any):
+        if name.startswith("_") or name in ("role", "content"):
+            object.__setattr__(self, name, value)
+        else:
+            self._extra[name] = value
+            self._invalidate()
+    
+    def __delattr__(self, name: str):
+        if name in self._extra:
+            del self._extra[name]
+            self._invalidate()
+        else:
+            object.__delattr__(self, name)
+    
+    def __setstate__(self, state: Dict[str, Any]):
+        state = dict(state)
+        CustomMessage.__init__(self, state.pop("role"), state.pop("content"), **state)
+    
+    def _fields(self) -> Dict[str, Any]:
+        result = {"role": self._role, "content": self._content}
+        result.update(self._extra)
         return result
+
+class MessageList(list):
+    """消息字典列表，同时保留原消息对象，使请求体可以直接拼接各消息缓存的JSON"""
+    
+    __slots__ = ("messages",)
+    
+    def __init__(self, messages: List[BaseMessage]):
+        super().__init__(message._data() for message in messages)
+        self.messages = messages
+
+def encode_messages(messages: Iterable[BaseMessage]) -> str:
+    """一次遍历将整个消息序列（列表或 Context）编码为JSON数组，每条消息复用自身缓存的JSON"""
+    return "[" + ",".join([message.to_json() for message in messages]) + "]"
+
+def encode_payload(payload: Dict[str, Any]) -> bytes:
+    messages = payload.get("messages")
+    if not isinstance(messages, MessageList) or codec.backend != codec.BACKEND_STDLIB:
+        # orjson / msgspec 整体编码比逐条拼接缓存的JSON更快
+        return codec.dumps(payload)
+    
+    head = codec.dumps_str({key: value for key, value in payload.items() if key != "messages"})
+    separator = "," if len(head) > 2 else ""
+    return f'{head[:-1]}{separator}"messages":{encode_messages(messages.messages)}}}'.encode("utf-8")
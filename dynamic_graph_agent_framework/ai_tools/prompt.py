@@ -0,0 +1,126 @@
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+import hashlib
+import json
+from .context import Context
+from .messages import BaseMessage, CustomMessage
+
+SCHEMA_INSTRUCTION = "Please respond with valid JSON following this schema: {schema}"
+
+class PrefixMessage(CustomMessage):
+    """创建时即序列化的消息，作为提示前缀在多次请求间共享"""
+    
+    __slots__ = ()
+    
+    def __init__(self, role: str, content: str, **fields):
+        super().__init__(role, content, **fields)
+        self.to_json()
+    
+    def __repr__(self) -> str:
+        return f"PrefixMessage(role='{self.role}', content={self.content[:40]!r})"
+
+def _canonical(value: Any) -> str:
+    # 前缀必须与JSON后端无关才能逐字节稳定，因此固定使用标准库
+    return json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+@lru_cache(maxsize=256)
+def _schema_message(schema: str) -> PrefixMessage:
+    return PrefixMessage("system", SCHEMA_INSTRUCTION.format(schema=schema))
+
+def schema_message(schema: Dict[str, Any]) -> PrefixMessage:
+    """同一 schema（与键顺序无关）总是得到同一条消息对象"""
+    return _schema_message(_canonical(schema))
+
+def with_schema(messages: Sequence[BaseMessage], schema: Optional[Dict[str, Any]]) -> List[BaseMessage]:
+    """返回新列表：schema 说明插在开头的系统消息之后，使其成为稳定前缀的一部分；不修改 messages"""
+    if not schema:
+        return list(messages)
+    
+    split = 0
+    while split < len(messages) and messages[split].role == "system":
+        split += 1
+    return [*messages[:split], schema_message(schema), *messages[split:]]
+
+class Prompt:
+    """稳定内容（系统提示、schema、示例）在前、对话在后的提示组装器，前缀只序列化一次"""
+    
+    def __init__(
+        self,
+        system: Optional[Union[str, List[str]]] = None,
+        schema: Optional[Dict[str, Any]] = None,
+        examples: Optional[Iterable[BaseMessage]] = None
+    ):
+        prefix: List[PrefixMessage] = []
+        for text in [system] if isinstance(system, str) else system or []:
+            prefix.append(PrefixMessage("system", text))
+        if schema:
+            prefix.append(schema_message(schema))
+        for message in examples or []:
+            data = message.to_dict()
+            prefix.append(PrefixMessage(**data))
+        
+        self.schema = schema
+        self.prefix = tuple(prefix)
+        self.prefix_json = _canonical([message._data() for message in self.prefix])
+        self.prefix_hash = hashlib.sha256(self.prefix_json.encode("utf-8")).hexdigest()[:16]
+    
+    def prefix_tokens(self, context: Context) -> int:
+        return sum(context._count(message._data()) for message in self.prefix)
+    
+    def render(self, messages: Union[Context, Sequence[BaseMessage]], max_tokens: Optional[int] = None) -> List[BaseMessage]:
+        """返回前缀加对话消息的新列表；传入 Context 与 max_tokens 时按剩余预算裁剪对话"""
+        if isinstance(messages, Context):
+            if max_tokens is not None:
+                history = messages.fit(max_tokens - self.prefix_tokens(messages))
+            else:
+                history = messages.messages
+        else:
+            history = messages
+        return [*self.prefix, *history]
+    
+    def __repr__(self) -> str:
+        return f"Prompt(prefix={len(self.prefix)}, hash={self.prefix_hash})"
+
+def cached_tokens(usage_data: Dict[str, Any]) -> int:
+    details = usage_data.get("prompt_tokens_details") or {}
+    return details.get("cached_tokens") or usage_data.get("cache_read_input_tokens") or 0
+
+class PrefixStats:
+    """按响应 usage 中的缓存token数统计提示前缀命中情况"""
+    
+    def __init__(self):
+        self.requests = 0
+        self.hits = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+    
+    def record(self, usage_data: Optional[Dict[str, Any]]):
+        if not usage_data:
+            return
+        cached = cached_tokens(usage_data)
+        self.requests += 1
+        self.prompt_tokens += usage_data.get("prompt_tokens") or 0
+        self.cached_tokens += cached
+        if cached:
+            self.hits += 1
+    
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.requests if self.requests else 0.0
+    
+    @property
+    def cached_ratio(self) -> float:
+        return self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "hits": self.hits,
+            "prompt_tokens": self.prompt_tokens,
+            "cached_tokens": self.cached_tokens,
+            "hit_rate": self.hit_rate,
+            "cached_ratio": self.cached_ratio
+        }
+    
+    def __repr__(self) -> str:
+        return f"PrefixStats(requests={self.requests}, hit_rate={self.hit_rate:.2f}, cached_ratio={self.cached_ratio:.2f})"
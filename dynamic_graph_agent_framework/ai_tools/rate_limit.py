@@ -0,0 +1,184 @@
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Any, Deque, Dict, Mapping, Optional
+import asyncio
+import random
+import time
+from .config import AIConfig
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 30.0) -> float:
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+def parse_retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    value = headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def estimate_tokens(payload: Dict[str, Any]) -> int:
+    if "requests" in payload:
+        return sum(estimate_tokens(item) for item in payload["requests"])
+    chars = sum(len(str(message.get("content") or "")) for message in payload.get("messages", ()))
+    return chars // 4 + 1
+
+class TokenBucket:
+    def __init__(self, rate_per_minute: float, burst_seconds: float = 1.0):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+    
+    def _get_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._lock = asyncio.Lock()
+        return self._lock
+    
+    async def acquire(self, amount: float = 1.0):
+        needed = min(amount, self.capacity)
+        async with self._get_lock():
+            self._refill()
+            while self._tokens < needed:
+                await asyncio.sleep((needed - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= amount
+    
+    def adjust(self, amount: float):
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens - amount)
+    
+    @property
+    def available(self) -> float:
+        self._refill()
+        return self._tokens
+
+class AdaptiveConcurrency:
+    def __init__(self, maximum: int, minimum: int = 1, initial: Optional[int] = None, decrease: float = 0.5):
+        self.maximum = maximum
+        self.minimum = max(1, minimum)
+        self.limit = float(initial or maximum)
+        self.decrease = decrease
+        self.in_flight = 0
+        self.epoch = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+    
+    async def acquire(self) -> int:
+        while self.in_flight >= int(self.limit):
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                else:
+                    self._wake()
+                raise
+        self.in_flight += 1
+        return self.epoch
+    
+    def release(self):
+        self.in_flight -= 1
+        self._wake()
+    
+    def _wake(self):
+        free = int(self.limit) - self.in_flight
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+    
+    def on_success(self):
+        self.limit = min(float(self.maximum), self.limit + 1.0 / self.limit)
+        self._wake()
+    
+    def on_overload(self, epoch: int):
+        if epoch != self.epoch:
+            return
+        self.epoch += 1
+        self.limit = max(float(self.minimum), self.limit * self.decrease)
+
+class Permit:
+    def __init__(self, estimated_tokens: int, epoch: int):
+        self.estimated_tokens = estimated_tokens
+        self.epoch = epoch
+
+class RateLimiter:
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        max_concurrency: Optional[int] = None,
+        min_concurrency: int = 1
+    ):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.concurrency = AdaptiveConcurrency(max_concurrency, min_concurrency) if max_concurrency else None
+        self._paused_until = 0.0
+    
+    @classmethod
+    def from_config(cls, config: AIConfig) -> Optional['RateLimiter']:
+        if not (config.requests_per_minute or config.tokens_per_minute or config.max_concurrency):
+            return None
+        return cls(
+            requests_per_minute=config.requests_per_minute,
+            tokens_per_minute=config.tokens_per_minute,
+            max_concurrency=config.max_concurrency,
+            min_concurrency=config.min_concurrency
+        )
+    
+    def pause(self, seconds: float):
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+    
+    async def acquire(self, estimated_tokens: int = 0) -> Permit:
+        delay = self._paused_until - time.monotonic()
+        while delay > 0:
+            await asyncio.sleep(delay)
+            delay = self._paused_until - time.monotonic()
+        
+        taken = []
+        try:
+            if self.requests:
+                await self.requests.acquire(1)
+                taken.append((self.requests, 1))
+            if self.tokens and estimated_tokens:
+                await self.tokens.acquire(estimated_tokens)
+                taken.append((self.tokens, estimated_tokens))
+            epoch = await self.concurrency.acquire() if self.concurrency else 0
+        except asyncio.CancelledError:
+            for bucket, amount in taken:
+                bucket.adjust(-amount)
+            raise
+        return Permit(estimated_tokens, epoch)
+    
+    def release(self, permit: Permit):
+        if self.concurrency:
+            self.concurrency.release()
+    
+    def succeeded(self, permit: Permit, used_tokens: Optional[int] = None):
+        if self.tokens and used_tokens is not None:
+            self.tokens.adjust(used_tokens - permit.estimated_tokens)
+        if self.concurrency:
+            self.concurrency.on_success()
+    
+    def overloaded(self, permit: Permit, retry_after: Optional[float] = None):
+        if retry_after:
+            self.pause(retry_after)
+        if self.concurrency:
+            self.concurrency.on_overload(permit.epoch)
@@ -0,0 +1,45 @@
+from typing import Dict, Tuple
+import asyncio
+import aiohttp
+from .config import AIConfig
+
+_shared_sessions: Dict[Tuple, Tuple[asyncio.AbstractEventLoop, aiohttp.ClientSession]] = {}
+
+def create_connector(config: AIConfig) -> aiohttp.TCPConnector:
+    return aiohttp.TCPConnector(
+        limit=config.connector_limit,
+        limit_per_host=config.connector_limit_per_host,
+        keepalive_timeout=config.keepalive_timeout,
+        ttl_dns_cache=config.dns_cache_ttl
+    )
+
+def _session_key(loop: asyncio.AbstractEventLoop, config: AIConfig) -> Tuple:
+    return (
+        id(loop),
+        config.connector_limit,
+        config.connector_limit_per_host,
+        config.keepalive_timeout,
+        config.dns_cache_ttl
+    )
+
+def get_shared_session(config: AIConfig) -> aiohttp.ClientSession:
+    loop = asyncio.get_running_loop()
+    
+    for key, (owner, _) in list(_shared_sessions.items()):
+        if owner.is_closed():
+            del _shared_sessions[key]
+    
+    key = _session_key(loop, config)
+    entry = _shared_sessions.get(key)
+    if entry is None or entry[0] is not loop or entry[1].closed:
+        session = aiohttp.ClientSession(connector=create_connector(config))
+        _shared_sessions[key] = (loop, session)
+        return session
+    return entry[1]
+
+async def close_shared_sessions():
+    loop = asyncio.get_running_loop()
+    for key, (owner, session) in list(_shared_sessions.items()):
+        if owner is loop:
+            del _shared_sessions[key]
+            await session.close()
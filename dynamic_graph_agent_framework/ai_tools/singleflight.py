@@ -0,0 +1,78 @@
+from typing import Any, AsyncGenerator, Callable, Dict, Hashable, List, Optional
+import asyncio
+
+class _Flight:
+    def __init__(self):
+        self.chunks: List[Any] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Event()
+    
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+    
+    async def pump(self, source: AsyncGenerator[Any, None]):
+        try:
+            async for chunk in source:
+                self.chunks.append(chunk)
+                self._notify()
+        except BaseException as e:
+            self.error = e
+            if isinstance(e, asyncio.CancelledError):
+                raise
+        finally:
+            self.done = True
+            self._notify()
+    
+    async def subscribe(self) -> AsyncGenerator[Any, None]:
+        self.subscribers += 1
+        try:
+            index = 0
+            while True:
+                while index < len(self.chunks):
+                    yield self.chunks[index]
+                    index += 1
+                if self.done:
+                    if self.error is not None:
+                        raise self.error
+                    return
+                await self._changed.wait()
+        finally:
+            self.subscribers -= 1
+            if self.subscribers == 0 and not self.done and self.task is not None:
+                self.task.cancel()
+
+class SingleFlightStats:
+    def __init__(self):
+        self.flights = 0
+        self.shared = 0
+    
+    def __repr__(self) -> str:
+        return f"SingleFlightStats(flights={self.flights}, shared={self.shared})"
+
+class SingleFlight:
+    def __init__(self):
+        self._flights: Dict[Hashable, _Flight] = {}
+        self.stats = SingleFlightStats()
+    
+    def stream(self, key: Hashable, factory: Callable[[], AsyncGenerator[Any, None]]) -> AsyncGenerator[Any, None]:
+        flight = self._flights.get(key)
+        if flight is None or flight.done:
+            flight = _Flight()
+            self._flights[key] = flight
+            flight.task = asyncio.ensure_future(flight.pump(factory()))
+            flight.task.add_done_callback(lambda _: self._finish(key, flight))
+            self.stats.flights += 1
+        else:
+            self.stats.shared += 1
+        return flight.subscribe()
+    
+    def _finish(self, key: Hashable, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+    
+    def __len__(self) -> int:
+        return len(self._flights)
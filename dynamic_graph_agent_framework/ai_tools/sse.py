@@ -0,0 +1,142 @@
+from json.decoder import scanstring
+from typing import Any, Dict, List, Optional, Union
+from . import codec
+from .codec import ChatMessage, Completion, completion_decoder
+
+DONE = b"[DONE]"
+_MISSING = object()
+
+class StreamDelta:
+    __slots__ = ("raw", "_content", "_obj", "_chunk")
+    
+    def __init__(self, raw: bytes, content: Optional[str] = None, chunk: Optional[Completion] = None):
+        self.raw = raw
+        self._content = content
+        self._obj: Optional[Dict[str, Any]] = None
+        self._chunk = chunk
+    
+    @classmethod
+    def parse(cls, data: Union[bytes, str]) -> Optional['StreamDelta']:
+        raw = data if isinstance(data, bytes) else data.encode('utf-8')
+        content = _scan_content(raw)
+        if content is not _MISSING:
+            return cls(raw, content)
+        
+        try:
+            chunk = completion_decoder.decode(raw)
+        except ValueError:
+            return None
+        delta = _delta(chunk)
+        return cls(raw, delta.content if delta is not None else None, chunk)
+    
+    @property
+    def content(self) -> Optional[str]:
+        return self._content
+    
+    @property
+    def data(self) -> Dict[str, Any]:
+        if self._obj is None:
+            self._obj = codec.loads(self.raw)
+        return self._obj
+    
+    @property
+    def chunk(self) -> Completion:
+        if self._chunk is None:
+            self._chunk = Completion.from_obj(self._obj) if self._obj is not None else completion_decoder.decode(self.raw)
+        return self._chunk
+    
+    @property
+    def role(self) -> Optional[str]:
+        delta = _delta(self.chunk)
+        return delta.role if delta is not None else None
+    
+    @property
+    def tool_calls(self) -> Optional[List[Dict[str, Any]]]:
+        delta = _delta(self.chunk)
+        return delta.tool_calls if delta is not None else None
+    
+    @property
+    def finish_reason(self) -> Optional[str]:
+        choices = self.chunk.choices
+        return choices[0].finish_reason if choices else None
+    
+    @property
+    def usage(self) -> Optional[Dict[str, Any]]:
+        return self.chunk.usage
+    
+    def __repr__(self) -> str:
+        return f"StreamDelta(content={self._content!r})"
+
+def _delta(chunk: Completion) -> Optional[ChatMessage]:
+    choices = chunk.choices
+    return choices[0].delta if choices else None
+
+def _scan_content(raw: bytes) -> Any:
+    """在不完整解析JSON的情况下直接定位 delta.content，无法确定时返回 _MISSING 交由完整解析处理"""
+    delta = raw.find(b'"delta":')
+    if delta < 0 or raw.find(b'"delta":', delta + 8) >= 0:
+        return _MISSING
+    
+    key = raw.find(b'"content":', delta)
+    if key < 0 or raw.find(b'}', delta, key) >= 0 or raw.find(b'"content":', key + 10) >= 0:
+        return _MISSING
+    
+    value = key + 10
+    if raw.startswith(b' ', value):
+        value += 1
+    if raw.startswith(b'"', value):
+        if b'\\' not in raw:
+            end = raw.find(b'"', value + 1)
+            return raw[value + 1:end].decode('utf-8')
+        text = raw.decode('utf-8')
+        offset = len(raw[:value + 1].decode('utf-8'))
+        return scanstring(text, offset)[0]
+    if raw.startswith(b'null', value):
+        return None
+    return _MISSING
+
+class SSEDecoder:
+    def __init__(self):
+        self._buffer = b""
+    
+    def feed(self, chunk: bytes) -> List[bytes]:
+        buffer = self._buffer + chunk if self._buffer else bytes(chunk)
+        
+        if b"\r" in buffer:
+            carry = buffer.endswith(b"\r")
+            if carry:
+                buffer = buffer[:-1]
+            buffer = buffer.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+            if carry:
+                buffer += b"\r"
+        
+        end = buffer.rfind(b"\n\n")
+        if end < 0:
+            self._buffer = buffer
+            return []
+        self._buffer = buffer[end + 2:]
+        
+        events: List[bytes] = []
+        for block in buffer[:end].split(b"\n\n"):
+            if block.startswith(b"data: ") and b"\n" not in block:
+                events.append(block[6:])
+            elif block:
+                data = _block_data(block)
+                if data is not None:
+                    events.append(data)
+        return events
+    
+    def close(self) -> List[bytes]:
+        events = self.feed(b"\n\n") if self._buffer.strip() else []
+        self._buffer = b""
+        return events
+
+def _block_data(block: bytes) -> Optional[bytes]:
+    lines = []
+    for line in block.split(b"\n"):
+        if line.startswith(b"data:"):
+            value = line[5:]
+            lines.append(value[1:] if value.startswith(b" ") else value)
+    if not lines:
+        return None
+    return lines[0] if len(lines) == 1 else b"\n".join(lines)
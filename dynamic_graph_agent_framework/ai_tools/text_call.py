@@ -5,21 +5,14 @@ from .messages import BaseMessage
 async def text_call(
     client: OpenAIClient,
     messages: List[BaseMessage],
-    stream: bool = True
+    stream: bool = True,
+    json_mode: bool = False
 ) -> AsyncGenerator[str, None]:
-    async for chunk in client.chat(messages, stream=stream, json_mode=False):
+    async for chunk in client.chat(messages, stream=stream, json_mode=json_mode):
         if stream:
-            try:
-                data = json.loads(chunk)
-                if 'choices' in data and len(data['choices']) > 0:
-                    delta = data['choices'][0].get('delta', {})
-                    if 'content' in delta:
-                        yield delta['content']
-            except (json.JSONDecodeError, KeyError):
-                continue
+            if chunk.content:
+                yield chunk.content
         else:
             data = chunk
             if 'choices' in data and len(data['choices']) > 0:
                 yield data['choices'][0]['message']['content']
-
-import json
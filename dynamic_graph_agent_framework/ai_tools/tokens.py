@@ -0,0 +1,21 @@
+from typing import Callable
+import re
+
+Tokenizer = Callable[[str], int]
+
+_WORD = re.compile(r"[A-Za-z0-9_]+|[　-鿿가-힯豈-﫿]|[^\sA-Za-z0-9_]")
+
+def count_tokens(text: str) -> int:
+    """离线估算token数：英文按单词计（长单词每6个字符一个token），中日韩文字与标点各算一个"""
+    if not text:
+        return 0
+    return sum(1 + (match.end() - match.start() - 1) // 6 for match in _WORD.finditer(text))
+
+def tiktoken_tokenizer(encoding: str = "cl100k_base") -> Tokenizer:
+    try:
+        import tiktoken
+    except ImportError as e:
+        raise ImportError("tiktoken_tokenizer requires the tiktoken package") from e
+    
+    encoder = tiktoken.get_encoding(encoding)
+    return lambda text: len(encoder.encode(text, disallowed_special=())) if text else 0
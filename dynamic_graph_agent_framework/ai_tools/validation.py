@@ -0,0 +1,361 @@
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Union
+import dataclasses
+import json
+import re
+import sys
+import typing
+from .prompt import _canonical
+
+MAX_ERRORS = 10
+
+Check = Callable[[Any, str, List[str]], None]
+SchemaLike = Union[Dict[str, Any], type]
+
+class SchemaValidationError(ValueError):
+    def __init__(self, errors: List[str], value: Any = None):
+        super().__init__("Response does not match schema: " + "; ".join(errors))
+        self.errors = errors
+        self.value = value
+
+_TYPE_NAMES = {
+    "string": str,
+    "boolean": bool,
+    "object": dict,
+    "array": list,
+    "null": type(None)
+}
+
+def _type_name(value: Any) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, int):
+        return "integer"
+    if isinstance(value, float):
+        return "number"
+    if isinstance(value, str):
+        return "string"
+    if isinstance(value, list):
+        return "array"
+    if isinstance(value, dict):
+        return "object"
+    return type(value).__name__
+
+def _is_type(value: Any, name: str) -> bool:
+    if name == "integer":
+        return isinstance(value, int) and not isinstance(value, bool) or isinstance(value, float) and value.is_integer()
+    if name == "number":
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    expected = _TYPE_NAMES.get(name)
+    return expected is not None and isinstance(value, expected)
+
+class _Compiler:
+    def __init__(self, root: Dict[str, Any]):
+        self.root = root
+        self.refs: Dict[str, Check] = {}
+    
+    def resolve(self, ref: str) -> Dict[str, Any]:
+        if not ref.startswith("#/"):
+            raise ValueError(f"Only local schema references are supported: '{ref}'")
+        node: Any = self.root
+        for part in ref[2:].split("/"):
+            node = node[part.replace("~1", "/").replace("~0", "~")]
+        return node
+    
+    def compile(self, schema: Any) -> Check:
+        if schema is True or schema == {}:
+            return lambda value, path, errors: None
+        if schema is False:
+            return lambda value, path, errors: errors.append(f"{path}: no value is allowed here")
+        if not isinstance(schema, dict):
+            raise ValueError(f"Invalid schema: {schema!r}")
+        
+        if "$ref" in schema:
+            ref = schema["$ref"]
+            if ref not in self.refs:
+                self.refs[ref] = None
+                self.refs[ref] = self.compile(self.resolve(ref))
+            refs = self.refs
+            return lambda value, path, errors: refs[ref](value, path, errors)
+        
+        checks: List[Check] = []
+        self._type(schema, checks)
+        self._enum(schema, checks)
+        self._string(schema, checks)
+        self._number(schema, checks)
+        self._object(schema, checks)
+        self._array(schema, checks)
+        self._combinators(schema, checks)
+        
+        if len(checks) == 1:
+            return checks[0]
+        def check(value, path, errors):
+            for item in checks:
+                item(value, path, errors)
+        return check
+    
+    def _type(self, schema: Dict[str, Any], checks: List[Check]):
+        types = schema.get("type")
+        if types is None:
+            return
+        names = (types,) if isinstance(types, str) else tuple(types)
+        expected = " or ".join(names)
+        def check(value, path, errors):
+            for name in names:
+                if _is_type(value, name):
+                    return
+            errors.append(f"{path}: expected {expected}, got {_type_name(value)}")
+        checks.append(check)
+    
+    def _enum(self, schema: Dict[str, Any], checks: List[Check]):
+        if "const" in schema:
+            const = schema["const"]
+            checks.append(lambda value, path, errors: None if value == const else errors.append(f"{path}: must be {const!r}"))
+        if "enum" in schema:
+            options = list(schema["enum"])
+            def check(value, path, errors):
+                if value not in options:
+                    errors.append(f"{path}: must be one of {options!r}")
+            checks.append(check)
+    
+    def _string(self, schema: Dict[str, Any], checks: List[Check]):
+        min_length = schema.get("minLength")
+        max_length = schema.get("maxLength")
+        pattern = re.compile(schema["pattern"]) if "pattern" in schema else None
+        if min_length is None and max_length is None and pattern is None:
+            return
+        def check(value, path, errors):
+            if not isinstance(value, str):
+                return
+            if min_length is not None and len(value) < min_length:
+                errors.append(f"{path}: shorter than {min_length} characters")
+            if max_length is not None and len(value) > max_length:
+                errors.append(f"{path}: longer than {max_length} characters")
+            if pattern is not None and not pattern.search(value):
+                errors.append(f"{path}: does not match pattern {pattern.pattern!r}")
+        checks.append(check)
+    
+    def _number(self, schema: Dict[str, Any], checks: List[Check]):
+        bounds = [
+            (schema.get("minimum"), lambda value, bound: value >= bound, "less than"),
+            (schema.get("maximum"), lambda value, bound: value <= bound, "greater than"),
+            (schema.get("exclusiveMinimum"), lambda value, bound: value > bound, "at most"),
+            (schema.get("exclusiveMaximum"), lambda value, bound: value < bound, "at least")
+        ]
+        bounds = [(bound, test, label) for bound, test, label in bounds if isinstance(bound, (int, float)) and not isinstance(bound, bool)]
+        if not bounds:
+            return
+        def check(value, path, errors):
+            if not isinstance(value, (int, float)) or isinstance(value, bool):
+                return
+            for bound, test, label in bounds:
+                if not test(value, bound):
+                    errors.append(f"{path}: {value!r} is {label} {bound!r}")
+        checks.append(check)
+    
+    def _object(self, schema: Dict[str, Any], checks: List[Check]):
+        properties = {name: self.compile(sub) for name, sub in schema.get("properties", {}).items()}
+        required = list(schema.get("required", ()))
+        additional = schema.get("additionalProperties", True)
+        extra = None if additional is True else self.compile(additional)
+        if not properties and not required and extra is None:
+            return
+        def check(value, path, errors):
+            if not isinstance(value, dict):
+                return
+            for name in required:
+                if name not in value:
+                    errors.append(f"{path}: missing required property '{name}'")
+            for name, item in value.items():
+                sub = properties.get(name)
+                if sub is not None:
+                    sub(item, f"{path}.{name}", errors)
+                elif extra is not None:
+                    if additional is False:
+                        errors.append(f"{path}: unexpected property '{name}'")
+                    else:
+                        extra(item, f"{path}.{name}", errors)
+        checks.append(check)
+    
+    def _array(self, schema: Dict[str, Any], checks: List[Check]):
+        items = self.compile(schema["items"]) if isinstance(schema.get("items"), (dict, bool)) else None
+        min_items = schema.get("minItems")
+        max_items = schema.get("maxItems")
+        unique = schema.get("uniqueItems", False)
+        if items is None and min_items is None and max_items is None and not unique:
+            return
+        def check(value, path, errors):
+            if not isinstance(value, list):
+                return
+            if min_items is not None and len(value) < min_items:
+                errors.append(f"{path}: fewer than {min_items} items")
+            if max_items is not None and len(value) > max_items:
+                errors.append(f"{path}: more than {max_items} items")
+            if unique and len({_canonical(item) for item in value}) != len(value):
+                errors.append(f"{path}: items are not unique")
+            if items is not None:
+                for index, item in enumerate(value):
+                    items(item, f"{path}[{index}]", errors)
+        checks.append(check)
+    
+    def _combinators(self, schema: Dict[str, Any], checks: List[Check]):
+        for sub in schema.get("allOf", ()):
+            checks.append(self.compile(sub))
+        for keyword in ("anyOf", "oneOf"):
+            if keyword not in schema:
+                continue
+            options = [self.compile(sub) for sub in schema[keyword]]
+            exactly_one = keyword == "oneOf"
+            def check(value, path, errors, options=options, exactly_one=exactly_one, keyword=keyword):
+                matched = 0
+                first: Optional[List[str]] = None
+                for option in options:
+                    option_errors: List[str] = []
+                    option(value, path, option_errors)
+                    if not option_errors:
+                        matched += 1
+                        if not exactly_one:
+                            return
+                    elif first is None:
+                        first = option_errors
+                if matched == 1 and exactly_one:
+                    return
+                if matched > 1:
+                    errors.append(f"{path}: matches more than one schema in oneOf")
+                else:
+                    errors.append(f"{path}: does not match any schema in {keyword}" + (f" ({first[0]})" if first else ""))
+            checks.append(check)
+
+class Validator:
+    """编译后的JSON Schema校验器，validate 返回错误列表（空列表表示通过）"""
+    
+    def __init__(self, schema: Dict[str, Any]):
+        self.schema = schema
+        self._check = _Compiler(schema).compile(schema)
+    
+    def validate(self, value: Any, max_errors: int = MAX_ERRORS) -> List[str]:
+        errors: List[str] = []
+        self._check(value, "$", errors)
+        return errors[:max_errors]
+    
+    def is_valid(self, value: Any) -> bool:
+        return not self.validate(value)
+    
+    def __repr__(self) -> str:
+        return f"Validator(schema={_canonical(self.schema)[:60]})"
+
+def _annotation_schema(annotation: Any, definitions: Dict[str, Any]) -> Dict[str, Any]:
+    if annotation is Any:
+        return {}
+    if annotation is type(None) or annotation is None:
+        return {"type": "null"}
+    if annotation is bool:
+        return {"type": "boolean"}
+    if annotation is int:
+        return {"type": "integer"}
+    if annotation is float:
+        return {"type": "number"}
+    if annotation is str:
+        return {"type": "string"}
+    if isinstance(annotation, type) and (dataclasses.is_dataclass(annotation) or _is_typed_dict(annotation)):
+        name = annotation.__name__
+        if name not in definitions:
+            definitions[name] = {}
+            definitions[name] = _class_schema(annotation, definitions)
+        return {"$ref": f"#/$defs/{name}"}
+    
+    origin = typing.get_origin(annotation) if hasattr(typing, "get_origin") else getattr(annotation, "__origin__", None)
+    args = typing.get_args(annotation) if hasattr(typing, "get_args") else getattr(annotation, "__args__", ())
+    if origin is Union:
+        return {"anyOf": [_annotation_schema(arg, definitions) for arg in args]}
+    if origin in (list, List, tuple, set, frozenset):
+        item = args[0] if args else Any
+        return {"type": "array", "items": _annotation_schema(item, definitions)}
+    if origin in (dict, Dict):
+        value = args[1] if len(args) == 2 else Any
+        return {"type": "object", "additionalProperties": _annotation_schema(value, definitions)}
+    if origin is getattr(typing, "Literal", None):
+        return {"enum": list(args)}
+    if annotation in (list, tuple, set):
+        return {"type": "array"}
+    if annotation is dict:
+        return {"type": "object"}
+    raise ValueError(f"Cannot build a JSON schema for annotation {annotation!r}")
+
+def _is_typed_dict(cls: type) -> bool:
+    return issubclass(cls, dict) and hasattr(cls, "__annotations__") and hasattr(cls, "__total__")
+
+def _class_schema(cls: type, definitions: Dict[str, Any]) -> Dict[str, Any]:
+    module = sys.modules.get(cls.__module__)
+    hints = typing.get_type_hints(cls, vars(module) if module else None)
+    if dataclasses.is_dataclass(cls):
+        fields = [field for field in dataclasses.fields(cls) if field.init]
+        names = [field.name for field in fields]
+        required = [
+            field.name for field in fields
+            if field.default is dataclasses.MISSING and field.default_factory is dataclasses.MISSING
+        ]
+    else:
+        names = list(hints)
+        required = list(getattr(cls, "__required_keys__", names if cls.__total__ else ()))
+    return {
+        "type": "object",
+        "properties": {name: _annotation_schema(hints[name], definitions) for name in names},
+        "required": required,
+        "additionalProperties": False
+    }
+
+def schema_of(schema: SchemaLike) -> Dict[str, Any]:
+    """JSON Schema 原样返回；dataclass / TypedDict 转换为等价的 JSON Schema"""
+    if isinstance(schema, dict):
+        return schema
+    if isinstance(schema, type) and (dataclasses.is_dataclass(schema) or _is_typed_dict(schema)):
+        definitions: Dict[str, Any] = {}
+        result = _class_schema(schema, definitions)
+        if definitions:
+            result["$defs"] = definitions
+        return result
+    raise ValueError(f"Unsupported schema type: {schema!r}")
+
+@lru_cache(maxsize=256)
+def _compile_canonical(canonical: str) -> Validator:
+    return Validator(json.loads(canonical))
+
+_class_validators: Dict[type, Validator] = {}
+
+def compile_schema(schema: SchemaLike) -> Validator:
+    """编译并缓存校验器：JSON Schema 按规范化JSON缓存，dataclass / TypedDict 按类型缓存"""
+    if isinstance(schema, dict):
+        return _compile_canonical(_canonical(schema))
+    validator = _class_validators.get(schema)
+    if validator is None:
+        validator = _class_validators[schema] = Validator(schema_of(schema))
+    return validator
+
+class ValidationStats:
+    def __init__(self):
+        self.calls = 0
+        self.first_pass = 0
+        self.repair_attempts = 0
+        self.repaired = 0
+        self.failed = 0
+    
+    @property
+    def retries_avoided(self) -> int:
+        """修复循环修正、未以无效结构进入下游的调用数"""
+        return self.repaired
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "first_pass": self.first_pass,
+            "repair_attempts": self.repair_attempts,
+            "repaired": self.repaired,
+            "failed": self.failed,
+            "retries_avoided": self.retries_avoided
+        }
+    
+    def __repr__(self) -> str:
+        return f"ValidationStats(calls={self.calls}, first_pass={self.first_pass}, repaired={self.repaired}, failed={self.failed})"
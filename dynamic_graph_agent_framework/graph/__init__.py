@@ -1,14 +1,53 @@
-from .node import Node
+from .node import Node, JOIN_RESULTS
 from .graph import Graph
 from .transition import TransitionCommand, END
-from .memory import Memory
-from .executor import Executor
+from .memory import (
+    Memory, MemorySnapshot, BranchMemory, MergeConflictError,
+    MERGE_LAST_WRITER_WINS, MERGE_FIRST_WRITER_WINS, MERGE_RAISE, DELETED
+)
+from .executor import Executor, SCHEDULER_BFS, SCHEDULER_QUEUE
+from .run import RunContext
+from .budget import (
+    Budget, StopReason, STOP_COMPLETED, STOP_MAX_STEPS, STOP_MAX_VISITS,
+    STOP_DEADLINE, STOP_MAX_TOKENS, STOP_MAX_COST
+)
+from .checkpoint import Checkpointer, CheckpointStore, FileCheckpointStore, SQLiteCheckpointStore
+from .execution import EXECUTION_INLINE, EXECUTION_THREAD, EXECUTION_PROCESS, set_process_pool, set_thread_pool, shutdown_pools
 
 __all__ = [
     'Node',
+    'JOIN_RESULTS',
     'Graph',
     'TransitionCommand',
     'END',
     'Memory',
-    'Executor'
+    'MemorySnapshot',
+    'BranchMemory',
+    'MergeConflictError',
+    'MERGE_LAST_WRITER_WINS',
+    'MERGE_FIRST_WRITER_WINS',
+    'MERGE_RAISE',
+    'DELETED',
+    'Executor',
+    'RunContext',
+    'Budget',
+    'StopReason',
+    'STOP_COMPLETED',
+    'STOP_MAX_STEPS',
+    'STOP_MAX_VISITS',
+    'STOP_DEADLINE',
+    'STOP_MAX_TOKENS',
+    'STOP_MAX_COST',
+    'SCHEDULER_BFS',
+    'SCHEDULER_QUEUE',
+    'Checkpointer',
+    'CheckpointStore',
+    'FileCheckpointStore',
+    'SQLiteCheckpointStore',
+    'EXECUTION_INLINE',
+    'EXECUTION_THREAD',
+    'EXECUTION_PROCESS',
+    'set_process_pool',
+    'set_thread_pool',
+    'shutdown_pools'
 ]
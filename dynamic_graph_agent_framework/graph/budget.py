@@ -0,0 +1,91 @@
+from typing import Any, Dict, Optional
+from ..usage import Price
+
+STOP_COMPLETED = "completed"
+STOP_MAX_STEPS = "max_steps"
+STOP_MAX_VISITS = "max_visits"
+STOP_DEADLINE = "deadline"
+STOP_MAX_TOKENS = "max_tokens"
+STOP_MAX_COST = "max_cost"
+
+class Budget:
+    """单次执行的预算；deadline 为从执行开始计算的秒数，prices 见 UsageMeter"""
+    
+    def __init__(
+        self,
+        max_steps: Optional[int] = None,
+        max_visits: Optional[int] = None,
+        deadline: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        max_cost: Optional[float] = None,
+        prices: Optional[Dict[str, Price]] = None
+    ):
+        for name, value in (("max_steps", max_steps), ("max_visits", max_visits), ("max_tokens", max_tokens)):
+            if value is not None and value < 1:
+                raise ValueError(f"{name} must be at least 1")
+        for name, value in (("deadline", deadline), ("max_cost", max_cost)):
+            if value is not None and value <= 0:
+                raise ValueError(f"{name} must be positive")
+        if max_cost is not None and not prices:
+            raise ValueError("max_cost requires prices")
+        
+        self.max_steps = max_steps
+        self.max_visits = max_visits
+        self.deadline = deadline
+        self.max_tokens = max_tokens
+        self.max_cost = max_cost
+        self.prices = prices or {}
+    
+    @property
+    def meters_usage(self) -> bool:
+        return self.max_tokens is not None or self.max_cost is not None
+    
+    def __repr__(self) -> str:
+        limits = ", ".join(
+            f"{name}={value}" for name, value in (
+                ("max_steps", self.max_steps),
+                ("max_visits", self.max_visits),
+                ("deadline", self.deadline),
+                ("max_tokens", self.max_tokens),
+                ("max_cost", self.max_cost)
+            ) if value is not None
+        )
+        return f"Budget({limits})"
+
+class StopReason:
+    __slots__ = ("reason", "node", "limit", "steps", "elapsed", "usage")
+    
+    def __init__(
+        self,
+        reason: str,
+        node: Optional[str] = None,
+        limit: Any = None,
+        steps: int = 0,
+        elapsed: float = 0.0,
+        usage: Optional[Dict[str, Any]] = None
+    ):
+        self.reason = reason
+        self.node = node
+        self.limit = limit
+        self.steps = steps
+        self.elapsed = elapsed
+        self.usage = usage or {}
+    
+    @property
+    def completed(self) -> bool:
+        return self.reason == STOP_COMPLETED
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "reason": self.reason,
+            "node": self.node,
+            "limit": self.limit,
+            "steps": self.steps,
+            "elapsed": self.elapsed,
+            "usage": dict(self.usage)
+        }
+    
+    def __repr__(self) -> str:
+        node = f", node={self.node!r}" if self.node is not None else ""
+        limit = f", limit={self.limit!r}" if self.limit is not None else ""
+        return f"StopReason({self.reason!r}{node}{limit}, steps={self.steps}, elapsed={self.elapsed:.3f})"
@@ -0,0 +1,288 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+import os
+import pickle
+import sqlite3
+import struct
+import threading
+import time
+from .memory import Memory, DELETED
+from .executor import RaceGroup
+
+_HEADER = struct.Struct(">I")
+
+NodeRef = Tuple[str, int]
+
+class CheckpointStore(ABC):
+    @abstractmethod
+    def append(self, run_id: str, record: bytes):
+        ...
+    
+    @abstractmethod
+    def replace(self, run_id: str, record: bytes):
+        ...
+    
+    @abstractmethod
+    def load(self, run_id: str) -> List[bytes]:
+        ...
+    
+    @abstractmethod
+    def delete(self, run_id: str):
+        ...
+
+class FileCheckpointStore(CheckpointStore):
+    def __init__(self, directory: str, fsync: bool = False):
+        self.directory = directory
+        self.fsync = fsync
+        os.makedirs(directory, exist_ok=True)
+    
+    def _path(self, run_id: str) -> str:
+        if not run_id or os.sep in run_id or (os.altsep and os.altsep in run_id) or run_id in (".", ".."):
+            raise ValueError(f"Invalid run id '{run_id}'")
+        return os.path.join(self.directory, f"{run_id}.ckpt")
+    
+    def _write(self, file, record: bytes):
+        file.write(_HEADER.pack(len(record)))
+        file.write(record)
+        file.flush()
+        if self.fsync:
+            os.fsync(file.fileno())
+    
+    def append(self, run_id: str, record: bytes):
+        with open(self._path(run_id), "ab") as file:
+            self._write(file, record)
+    
+    def replace(self, run_id: str, record: bytes):
+        path = self._path(run_id)
+        with open(path + ".tmp", "wb") as file:
+            self._write(file, record)
+        os.replace(path + ".tmp", path)
+    
+    def load(self, run_id: str) -> List[bytes]:
+        try:
+            with open(self._path(run_id), "rb") as file:
+                data = file.read()
+        except FileNotFoundError:
+            return []
+        
+        records = []
+        offset = 0
+        while offset + _HEADER.size <= len(data):
+            (size,) = _HEADER.unpack_from(data, offset)
+            offset += _HEADER.size
+            if offset + size > len(data):
+                break
+            records.append(data[offset:offset + size])
+            offset += size
+        return records
+    
+    def delete(self, run_id: str):
+        try:
+            os.remove(self._path(run_id))
+        except FileNotFoundError:
+            pass
+
+class SQLiteCheckpointStore(CheckpointStore):
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS checkpoints ("
+            "run_id TEXT NOT NULL, sequence INTEGER NOT NULL, record BLOB NOT NULL, "
+            "PRIMARY KEY (run_id, sequence))"
+        )
+    
+    def append(self, run_id: str, record: bytes):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO checkpoints (run_id, sequence, record) "
+                "SELECT ?, COALESCE(MAX(sequence), -1) + 1, ? FROM checkpoints WHERE run_id = ?",
+                (run_id, record, run_id)
+            )
+    
+    def replace(self, run_id: str, record: bytes):
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute("DELETE FROM checkpoints WHERE run_id = ?", (run_id,))
+                self._conn.execute("INSERT INTO checkpoints (run_id, sequence, record) VALUES (?, 0, ?)", (run_id, record))
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+    
+    def load(self, run_id: str) -> List[bytes]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT record FROM checkpoints WHERE run_id = ? ORDER BY sequence", (run_id,)
+            ).fetchall()
+        return [row[0] for row in rows]
+    
+    def delete(self, run_id: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM checkpoints WHERE run_id = ?", (run_id,))
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+def node_ref(graph, node) -> NodeRef:
+    return node.name, graph._nodes_by_name[node.name].index(node)
+
+def resolve_ref(graph, ref: NodeRef):
+    name, index = ref
+    same_name = graph._nodes_by_name.get(name)
+    if not same_name or index >= len(same_name):
+        raise KeyError(f"Checkpoint refers to node '{name}' (#{index}), which is not part of this graph")
+    return same_name[index]
+
+
+def _resolve_item(graph, ref):
+    if isinstance(ref, list):
+        return RaceGroup([resolve_ref(graph, node) for node in ref])
+    return resolve_ref(graph, ref)
+
+def _apply_entry(memory: Memory, entry: Tuple[bool, Dict[str, Any]]):
+    full, data = entry
+    if full:
+        memory.clear()
+        memory.update(data)
+        return
+    for key, value in data.items():
+        if value is DELETED:
+            memory.delete(key)
+        else:
+            memory.set(key, value)
+
+class Checkpointer:
+    def __init__(
+        self,
+        store: CheckpointStore,
+        run_id: str,
+        every: int = 1,
+        interval: Optional[float] = None,
+        compact_every: int = 100
+    ):
+        if every < 1:
+            raise ValueError("every must be at least 1")
+        self.store = store
+        self.run_id = run_id
+        self.every = every
+        self.interval = interval
+        self.compact_every = compact_every
+        self.sequence = 0
+        self._deltas = 0
+        self._steps = 0
+        self._saved_at = time.monotonic()
+        self._versions: Dict[Any, Tuple[Memory, int]] = {}
+        self._refs: Dict[int, NodeRef] = {}
+    
+    def _ref(self, graph, node) -> NodeRef:
+        # 编译后的图拓扑不再变化，节点引用只需计算一次
+        if not graph.is_compiled:
+            return node_ref(graph, node)
+        ref = self._refs.get(node.node_id)
+        if ref is None:
+            ref = self._refs[node.node_id] = node_ref(graph, node)
+        return ref
+    
+    def _entry(self, key: Any, memory: Memory, full: bool) -> Optional[Tuple[bool, Dict[str, Any]]]:
+        last = self._versions.get(key)
+        self._versions[key] = (memory, memory.version)
+        if not full and last is not None and last[0] is memory:
+            if last[1] == memory.version:
+                return None
+            try:
+                return False, memory.changes_since(last[1])
+            except ValueError:
+                pass
+        return True, memory.to_dict()
+    
+    def _item_ref(self, graph, item):
+        if isinstance(item, RaceGroup):
+            return [self._ref(graph, node) for node in item.nodes]
+        return self._ref(graph, item)
+    
+    def step(self, graph, frontier: List, visits: Dict[int, int], joins: Optional[Dict[int, Any]] = None):
+        self._steps += 1
+        due = self._steps >= self.every
+        if self.interval is not None:
+            due = due or time.monotonic() - self._saved_at >= self.interval
+        if due:
+            self.save(graph, frontier, visits, joins)
+    
+    def save(self, graph, frontier: List, visits: Dict[int, int], joins: Optional[Dict[int, Any]] = None):
+        full = self.sequence == 0 or self._deltas >= self.compact_every
+        
+        local = {}
+        for node, memory in graph.local_memories():
+            ref = self._ref(graph, node)
+            entry = self._entry(ref, memory, full)
+            if entry is not None:
+                local[ref] = entry
+        
+        visit_refs = {}
+        for node_id, count in visits.items():
+            node = graph._nodes_by_id.get(node_id)
+            if node is not None:
+                visit_refs[self._ref(graph, node)] = count
+        
+        record = {
+            "sequence": self.sequence,
+            "frontier": [
+                (self._item_ref(graph, node), self._ref(graph, source) if source is not None and source in graph else None)
+                for node, source in frontier
+            ],
+            "visits": visit_refs,
+            "joins": {
+                self._ref(graph, state.node): (
+                    [(self._ref(graph, source), result) for source, result in state.arrivals.values() if source in graph],
+                    state.fired
+                )
+                for state in (joins or {}).values() if state.node in graph
+            },
+            "global": self._entry(None, graph.root_memory, full),
+            "local": local
+        }
+        data = pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)
+        
+        if full:
+            self.store.replace(self.run_id, data)
+            self._deltas = 0
+        else:
+            self.store.append(self.run_id, data)
+            self._deltas += 1
+        self.sequence += 1
+        self._steps = 0
+        self._saved_at = time.monotonic()
+    
+    def restore(self, graph) -> Optional[Tuple[List, Dict[int, int], Dict[Any, Tuple[List, bool]]]]:
+        records = [pickle.loads(data) for data in self.store.load(self.run_id)]
+        if not records:
+            return None
+        
+        for record in records:
+            if record["global"] is not None:
+                _apply_entry(graph.root_memory, record["global"])
+            for ref, entry in record["local"].items():
+                _apply_entry(resolve_ref(graph, ref).local_memory, entry)
+        
+        last = records[-1]
+        frontier = [
+            (_resolve_item(graph, ref), resolve_ref(graph, source) if source is not None else None)
+            for ref, source in last["frontier"]
+        ]
+        visits = {resolve_ref(graph, ref).node_id: count for ref, count in last["visits"].items()}
+        joins = {
+            resolve_ref(graph, ref): ([(resolve_ref(graph, source), result) for source, result in arrivals], fired)
+            for ref, (arrivals, fired) in last.get("joins", {}).items()
+        }
+        
+        self.sequence = last["sequence"] + 1
+        self._deltas = len(records) - 1
+        self._versions = {None: (graph.root_memory, graph.root_memory.version)}
+        for node, memory in graph.local_memories():
+            self._versions[node_ref(graph, node)] = (memory, memory.version)
+        return frontier, visits, joins
@@ -0,0 +1,153 @@
+from concurrent.futures import Executor as PoolExecutor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import asyncio
+import contextvars
+import functools
+import pickle
+import warnings
+import weakref
+from .memory import Memory
+from .transition import JOIN_RESULTS
+
+EXECUTION_INLINE = "inline"
+EXECUTION_THREAD = "thread"
+EXECUTION_PROCESS = "process"
+EXECUTION_POLICIES = (EXECUTION_INLINE, EXECUTION_THREAD, EXECUTION_PROCESS)
+
+_thread_pool: Optional[PoolExecutor] = None
+_process_pool: Optional[PoolExecutor] = None
+_picklable = weakref.WeakKeyDictionary()
+
+def get_thread_pool() -> PoolExecutor:
+    global _thread_pool
+    if _thread_pool is None:
+        _thread_pool = ThreadPoolExecutor(thread_name_prefix="graph-node")
+    return _thread_pool
+
+def get_process_pool() -> PoolExecutor:
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor()
+    return _process_pool
+
+def set_thread_pool(pool: Optional[PoolExecutor]):
+    global _thread_pool
+    _thread_pool = pool
+
+def set_process_pool(pool: Optional[PoolExecutor]):
+    global _process_pool
+    _process_pool = pool
+
+def shutdown_pools(wait: bool = True):
+    global _thread_pool, _process_pool
+    for pool in (_thread_pool, _process_pool):
+        if pool is not None:
+            pool.shutdown(wait=wait)
+    _thread_pool = None
+    _process_pool = None
+
+def is_picklable(callback: Callable) -> bool:
+    try:
+        return _picklable[callback]
+    except (KeyError, TypeError):
+        pass
+    
+    try:
+        pickle.dumps(callback)
+        result = True
+    except Exception:
+        result = False
+    
+    try:
+        _picklable[callback] = result
+    except TypeError:
+        pass
+    return result
+
+class RecordingMemory(Memory):
+    def __init__(self, data: Optional[dict] = None):
+        super().__init__()
+        self._data = dict(data) if data else {}
+        self._cleared = False
+        self._written: Dict[str, Any] = {}
+        self._deleted: set = set()
+    
+    def set(self, key: str, value: Any):
+        super().set(key, value)
+        self._written[key] = value
+        self._deleted.discard(key)
+    
+    def update(self, data: dict):
+        for key, value in data.items():
+            self.set(key, value)
+    
+    def delete(self, key: str):
+        super().delete(key)
+        self._written.pop(key, None)
+        self._deleted.add(key)
+    
+    def clear(self):
+        super().clear()
+        self._cleared = True
+        self._written.clear()
+        self._deleted.clear()
+    
+    def changes(self) -> Tuple[bool, List[str], Dict[str, Any]]:
+        return self._cleared, list(self._deleted), dict(self._written)
+
+def apply_changes(memory: Memory, changes: Tuple[bool, List[str], Dict[str, Any]]):
+    cleared, deleted, written = changes
+    if cleared:
+        memory.clear()
+    for key in deleted:
+        memory.delete(key)
+    memory.update(written)
+
+class _NodeView:
+    def __init__(self, name: str, node_id: int, local_memory: Memory):
+        self.name = name
+        self.node_id = node_id
+        self.local_memory = local_memory
+    
+    @property
+    def join_results(self) -> Dict[str, Any]:
+        return self.local_memory.get(JOIN_RESULTS, {})
+    
+    def __repr__(self) -> str:
+        return f"Node(id={self.node_id}, name='{self.name}')"
+
+class _GraphView:
+    def __init__(self, global_memory: Memory):
+        self.global_memory = global_memory
+
+def _call_in_process(callback: Callable, name: str, node_id: int, global_data: dict, local_data: dict):
+    global_memory = RecordingMemory(global_data)
+    local_memory = RecordingMemory(local_data)
+    result = callback(_NodeView(name, node_id, local_memory), _GraphView(global_memory))
+    return result, global_memory.changes(), local_memory.changes()
+
+async def run_callback(policy: str, callback: Callable, node, graph) -> Any:
+    loop = asyncio.get_running_loop()
+    
+    if policy == EXECUTION_PROCESS and not is_picklable(callback):
+        warnings.warn(
+            f"Callback {callback!r} of node '{node.name}' cannot be pickled; "
+            f"running it in the thread pool instead of the process pool",
+            RuntimeWarning,
+            stacklevel=2
+        )
+    elif policy == EXECUTION_PROCESS:
+        result, global_changes, local_changes = await loop.run_in_executor(
+            get_process_pool(),
+            _call_in_process,
+            callback,
+            node.name,
+            node.node_id,
+            graph.global_memory.to_dict(),
+            node.local_memory.to_dict()
+        )
+        apply_changes(graph.global_memory, global_changes)
+        apply_changes(node.local_memory, local_changes)
+        return result
+    
+    return await loop.run_in_executor(get_thread_pool(), functools.partial(contextvars.copy_context().run, callback, node, graph))
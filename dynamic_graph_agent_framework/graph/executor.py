@@ -1,81 +1,520 @@
-from typing import List, Optional, Any
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Any, Tuple
 import asyncio
-from .node import Node
+import itertools
+import time
+from .. import tracing, usage
+from .budget import (
+    Budget, StopReason, STOP_COMPLETED, STOP_MAX_STEPS, STOP_MAX_VISITS,
+    STOP_DEADLINE, STOP_MAX_TOKENS, STOP_MAX_COST
+)
+from .node import Node, JOIN_RESULTS
+from .memory import Memory, BranchMemory
+from .run import active_run
 from .transition import TransitionCommand, END
 
+SCHEDULER_BFS = "bfs"
+SCHEDULER_QUEUE = "queue"
+DEFAULT_MAX_CONCURRENCY = 16
+
+active_memory: ContextVar = ContextVar("graph_active_memory", default=None)
+
+class JoinState:
+    __slots__ = ("node", "arrivals", "fired")
+    
+    def __init__(self, node: Node, arrivals: Optional[Dict[int, Tuple[Node, Any]]] = None, fired: bool = False):
+        self.node = node
+        self.arrivals: Dict[int, Tuple[Node, Any]] = arrivals if arrivals is not None else {}
+        self.fired = fired
+    
+    def __repr__(self) -> str:
+        return f"JoinState(node={self.node.name!r}, arrived={len(self.arrivals)}, fired={self.fired})"
+
+class RaceGroup:
+    """竞速转移的备选节点：并发执行，取第一个成功完成的节点，取消其余节点"""
+    __slots__ = ("nodes", "node_id", "name", "join")
+    
+    def __init__(self, nodes: List[Node]):
+        self.nodes = nodes
+        self.node_id = ("race",) + tuple(node.node_id for node in nodes)
+        self.name = "race(" + "|".join(node.name for node in nodes) + ")"
+        self.join = False
+    
+    def __repr__(self) -> str:
+        return f"RaceGroup({[node.name for node in self.nodes]})"
+
 class Executor:
-    def __init__(self, graph, parallel_execution: bool = False):
+    def __init__(
+        self,
+        graph,
+        parallel_execution: bool = False,
+        scheduler: str = SCHEDULER_BFS,
+        max_concurrency: Optional[int] = None,
+        checkpointer=None,
+        budget: Optional[Budget] = None
+    ):
+        if scheduler not in (SCHEDULER_BFS, SCHEDULER_QUEUE):
+            raise ValueError(f"Unknown scheduler '{scheduler}'")
+        if max_concurrency is not None and max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        
         self.graph = graph
         self.parallel_execution = parallel_execution
+        self.scheduler = scheduler
+        self.max_concurrency = max_concurrency or DEFAULT_MAX_CONCURRENCY
+        self.checkpointer = checkpointer
+        self.budget = budget
+        self.visits: Dict[int, int] = {}
+        self.joins: Dict[int, JoinState] = {}
+        self.steps = 0
+        self.meter: Optional[usage.UsageMeter] = None
+        self._halted: Optional[tuple] = None
+        self._stopped: Optional[asyncio.Future] = None
+        self._started = 0.0
     
-    async def run(self, entry_node: Node):
-        queue = [(entry_node, None)]
+    async def run(self, entry_node: Node, frontier: Optional[List] = None) -> StopReason:
+        if not tracing.tracers:
+            return await self._run_budgeted(entry_node, frontier)
         
-        while queue:
-            current_batch = queue
-            queue = []
-            
-            if self.parallel_execution:
-                await self._run_parallel(current_batch, queue)
-            else:
-                await self._run_sequential(current_batch, queue)
+        run = active_run.get()
+        span, token = tracing.start_span(
+            tracing.SPAN_GRAPH,
+            "execute",
+            entry=entry_node.name,
+            scheduler=self.scheduler,
+            run_id=run.run_id if run is not None else None,
+            resumed=frontier is not None
+        )
+        error = None
+        try:
+            stop_reason = await self._run_budgeted(entry_node, frontier)
+            span.attributes["stop_reason"] = stop_reason.reason
+            return stop_reason
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            tracing.end_span(span, token, error)
+    
+    async def _run_budgeted(self, entry_node: Node, frontier: Optional[List]) -> StopReason:
+        self._started = time.monotonic()
+        self.steps = sum(self.visits.values())
+        if self.budget is None:
+            await self._run(entry_node, frontier)
+            return self._stop_reason()
+        
+        self._stopped = asyncio.get_running_loop().create_future()
+        if self.budget.meters_usage:
+            self.meter = usage.UsageMeter(self.budget.prices, parent=usage.active_meter.get(), on_update=self._check_usage)
+            token = usage.active_meter.set(self.meter)
+            try:
+                task = asyncio.ensure_future(self._run(entry_node, frontier))
+            finally:
+                usage.active_meter.reset(token)
+        else:
+            task = asyncio.ensure_future(self._run(entry_node, frontier))
+        
+        try:
+            await asyncio.wait([task, self._stopped], timeout=self.budget.deadline, return_when=asyncio.FIRST_COMPLETED)
+            if not task.done():
+                self._halt(STOP_DEADLINE, limit=self.budget.deadline)
+        finally:
+            if not task.done():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+            self._stopped.cancel()
+        
+        if not task.cancelled():
+            task.result()
+        return self._stop_reason()
+    
+    def _stop_reason(self) -> StopReason:
+        reason, node, limit = self._halted or (STOP_COMPLETED, None, None)
+        return StopReason(
+            reason,
+            node=node,
+            limit=limit,
+            steps=self.steps if self.budget is not None else sum(self.visits.values()),
+            elapsed=time.monotonic() - self._started,
+            usage=self.meter.to_dict() if self.meter is not None else None
+        )
+    
+    def _halt(self, reason: str, node: Optional[Node] = None, limit: Any = None):
+        if self._halted is not None:
+            return
+        self._halted = (reason, node.name if node is not None else None, limit)
+        if self._stopped is not None and not self._stopped.done():
+            self._stopped.set_result(None)
+    
+    def _refuse(self, node: Node) -> Optional[tuple]:
+        """预算允许时计入步数并返回 None，否则返回停止原因（_halt 的参数）"""
+        budget = self.budget
+        nodes = node.nodes if isinstance(node, RaceGroup) else (node,)
+        if budget.max_steps is not None and self.steps + len(nodes) > budget.max_steps:
+            return STOP_MAX_STEPS, None, budget.max_steps
+        if budget.max_visits is not None:
+            for candidate in nodes:
+                if self.visits.get(candidate.node_id, 0) >= budget.max_visits:
+                    return STOP_MAX_VISITS, candidate, budget.max_visits
+        if budget.deadline is not None and time.monotonic() - self._started >= budget.deadline:
+            return STOP_DEADLINE, None, budget.deadline
+        self.steps += len(nodes)
+        return None
+    
+    def _admit(self, node: Node) -> bool:
+        if self._halted is not None:
+            return False
+        refusal = self._refuse(node)
+        if refusal is not None:
+            self._halt(*refusal)
+            return False
+        return True
+    
+    def _check_usage(self, meter: usage.UsageMeter):
+        budget = self.budget
+        if budget.max_tokens is not None and meter.total_tokens >= budget.max_tokens:
+            self._halt(STOP_MAX_TOKENS, limit=budget.max_tokens)
+        elif budget.max_cost is not None and meter.cost >= budget.max_cost:
+            self._halt(STOP_MAX_COST, limit=budget.max_cost)
+    
+    async def _run(self, entry_node: Node, frontier: Optional[List]):
+        queue = list(frontier) if frontier is not None else [(entry_node, None)]
+        
+        if self.scheduler == SCHEDULER_QUEUE:
+            await self._run_queue(queue)
+        else:
+            wave = 0
+            while self._halted is None and (queue or self._release_joins(queue)):
+                current_batch = self._coalesce(queue)
+                queue = []
+                if tracing.tracers:
+                    tracing.emit(tracing.EVENT_WAVE, wave=wave, depth=len(current_batch))
+                wave += 1
+                
+                if self.parallel_execution:
+                    await self._run_parallel(current_batch, queue)
+                else:
+                    await self._run_sequential(current_batch, queue)
+                self._checkpoint(queue)
+        
+        if self.checkpointer and self._halted is None:
+            self.checkpointer.save(self.graph, [], self.visits, self.joins)
+    
+    def _checkpoint(self, frontier: List):
+        if self.checkpointer and self._halted is None:
+            self.checkpointer.step(self.graph, frontier, self.visits, self.joins)
+    
+    def _coalesce(self, frontier: List) -> List:
+        seen = set()
+        batch = []
+        for item in frontier:
+            if item[0].node_id not in seen:
+                seen.add(item[0].node_id)
+                batch.append(item)
+        return batch
+    
+    def _arrive(self, node: Node, source: Node, result: Any, queue: List):
+        predecessors = self.graph.predecessors(node)
+        state = self.joins.get(node.node_id)
+        if state is None:
+            state = self.joins[node.node_id] = JoinState(node)
+        elif state.fired and source.node_id in state.arrivals:
+            state.arrivals = {}
+            state.fired = False
+        state.arrivals[source.node_id] = (source, result)
+        
+        needed = node.quorum if node.quorum is not None else max(len(predecessors), 1)
+        if tracing.tracers:
+            tracing.emit(tracing.EVENT_JOIN, node=node.name, source=source.name, arrived=len(state.arrivals), needed=needed)
+        
+        if not state.fired and len(state.arrivals) >= needed:
+            self._fire(state, source, queue)
+        if state.fired and all(predecessor.node_id in state.arrivals for predecessor in predecessors):
+            del self.joins[node.node_id]
+    
+    def _fire(self, state: JoinState, source: Node, queue: List):
+        state.node.local_memory.set(JOIN_RESULTS, {
+            arrived.name: result for arrived, result in state.arrivals.values()
+        })
+        state.fired = True
+        queue.append((state.node, source))
+    
+    def _release_joins(self, queue: List) -> bool:
+        """没有其他可执行节点时，触发仍在等待的汇合节点（部分前驱未到达）"""
+        for state in list(self.joins.values()):
+            if not state.fired:
+                self._fire(state, list(state.arrivals.values())[-1][0], queue)
+        self.joins.clear()
+        return bool(queue)
+    
+    def restore_joins(self, joins: Dict[Node, Tuple[List[Tuple[Node, Any]], bool]]):
+        for node, (arrivals, fired) in joins.items():
+            self.joins[node.node_id] = JoinState(node, {source.node_id: (source, result) for source, result in arrivals}, fired)
     
     async def _run_sequential(self, current_batch: List, queue: List):
         for node, source_node in current_batch:
-            transitions = await self._execute_node(node, source_node)
+            if self.budget is not None and not self._admit(node):
+                return
+            if isinstance(node, RaceGroup):
+                node, transitions = await self._race(node, source_node)
+            else:
+                transitions = await self._execute_node(node, source_node)
             if transitions:
                 for transition in transitions:
                     await self._process_transition(transition, node, queue)
     
     async def _run_parallel(self, current_batch: List, queue: List):
+        refusal = None
+        if self.budget is not None:
+            if self._halted is not None:
+                return
+            # 逐个计入预算；被拒绝前已计入的节点照常执行，整层结束后再停止
+            admitted = []
+            for item in current_batch:
+                refusal = self._refuse(item[0])
+                if refusal is not None:
+                    break
+                admitted.append(item)
+            current_batch = admitted
+        
+        branches = [self._branch() for _ in current_batch]
         tasks = []
-        for node, source_node in current_batch:
-            tasks.append(self._execute_node(node, source_node))
+        for (node, source_node), branch in zip(current_batch, branches):
+            if isinstance(node, RaceGroup):
+                tasks.append(self._race(node, source_node, branch))
+            else:
+                tasks.append(self._execute_node(node, source_node, branch))
         
         results = await asyncio.gather(*tasks, return_exceptions=True)
         
-        for result, (node, source_node) in zip(results, current_batch):
+        for result, (node, source_node), branch in zip(results, current_batch, branches):
             if isinstance(result, Exception):
                 print(f"Error executing node {node}: {result}")
                 continue
+            if isinstance(node, RaceGroup):
+                node, result = result
             
             if result:
                 for transition in result:
-                    await self._process_transition(transition, node, queue)
+                    await self._process_transition(transition, node, queue, branch)
+        
+        if self.graph.isolate_branches:
+            self._merge(branches)
+        if refusal is not None:
+            self._halt(*refusal)
     
-    async def _execute_node(self, node: Node, source_node: Optional[Node]) -> Optional[List[TransitionCommand]]:
+    async def _run_queue(self, frontier: List):
+        queue: asyncio.Queue = asyncio.Queue()
+        pending: Dict[int, tuple] = {}
+        waiting = set()
+        tickets = itertools.count()
+        
+        def enqueue(item: tuple):
+            if item[0].node_id in waiting:
+                return
+            waiting.add(item[0].node_id)
+            ticket = next(tickets)
+            pending[ticket] = item
+            queue.put_nowait((ticket, item))
+        
+        for item in frontier:
+            enqueue(item)
+        failed = asyncio.get_running_loop().create_future()
+        
+        async def worker():
+            while True:
+                ticket, (node, source_node) = await queue.get()
+                waiting.discard(node.node_id)
+                if tracing.tracers:
+                    tracing.emit(tracing.EVENT_QUEUE, node=node.name, depth=queue.qsize())
+                try:
+                    if self.budget is not None and not self._admit(node):
+                        continue
+                    branch = self._branch()
+                    if isinstance(node, RaceGroup):
+                        node, transitions = await self._race(node, source_node, branch)
+                    else:
+                        transitions = await self._execute_node(node, source_node, branch)
+                    successors = []
+                    for transition in transitions:
+                        await self._process_transition(transition, node, successors, branch)
+                    if branch is not None:
+                        self._merge([branch])
+                    del pending[ticket]
+                    for successor in successors:
+                        enqueue(successor)
+                    self._checkpoint(list(pending.values()))
+                except asyncio.CancelledError:
+                    raise
+                except BaseException as e:
+                    if not failed.done():
+                        failed.set_exception(e)
+                finally:
+                    queue.task_done()
+        
+        workers = [asyncio.ensure_future(worker()) for _ in range(self.max_concurrency)]
+        drained = None
         try:
-            result = await node.enter(self.graph)
-            
-            if isinstance(result, TransitionCommand):
-                result = [result]
-            elif result is None:
-                result = []
-            
-            await node.exit(self.graph)
-            
-            return result
+            while True:
+                drained = asyncio.ensure_future(queue.join())
+                await asyncio.wait([drained, failed], return_when=asyncio.FIRST_COMPLETED)
+                released = []
+                if failed.done() or self._halted is not None or not self._release_joins(released):
+                    break
+                for item in released:
+                    enqueue(item)
+        finally:
+            if drained is not None:
+                drained.cancel()
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, *([drained] if drained is not None else []), return_exceptions=True)
+        
+        if failed.done():
+            failed.result()
+    
+    def _branch(self) -> Optional[BranchMemory]:
+        if not self.graph.isolate_branches:
+            return None
+        return self.graph.root_memory.branch()
+    
+    def _merge(self, branches: List[BranchMemory]):
+        self.graph.root_memory.merge(branches, self.graph.merge_policy, self.graph.key_merge_policies)
+    
+    async def _race(
+        self,
+        group: RaceGroup,
+        source_node: Optional[Node],
+        branch: Optional[BranchMemory] = None
+    ) -> Tuple[Optional[Node], List[TransitionCommand]]:
+        base = branch if branch is not None else self.graph.root_memory
+        racers = []
+        for node in group.nodes:
+            racer_branch = base.branch()
+            task = asyncio.ensure_future(self._execute_node(node, source_node, racer_branch, raise_errors=True))
+            racers.append((task, node, racer_branch))
+        
+        winner = None
+        try:
+            pending = {task for task, _, _ in racers}
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task, node, racer_branch in racers:
+                    if task in done and not task.cancelled() and task.exception() is None:
+                        winner = (node, racer_branch, task.result())
+                        break
+        finally:
+            for task, _, _ in racers:
+                task.cancel()
+            await asyncio.gather(*(task for task, _, _ in racers), return_exceptions=True)
+        
+        if tracing.tracers:
+            tracing.emit(
+                tracing.EVENT_RACE,
+                node=source_node.name if source_node is not None else None,
+                winner=winner[0].name if winner is not None else None,
+                racers=len(racers)
+            )
+        if winner is None:
+            return None, []
+        
+        node, racer_branch, transitions = winner
+        base.merge([racer_branch], self.graph.merge_policy, self.graph.key_merge_policies)
+        return node, transitions
+    
+    async def _call_node(self, node: Node) -> List[TransitionCommand]:
+        result = await node.enter(self.graph)
+        
+        if isinstance(result, TransitionCommand):
+            result = [result]
+        elif result is None:
+            result = []
+        
+        await node.exit(self.graph)
+        
+        return result
+    
+    async def _execute_node(
+        self,
+        node: Node,
+        source_node: Optional[Node],
+        branch: Optional[BranchMemory] = None,
+        raise_errors: bool = False
+    ) -> Optional[List[TransitionCommand]]:
+        visits = self.visits[node.node_id] = self.visits.get(node.node_id, 0) + 1
+        token = active_memory.set((self.graph, branch)) if branch is not None else None
+        span = error = None
+        if tracing.tracers:
+            span, span_token = tracing.start_span(
+                tracing.SPAN_NODE,
+                node.name,
+                node_id=node.node_id,
+                source=source_node.name if source_node is not None else None,
+                visit=visits,
+                execution=node.execution
+            )
+        timeout = node.timeout if node.timeout is not None else self.graph.node_timeout
+        try:
+            if timeout is None:
+                return await self._call_node(node)
+            try:
+                return await asyncio.wait_for(self._call_node(node), timeout)
+            except asyncio.TimeoutError:
+                raise asyncio.TimeoutError(f"timed out after {timeout}s") from None
         except Exception as e:
+            error = e
             print(f"Error in node {node.name}: {e}")
+            if raise_errors:
+                raise
             return []
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            if span is not None:
+                tracing.end_span(span, span_token, error)
+            if token is not None:
+                active_memory.reset(token)
     
-    async def _process_transition(self, transition: TransitionCommand, current_node: Node, queue: List):
-        transition.apply_updates(self.graph.global_memory, current_node.local_memory)
+    async def _process_transition(
+        self,
+        transition: TransitionCommand,
+        current_node: Node,
+        queue: List,
+        memory: Optional[Memory] = None
+    ):
+        transition.apply_updates(memory if memory is not None else self.graph.global_memory, current_node.local_memory)
+        
+        if tracing.tracers:
+            target = transition.target
+            tracing.emit(
+                tracing.EVENT_TRANSITION,
+                node=current_node.name,
+                target=target.name if isinstance(target, Node) else target
+            )
+        
+        if transition.race:
+            nodes = [self._resolve(current_node, target) for target in transition.target if target != END]
+            nodes = [node for node in nodes if node is not None]
+            if nodes:
+                queue.append((RaceGroup(nodes), current_node))
+            return
         
         if transition.target == END:
             return
         
-        target_node = None
-        if isinstance(transition.target, int):
-            target_node = self.graph.get_node_by_id(transition.target)
-        elif isinstance(transition.target, str):
-            target_node = current_node.get_linked_node(transition.target)
-            if not target_node:
-                target_node = self.graph.get_node_by_name(transition.target)
-        elif isinstance(transition.target, Node):
-            target_node = transition.target
+        target_node = self._resolve(current_node, transition.target)
         
         if target_node:
-            queue.append((target_node, current_node))
-        else:
-            print(f"Warning: Target node {transition.target} not found")
+            if target_node.join:
+                self._arrive(target_node, current_node, transition.result, queue)
+            else:
+                queue.append((target_node, current_node))
+    
+    def _resolve(self, current_node: Node, target: Any) -> Optional[Node]:
+        target_node = self.graph.resolve_target(current_node, target)
+        if target_node is None:
+            if self.graph.is_compiled:
+                raise ValueError(f"Unknown transition target {target!r} from node '{current_node.name}'")
+            print(f"Warning: Target node {target} not found")
+        return target_node
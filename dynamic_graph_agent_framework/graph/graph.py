@@ -1,41 +1,244 @@
-from typing import Optional, List, Any
+from typing import Optional, List, Dict, Any, Tuple, Union
 from .node import Node
-from .memory import Memory
+from .memory import Memory, MergePolicy, MERGE_LAST_WRITER_WINS, _check_policy
 from .transition import TransitionCommand, END
-from .executor import Executor
+from .executor import Executor, SCHEDULER_BFS, active_memory
+from .checkpoint import Checkpointer
+from .budget import Budget, StopReason
+from .run import RunContext, active_run
 
 class Graph:
-    def __init__(self, entry_node: Node, parallel_execution: bool = False):
+    def __init__(
+        self,
+        entry_node: Node,
+        parallel_execution: bool = False,
+        unique_names: bool = False,
+        scheduler: str = SCHEDULER_BFS,
+        max_concurrency: Optional[int] = None,
+        isolate_branches: bool = False,
+        merge_policy: MergePolicy = MERGE_LAST_WRITER_WINS,
+        key_merge_policies: Optional[Dict[str, MergePolicy]] = None,
+        budget: Optional[Budget] = None,
+        node_timeout: Optional[float] = None
+    ):
+        if node_timeout is not None and node_timeout <= 0:
+            raise ValueError("node_timeout must be positive")
+        _check_policy(merge_policy)
+        for policy in (key_merge_policies or {}).values():
+            _check_policy(policy)
+        
         self.entry_node = entry_node
-        self.global_memory = Memory()
-        self.nodes: List[Node] = [entry_node]
+        self._root_memory = Memory()
         self.parallel_execution = parallel_execution
+        self.scheduler = scheduler
+        self.max_concurrency = max_concurrency
+        self.isolate_branches = isolate_branches
+        self.merge_policy = merge_policy
+        self.key_merge_policies = key_merge_policies
+        self.budget = budget
+        self.node_timeout = node_timeout
+        self.unique_names = unique_names
+        self._nodes_by_id: Dict[int, Node] = {}
+        self._nodes_by_name: Dict[str, List[Node]] = {}
+        self._routes: Optional[Dict[int, Dict[Any, Node]]] = None
+        self._predecessors: Optional[Dict[int, List[Node]]] = None
+        self.add_node(entry_node)
+    
+    @property
+    def root_memory(self) -> Memory:
+        run = active_run.get()
+        if run is not None and run.graph is self:
+            return run.global_memory
+        return self._root_memory
+    
+    @property
+    def global_memory(self) -> Memory:
+        active = active_memory.get()
+        if active is not None and active[0] is self:
+            return active[1]
+        return self.root_memory
+    
+    @global_memory.setter
+    def global_memory(self, memory: Memory):
+        self._root_memory = memory
+    
+    def local_memories(self):
+        run = active_run.get()
+        if run is not None and run.graph is self:
+            return run.local_memories()
+        return ((node, node.local_memory) for node in self._nodes_by_id.values())
+    
+    @property
+    def nodes(self) -> Tuple[Node, ...]:
+        """只读的节点元组（按加入顺序）；增删节点请使用 add_node / remove_node"""
+        return tuple(self._nodes_by_id.values())
+    
+    @property
+    def is_compiled(self) -> bool:
+        return self._routes is not None
+    
+    def _check_mutable(self):
+        if self._routes is not None:
+            raise RuntimeError("Graph is compiled; its topology can no longer be changed")
     
     def add_node(self, node: Node):
-        if node not in self.nodes:
-            self.nodes.append(node)
+        if node.node_id in self._nodes_by_id:
+            return
+        self._check_mutable()
+        
+        same_name = self._nodes_by_name.get(node.name)
+        if same_name and self.unique_names:
+            raise ValueError(
+                f"Duplicate node name '{node.name}': already used by {same_name[0]}"
+            )
+        
+        self._nodes_by_id[node.node_id] = node
+        self._nodes_by_name.setdefault(node.name, []).append(node)
+    
+    def remove_node(self, node: Union[Node, int]) -> Node:
+        self._check_mutable()
+        node_id = node if isinstance(node, int) else node.node_id
+        target = self._nodes_by_id.get(node_id)
+        if target is None:
+            raise KeyError(f"Node {node} is not part of this graph")
+        if target is self.entry_node:
+            raise ValueError("Cannot remove the entry node")
+        
+        del self._nodes_by_id[node_id]
+        same_name = self._nodes_by_name[target.name]
+        same_name.remove(target)
+        if not same_name:
+            del self._nodes_by_name[target.name]
+        
+        for source, _ in list(target._incoming.values()):
+            if source in self:
+                source.unlink(target)
+        
+        return target
     
     def link(self, source: Node, target: Node, link_name: Optional[str] = None):
+        self._check_mutable()
         source.link(target, link_name)
-        if target not in self.nodes:
-            self.add_node(target)
+        self.add_node(source)
+        self.add_node(target)
     
-    def get_node_by_id(self, node_id: int) -> Optional[Node]:
-        for node in self.nodes:
-            if node.node_id == node_id:
+    def compile(self) -> 'Graph':
+        routes: Dict[int, Dict[Any, Node]] = {}
+        predecessors: Dict[int, List[Node]] = {}
+        for node in self._nodes_by_id.values():
+            table: Dict[Any, Node] = {}
+            for link_name, target in node._links.items():
+                if self._nodes_by_id.get(target.node_id) is not target:
+                    raise ValueError(
+                        f"Node '{node.name}' links to {target} via '{link_name}', "
+                        f"but that node is not part of the graph"
+                    )
+                table.setdefault(target.node_id, target)
+                table.setdefault(target, target)
+            table.update(node._links)
+            routes[node.node_id] = table
+            for target in dict.fromkeys(node._links.values()):
+                predecessors.setdefault(target.node_id, []).append(node)
+        self._routes = routes
+        self._predecessors = predecessors
+        return self
+    
+    def predecessors(self, node: Node) -> List[Node]:
+        if self._predecessors is not None:
+            return list(self._predecessors.get(node.node_id, ()))
+        return [source for source, _ in node._incoming.values() if source in self]
+    
+    def resolve_target(self, current_node: Node, target: Any) -> Optional[Node]:
+        if self._routes is not None:
+            routes = self._routes.get(current_node.node_id)
+            node = routes.get(target) if routes else None
+            if node is not None:
+                return node
+            if isinstance(target, Node):
+                return target if target in self else None
+        elif isinstance(target, Node):
+            return target
+        elif isinstance(target, str):
+            node = current_node.get_linked_node(target)
+            if node is not None:
                 return node
+        
+        if isinstance(target, int):
+            return self._nodes_by_id.get(target)
+        if isinstance(target, str):
+            return self.get_node_by_name(target)
         return None
     
+    def get_node_by_id(self, node_id: int) -> Optional[Node]:
+        return self._nodes_by_id.get(node_id)
+    
     def get_node_by_name(self, name: str) -> Optional[Node]:
-        for node in self.nodes:
-            if node.name == name:
-                return node
-        return None
+        same_name = self._nodes_by_name.get(name)
+        return same_name[0] if same_name else None
+    
+    def get_nodes_by_name(self, name: str) -> List[Node]:
+        return list(self._nodes_by_name.get(name, ()))
     
-    async def execute(self, initial_context: Optional[dict] = None):
+    def __contains__(self, node: Node) -> bool:
+        return self._nodes_by_id.get(node.node_id) is node
+    
+    def __len__(self) -> int:
+        return len(self._nodes_by_id)
+    
+    def _executor(self, checkpointer: Optional[Checkpointer], budget: Optional[Budget] = None) -> Executor:
+        return Executor(
+            self,
+            self.parallel_execution,
+            self.scheduler,
+            self.max_concurrency,
+            checkpointer,
+            budget if budget is not None else self.budget
+        )
+    
+    async def execute(
+        self,
+        initial_context: Optional[dict] = None,
+        checkpointer: Optional[Checkpointer] = None,
+        budget: Optional[Budget] = None
+    ) -> StopReason:
         if initial_context:
             for key, value in initial_context.items():
                 self.global_memory.set(key, value)
         
-        executor = Executor(self, self.parallel_execution)
-        await executor.run(self.entry_node)
+        executor = self._executor(checkpointer, budget)
+        return await executor.run(self.entry_node)
+    
+    async def run(
+        self,
+        initial_context: Optional[dict] = None,
+        checkpointer: Optional[Checkpointer] = None,
+        run_id: Optional[Any] = None,
+        budget: Optional[Budget] = None
+    ) -> RunContext:
+        context = RunContext(self, run_id)
+        if initial_context:
+            context.global_memory.update(initial_context)
+        
+        token = active_run.set(context)
+        try:
+            context.stop_reason = await self._executor(checkpointer, budget).run(self.entry_node)
+        finally:
+            active_run.reset(token)
+        return context
+    
+    async def resume(self, checkpointer: Checkpointer, budget: Optional[Budget] = None) -> RunContext:
+        context = RunContext(self, checkpointer.run_id)
+        token = active_run.set(context)
+        try:
+            state = checkpointer.restore(self)
+            if state is None:
+                raise KeyError(f"No checkpoint found for run '{checkpointer.run_id}'")
+            
+            frontier, visits, joins = state
+            executor = self._executor(checkpointer, budget)
+            executor.visits.update(visits)
+            executor.restore_joins(joins)
+            context.stop_reason = await executor.run(self.entry_node, frontier)
+        finally:
+            active_run.reset(token)
+        return context
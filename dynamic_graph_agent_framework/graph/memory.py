@@ -1,30 +1,232 @@
-from typing import Any, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+MERGE_LAST_WRITER_WINS = "last_writer_wins"
+MERGE_FIRST_WRITER_WINS = "first_writer_wins"
+MERGE_RAISE = "raise"
+MERGE_POLICIES = (MERGE_LAST_WRITER_WINS, MERGE_FIRST_WRITER_WINS, MERGE_RAISE)
+DEFAULT_LOG_LIMIT = 10000
+
+MergePolicy = Union[str, Callable[[str, List[Any]], Any]]
+
+class _Deleted:
+    def __repr__(self) -> str:
+        return "DELETED"
+    
+    def __reduce__(self) -> str:
+        return "DELETED"
+
+DELETED = _Deleted()
+_MISSING = object()
+
+class MergeConflictError(ValueError):
+    def __init__(self, key: str, values: List[Any]):
+        super().__init__(f"Conflicting writes to memory key '{key}': {values!r}")
+        self.key = key
+        self.values = values
+
+def _check_policy(policy: MergePolicy):
+    if not callable(policy) and policy not in MERGE_POLICIES:
+        raise ValueError(f"Unknown merge policy '{policy}'")
+
+class MemorySnapshot:
+    __slots__ = ("_data", "version")
+    
+    def __init__(self, data: dict, version: int):
+        self._data = data
+        self.version = version
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._data.get(key, default)
+    
+    def to_dict(self) -> dict:
+        return self._data.copy()
+    
+    def __contains__(self, key: str) -> bool:
+        return key in self._data
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data)
+    
+    def __len__(self) -> int:
+        return len(self._data)
+    
+    def __repr__(self) -> str:
+        return f"MemorySnapshot(version={self.version}, keys={list(self._data.keys())})"
 
 class Memory:
-    def __init__(self):
+    def __init__(self, log_limit: Optional[int] = DEFAULT_LOG_LIMIT):
         self._data: dict = {}
+        self._shared = False
+        self.version = 0
+        self.log_limit = log_limit
+        self._log: List[Tuple[int, str]] = []
+        self._log_start = 0
+    
+    def _prepare_write(self):
+        if self._shared:
+            self._data = dict(self._data)
+            self._shared = False
+    
+    def _record(self, key: str):
+        self.version += 1
+        self._log.append((self.version, key))
+        if self.log_limit is not None and len(self._log) > self.log_limit:
+            drop = len(self._log) // 2
+            self._log_start = self._log[drop - 1][0]
+            del self._log[:drop]
     
     def set(self, key: str, value: Any):
+        self._prepare_write()
         self._data[key] = value
+        self._record(key)
     
     def get(self, key: str, default: Any = None) -> Any:
         return self._data.get(key, default)
     
     def update(self, data: dict):
-        self._data.update(data)
+        for key, value in data.items():
+            self.set(key, value)
     
     def delete(self, key: str):
         if key in self._data:
+            self._prepare_write()
             del self._data[key]
+            self._record(key)
     
     def clear(self):
-        self._data.clear()
+        keys = list(self._data)
+        if self._shared:
+            self._data = {}
+            self._shared = False
+        else:
+            self._data.clear()
+        for key in keys:
+            self._record(key)
     
     def to_dict(self) -> dict:
         return self._data.copy()
     
+    def snapshot(self) -> MemorySnapshot:
+        self._shared = True
+        return MemorySnapshot(self._data, self.version)
+    
+    def branch(self) -> 'BranchMemory':
+        return BranchMemory(self.snapshot())
+    
+    def changes_since(self, version: int) -> Dict[str, Any]:
+        if version < self._log_start:
+            raise ValueError(f"Change log no longer covers version {version} (oldest is {self._log_start})")
+        
+        changes: Dict[str, Any] = {}
+        for entry_version, key in reversed(self._log):
+            if entry_version <= version:
+                break
+            if key not in changes:
+                changes[key] = self._data.get(key, DELETED)
+        return changes
+    
+    def merge(
+        self,
+        branches: Iterable['BranchMemory'],
+        policy: MergePolicy = MERGE_LAST_WRITER_WINS,
+        key_policies: Optional[Dict[str, MergePolicy]] = None
+    ) -> Dict[str, Any]:
+        writes: Dict[str, List[Any]] = {}
+        concurrent: Dict[str, Any] = {}
+        
+        for branch in branches:
+            base = branch.base
+            for key, value in branch.changes().items():
+                # 写时复制保留值对象本身，与分支基准不是同一对象即说明分支创建后该键被修改过；
+                # 不依赖变更日志，日志被截断后仍然有效
+                if base.version < self.version:
+                    current = self._data.get(key, _MISSING)
+                    if current is not base.get(key, _MISSING):
+                        concurrent[key] = DELETED if current is _MISSING else current
+                writes.setdefault(key, []).append(value)
+        
+        merged: Dict[str, Any] = {}
+        for key, values in writes.items():
+            if key in concurrent:
+                values = [concurrent[key]] + values
+            elif len(values) == 1:
+                merged[key] = values[0]
+                continue
+            
+            key_policy = key_policies.get(key, policy) if key_policies else policy
+            value = self._resolve(key, values, key in concurrent, key_policy)
+            if value is not _MISSING:
+                merged[key] = value
+        
+        for key, value in merged.items():
+            if value is DELETED:
+                self.delete(key)
+            else:
+                self.set(key, value)
+        return merged
+    
+    def _resolve(self, key: str, values: List[Any], concurrent: bool, policy: MergePolicy) -> Any:
+        if callable(policy):
+            return policy(key, values)
+        if policy == MERGE_LAST_WRITER_WINS:
+            return values[-1]
+        if policy == MERGE_FIRST_WRITER_WINS:
+            return _MISSING if concurrent else values[0]
+        if policy == MERGE_RAISE:
+            first = values[0]
+            if any(value is not first and value != first for value in values[1:]):
+                raise MergeConflictError(key, values)
+            return _MISSING if concurrent else first
+        raise ValueError(f"Unknown merge policy '{policy}'")
+    
     def __contains__(self, key: str) -> bool:
         return key in self._data
     
     def __repr__(self) -> str:
         return f"Memory(keys={list(self._data.keys())})"
+
+class BranchMemory(Memory):
+    def __init__(self, base: MemorySnapshot):
+        super().__init__()
+        self.base = base
+        self._cleared = False
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self._data.get(key, _MISSING)
+        if value is _MISSING:
+            return default if self._cleared else self.base.get(key, default)
+        return default if value is DELETED else value
+    
+    def delete(self, key: str):
+        if key in self:
+            Memory.set(self, key, DELETED)
+    
+    def clear(self):
+        super().clear()
+        self._cleared = True
+    
+    def to_dict(self) -> dict:
+        data = {} if self._cleared else self.base.to_dict()
+        for key, value in self._data.items():
+            if value is DELETED:
+                data.pop(key, None)
+            else:
+                data[key] = value
+        return data
+    
+    def snapshot(self) -> MemorySnapshot:
+        return MemorySnapshot(self.to_dict(), self.version)
+    
+    def changes(self) -> Dict[str, Any]:
+        changes = dict.fromkeys(self.base, DELETED) if self._cleared else {}
+        changes.update(self._data)
+        return changes
+    
+    def __contains__(self, key: str) -> bool:
+        value = self._data.get(key, _MISSING)
+        if value is _MISSING:
+            return not self._cleared and key in self.base
+        return value is not DELETED
+    
+    def __repr__(self) -> str:
+        return f"BranchMemory(keys={list(self.to_dict().keys())})"
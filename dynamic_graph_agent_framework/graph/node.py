@@ -1,23 +1,86 @@
-from typing import Callable, Optional, Any, Coroutine
+from typing import Callable, Dict, Optional, Any, Coroutine
+import asyncio
 import uuid
 from .memory import Memory
+from .execution import EXECUTION_INLINE, EXECUTION_POLICIES, run_callback
+from .run import active_run
+from .transition import JOIN_RESULTS
 
 class Node:
     _node_counter = 0
     
-    def __init__(self, name: str, on_enter: Optional[Callable] = None, on_exit: Optional[Callable] = None):
+    def __init__(
+        self,
+        name: str,
+        on_enter: Optional[Callable] = None,
+        on_exit: Optional[Callable] = None,
+        execution: str = EXECUTION_INLINE,
+        join: bool = False,
+        quorum: Optional[int] = None,
+        timeout: Optional[float] = None
+    ):
+        if execution not in EXECUTION_POLICIES:
+            raise ValueError(f"Unknown execution policy '{execution}'")
+        if quorum is not None and quorum < 1:
+            raise ValueError("quorum must be at least 1")
+        if timeout is not None and timeout <= 0:
+            raise ValueError("timeout must be positive")
+        
         self.node_id = Node._node_counter
         Node._node_counter += 1
         self.name = name
-        self.local_memory = Memory()
+        self._local_memory = Memory()
         self.on_enter = on_enter
         self.on_exit = on_exit
+        self.execution = execution
+        self.join = join or quorum is not None
+        self.quorum = quorum
+        self.timeout = timeout
         self._links: dict = {}
+        # 指向本节点的链接：来源节点ID -> [来源节点, 链接数]，由 link / unlink 维护
+        self._incoming: Dict[int, list] = {}
+    
+    @property
+    def local_memory(self) -> Memory:
+        run = active_run.get()
+        if run is not None:
+            memory = run.local_memory(self)
+            if memory is not None:
+                return memory
+        return self._local_memory
+    
+    @local_memory.setter
+    def local_memory(self, memory: Memory):
+        self._local_memory = memory
+    
+    @property
+    def join_results(self) -> Dict[str, Any]:
+        return self.local_memory.get(JOIN_RESULTS, {})
     
     def link(self, target_node: 'Node', link_name: Optional[str] = None):
         if link_name is None:
             link_name = target_node.name
+        previous = self._links.get(link_name)
+        if previous is not None:
+            previous._remove_incoming(self)
         self._links[link_name] = target_node
+        entry = target_node._incoming.setdefault(self.node_id, [self, 0])
+        entry[1] += 1
+    
+    def unlink(self, target: Any):
+        if isinstance(target, Node):
+            names = [name for name, node in self._links.items() if node is target]
+        else:
+            names = [target] if target in self._links else []
+        for name in names:
+            self._links.pop(name)._remove_incoming(self)
+    
+    def _remove_incoming(self, source: 'Node'):
+        entry = self._incoming.get(source.node_id)
+        if entry is not None:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._incoming[source.node_id]
     
     def get_linked_node(self, name_or_id: Any) -> Optional['Node']:
         if isinstance(name_or_id, int):
@@ -34,20 +97,23 @@ class Node:
     def set_on_exit(self, callback: Callable):
         self.on_exit = callback
     
+    async def _invoke(self, callback: Callable, graph: 'Graph'):
+        if self.execution != EXECUTION_INLINE and not asyncio.iscoroutinefunction(callback):
+            result = await run_callback(self.execution, callback, self, graph)
+        else:
+            result = callback(self, graph)
+        if isinstance(result, Coroutine):
+            result = await result
+        return result
+    
     async def enter(self, graph: 'Graph'):
         if self.on_enter:
-            result = self.on_enter(self, graph)
-            if isinstance(result, Coroutine):
-                result = await result
-            return result
+            return await self._invoke(self.on_enter, graph)
         return None
     
     async def exit(self, graph: 'Graph'):
         if self.on_exit:
-            result = self.on_exit(self, graph)
-            if isinstance(result, Coroutine):
-                result = await result
-            return result
+            return await self._invoke(self.on_exit, graph)
         return None
     
     def __repr__(self) -> str:
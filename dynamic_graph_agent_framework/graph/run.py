@@ -0,0 +1,34 @@
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional, Tuple
+import itertools
+from .memory import Memory
+
+active_run: ContextVar = ContextVar("graph_active_run", default=None)
+_run_ids = itertools.count()
+
+class RunContext:
+    __slots__ = ("graph", "run_id", "global_memory", "stop_reason", "_local")
+    
+    def __init__(self, graph, run_id: Optional[Any] = None):
+        self.graph = graph
+        self.run_id = run_id if run_id is not None else next(_run_ids)
+        self.global_memory = Memory()
+        self.stop_reason = None
+        self._local: Dict[int, Tuple[Any, Memory]] = {}
+    
+    def local_memory(self, node) -> Optional[Memory]:
+        entry = self._local.get(node.node_id)
+        if entry is not None and entry[0] is node:
+            return entry[1]
+        if node not in self.graph:
+            return None
+        memory = Memory()
+        self._local[node.node_id] = (node, memory)
+        return memory
+    
+    def local_memories(self) -> Iterator[Tuple[Any, Memory]]:
+        return iter(list(self._local.values()))
+    
+    def __repr__(self) -> str:
+        reason = self.stop_reason.reason if self.stop_reason is not None else None
+        return f"RunContext(run_id={self.run_id!r}, touched_nodes={len(self._local)}, stop_reason={reason!r})"
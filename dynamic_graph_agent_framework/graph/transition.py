@@ -1,15 +1,24 @@
 from typing import Optional, Dict, Any
 
+JOIN_RESULTS = "join_results"
+
 class TransitionCommand:
     def __init__(
         self,
         target: Any,
         update_global: Optional[Dict[str, Any]] = None,
-        update_local: Optional[Dict[str, Any]] = None
+        update_local: Optional[Dict[str, Any]] = None,
+        result: Any = None,
+        race: bool = False
     ):
+        if race and (not isinstance(target, (list, tuple)) or not target):
+            raise ValueError("A race transition needs a non-empty list of targets")
+        
         self.target = target
         self.update_global = update_global or {}
         self.update_local = update_local or {}
+        self.result = result
+        self.race = race
     
     def apply_updates(self, global_memory, local_memory=None):
         for key, value in self.update_global.items():
@@ -20,6 +29,8 @@ class TransitionCommand:
                 local_memory.set(key, value)
     
     def __repr__(self) -> str:
+        if self.race:
+            return f"TransitionCommand(target={self.target}, race=True)"
         return f"TransitionCommand(target={self.target})"
 
 END = "END"
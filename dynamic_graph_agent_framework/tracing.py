@@ -0,0 +1,316 @@
+from contextvars import ContextVar, Token
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import math
+import random
+import threading
+import time
+
+SPAN_GRAPH = "graph"
+SPAN_NODE = "node"
+SPAN_LLM = "llm"
+
+EVENT_WAVE = "wave"
+EVENT_QUEUE = "queue"
+EVENT_TRANSITION = "transition"
+EVENT_JOIN = "join"
+EVENT_RACE = "race"
+EVENT_RETRY = "retry"
+EVENT_CACHE_HIT = "cache_hit"
+EVENT_HEDGE = "hedge"
+EVENT_REPAIR = "repair"
+
+tracers: List['Tracer'] = []
+_current_span: ContextVar = ContextVar("current_span", default=None)
+
+class Span:
+    __slots__ = ("name", "kind", "trace_id", "span_id", "parent_id", "start_ns", "end_ns", "_start", "attributes", "error")
+    
+    def __init__(self, name: str, kind: str, parent: Optional['Span'], attributes: Dict[str, Any]):
+        self.name = name
+        self.kind = kind
+        self.trace_id = parent.trace_id if parent is not None else random.getrandbits(128)
+        self.span_id = random.getrandbits(64)
+        self.parent_id = parent.span_id if parent is not None else None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self._start = time.perf_counter_ns()
+    
+    @property
+    def duration(self) -> Optional[float]:
+        if self.end_ns is None:
+            return None
+        return (self.end_ns - self.start_ns) / 1e9
+    
+    def to_otel(self) -> Dict[str, Any]:
+        span = {
+            "traceId": f"{self.trace_id:032x}",
+            "spanId": f"{self.span_id:016x}",
+            "name": self.name,
+            "kind": 1,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": _otel_attributes(dict(self.attributes, kind=self.kind)),
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1}
+        }
+        if self.parent_id is not None:
+            span["parentSpanId"] = f"{self.parent_id:016x}"
+        return span
+    
+    def __repr__(self) -> str:
+        return f"Span(kind={self.kind!r}, name={self.name!r}, duration={self.duration})"
+
+class Event:
+    __slots__ = ("name", "time_ns", "trace_id", "span_id", "attributes")
+    
+    def __init__(self, name: str, span: Optional[Span], attributes: Dict[str, Any]):
+        self.name = name
+        self.time_ns = time.time_ns()
+        self.trace_id = span.trace_id if span is not None else None
+        self.span_id = span.span_id if span is not None else None
+        self.attributes = attributes
+    
+    def to_otel(self) -> Dict[str, Any]:
+        event = {
+            "name": self.name,
+            "timeUnixNano": str(self.time_ns),
+            "attributes": _otel_attributes(self.attributes)
+        }
+        if self.span_id is not None:
+            event["traceId"] = f"{self.trace_id:032x}"
+            event["spanId"] = f"{self.span_id:016x}"
+        return event
+    
+    def __repr__(self) -> str:
+        return f"Event(name={self.name!r}, attributes={self.attributes!r})"
+
+def _otel_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    result = []
+    for key, value in attributes.items():
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            typed = {"boolValue": value}
+        elif isinstance(value, int):
+            typed = {"intValue": str(value)}
+        elif isinstance(value, float):
+            typed = {"doubleValue": value}
+        else:
+            typed = {"stringValue": str(value)}
+        result.append({"key": key, "value": typed})
+    return result
+
+class Tracer:
+    def span_started(self, span: Span):
+        pass
+    
+    def span_ended(self, span: Span):
+        pass
+    
+    def event(self, event: Event):
+        pass
+    
+    def close(self):
+        pass
+
+def add_tracer(tracer: Tracer) -> Tracer:
+    tracers.append(tracer)
+    return tracer
+
+def remove_tracer(tracer: Tracer):
+    if tracer in tracers:
+        tracers.remove(tracer)
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+def start_span(kind: str, name: str, activate: bool = True, **attributes) -> Tuple[Span, Optional[Token]]:
+    span = Span(name, kind, _current_span.get(), attributes)
+    token = _current_span.set(span) if activate else None
+    for tracer in tracers:
+        tracer.span_started(span)
+    return span, token
+
+def end_span(span: Span, token: Optional[Token] = None, error: Optional[BaseException] = None):
+    span.end_ns = span.start_ns + time.perf_counter_ns() - span._start
+    if error is not None:
+        span.error = f"{type(error).__name__}: {error}"
+    if token is not None:
+        _current_span.reset(token)
+    for tracer in tracers:
+        tracer.span_ended(span)
+
+def emit(name: str, **attributes):
+    event = Event(name, _current_span.get(), attributes)
+    for tracer in tracers:
+        tracer.event(event)
+
+class Histogram:
+    """对数分桶直方图，相对误差约为 2^(1/8)"""
+    BUCKETS_PER_OCTAVE = 8
+    
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+        self._buckets: Dict[int, int] = {}
+    
+    def record(self, value: float):
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        bucket = math.floor(math.log2(value) * self.BUCKETS_PER_OCTAVE) if value > 0 else -10 ** 6
+        self._buckets[bucket] = self._buckets.get(bucket, 0) + 1
+    
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+    
+    def percentile(self, p: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = p / 100 * self.count
+        seen = 0
+        for bucket in sorted(self._buckets):
+            seen += self._buckets[bucket]
+            if seen >= rank:
+                value = 2 ** ((bucket + 1) / self.BUCKETS_PER_OCTAVE)
+                return min(max(value, self.min), self.max)
+        return self.max
+    
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "min": self.min if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": self.max
+        }
+
+class HistogramTracer(Tracer):
+    # 父span未结束（或由其他追踪器记录）时，子span累计的时间最多保留这么多条
+    MAX_PENDING_PARENTS = 4096
+    
+    def __init__(self):
+        self.latencies: Dict[Tuple[str, str], Histogram] = {}
+        self.self_time: Dict[str, Histogram] = {}
+        self.counters: Dict[Tuple[str, str], int] = {}
+        self.tokens: Dict[str, int] = {}
+        self.queue_depth = Histogram()
+        self._child_time: Dict[int, int] = {}
+        self._lock = threading.Lock()
+    
+    def span_ended(self, span: Span):
+        duration = span.end_ns - span.start_ns
+        with self._lock:
+            key = (span.kind, span.name)
+            histogram = self.latencies.get(key)
+            if histogram is None:
+                histogram = self.latencies[key] = Histogram()
+            histogram.record(duration / 1e9)
+            
+            child_time = self._child_time.pop(span.span_id, 0)
+            if span.kind == SPAN_NODE:
+                own = duration - child_time
+                self.self_time.setdefault(span.name, Histogram()).record(max(own, 0) / 1e9)
+            elif span.kind == SPAN_LLM and span.parent_id is not None:
+                self._child_time[span.parent_id] = self._child_time.get(span.parent_id, 0) + duration
+                if len(self._child_time) > self.MAX_PENDING_PARENTS:
+                    del self._child_time[next(iter(self._child_time))]
+            
+            if span.kind == SPAN_LLM:
+                for field in ("prompt_tokens", "completion_tokens"):
+                    value = span.attributes.get(field)
+                    if value:
+                        self.tokens[field] = self.tokens.get(field, 0) + value
+            if span.error:
+                self.counters[("error", span.kind)] = self.counters.get(("error", span.kind), 0) + 1
+    
+    def event(self, event: Event):
+        with self._lock:
+            key = (event.name, str(event.attributes.get("node", "")))
+            self.counters[key] = self.counters.get(key, 0) + 1
+            if event.name in (EVENT_WAVE, EVENT_QUEUE):
+                self.queue_depth.record(event.attributes.get("depth", 0))
+    
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "latency": {f"{kind}:{name}": h.to_dict() for (kind, name), h in self.latencies.items()},
+                "self_time": {name: h.to_dict() for name, h in self.self_time.items()},
+                "counters": {f"{name}:{label}" if label else name: count for (name, label), count in self.counters.items()},
+                "tokens": dict(self.tokens),
+                "queue_depth": self.queue_depth.to_dict()
+            }
+
+class JSONLTracer(Tracer):
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+    
+    def _write(self, record: Dict[str, Any]):
+        line = json.dumps(record, ensure_ascii=False, separators=(',', ':'), default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+    
+    def span_ended(self, span: Span):
+        self._write({"type": "span", **span.to_otel()})
+    
+    def event(self, event: Event):
+        self._write({"type": "event", **event.to_otel()})
+    
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+class OpenTelemetryTracer(Tracer):
+    def __init__(self, tracer_provider=None, name: str = "dynamic_graph_agent_framework"):
+        try:
+            from opentelemetry import trace
+        except ImportError as e:
+            raise ImportError("OpenTelemetryTracer requires the opentelemetry-api package") from e
+        
+        self._trace = trace
+        self._tracer = trace.get_tracer(name, tracer_provider=tracer_provider)
+        self._spans: Dict[int, Any] = {}
+    
+    def _attributes(self, attributes: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            key: value if isinstance(value, (bool, int, float, str)) else str(value)
+            for key, value in attributes.items() if value is not None
+        }
+    
+    def span_started(self, span: Span):
+        parent = self._spans.get(span.parent_id) if span.parent_id is not None else None
+        context = self._trace.set_span_in_context(parent) if parent is not None else None
+        self._spans[span.span_id] = self._tracer.start_span(
+            span.name,
+            context=context,
+            start_time=span.start_ns,
+            attributes=self._attributes(span.attributes)
+        )
+    
+    def span_ended(self, span: Span):
+        otel_span = self._spans.pop(span.span_id, None)
+        if otel_span is None:
+            return
+        otel_span.set_attributes(self._attributes(span.attributes))
+        if span.error:
+            otel_span.set_status(self._trace.Status(self._trace.StatusCode.ERROR, span.error))
+        otel_span.end(end_time=span.end_ns)
+    
+    def event(self, event: Event):
+        otel_span = self._spans.get(event.span_id)
+        if otel_span is not None:
+            otel_span.add_event(
+                event.name,
+                attributes=self._attributes(event.attributes),
+                timestamp=event.time_ns
+            )
@@ -0,0 +1,57 @@
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Optional, Tuple
+
+Price = Tuple[float, float]
+
+active_meter: ContextVar = ContextVar("usage_meter", default=None)
+
+class UsageMeter:
+    """累计LLM用量；价格为每百万token的（输入, 输出）费用，键 "*" 匹配其他模型"""
+    
+    def __init__(
+        self,
+        prices: Optional[Dict[str, Price]] = None,
+        parent: Optional['UsageMeter'] = None,
+        on_update: Optional[Callable[['UsageMeter'], None]] = None
+    ):
+        self.prices = prices or {}
+        self.parent = parent
+        self.on_update = on_update
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost = 0.0
+    
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+    
+    def add(self, model: str, prompt_tokens: int, completion_tokens: int):
+        self.requests += 1
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        price = self.prices.get(model) or self.prices.get("*")
+        if price is not None:
+            self.cost += (prompt_tokens * price[0] + completion_tokens * price[1]) / 1_000_000
+        
+        if self.on_update is not None:
+            self.on_update(self)
+        if self.parent is not None:
+            self.parent.add(model, prompt_tokens, completion_tokens)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.total_tokens,
+            "cost": self.cost
+        }
+    
+    def __repr__(self) -> str:
+        return f"UsageMeter(requests={self.requests}, total_tokens={self.total_tokens}, cost={self.cost:.6f})"
+
+def record(model: str, prompt_tokens: int, completion_tokens: int):
+    meter = active_meter.get()
+    if meter is not None:
+        meter.add(model, prompt_tokens, completion_tokens)
@@ -30,6 +30,9 @@ setup(
         "pyyaml>=6.0",
     ],
     extras_require={
+        "fast": [
+            "orjson>=3.8.0",
+        ],
         "dev": [
             "pytest>=7.0.0",
             "pytest-asyncio>=0.21.0",
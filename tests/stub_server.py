@@ -0,0 +1,75 @@
+import asyncio
+import json
+from aiohttp import web
+
+def completion(content: str, usage: dict = None) -> dict:
+    return {
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": usage or {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15}
+    }
+
+class StubServer:
+    """本地OpenAI兼容接口桩服务，记录收到的请求与连接"""
+    
+    def __init__(self, reply=None, delay: float = 0.0):
+        self.reply = reply or (lambda payload: completion("ok"))
+        self.delay = delay
+        self.requests = []
+        self.connections = set()
+        self.batches = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._runner = None
+        self.port = None
+    
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/v1"
+    
+    async def _handle_chat(self, request: web.Request) -> web.StreamResponse:
+        payload = await request.json()
+        self.requests.append(payload)
+        self.connections.add(id(request.transport))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.delay:
+                await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        
+        reply = self.reply(payload)
+        if isinstance(reply, web.StreamResponse):
+            return reply
+        
+        if payload.get("stream"):
+            response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+            await response.prepare(request)
+            for chunk in reply:
+                await response.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            await response.write(b"data: [DONE]\n\n")
+            await response.write_eof()
+            return response
+        return web.json_response(reply)
+    
+    async def _handle_batch(self, request: web.Request) -> web.Response:
+        payload = await request.json()
+        self.batches.append(len(payload["requests"]))
+        self.requests.extend(payload["requests"])
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return web.json_response({"responses": [self.reply(item) for item in payload["requests"]]})
+    
+    async def __aenter__(self):
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", self._handle_chat)
+        app.router.add_post("/v1/batch", self._handle_batch)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self._runner.cleanup()
@@ -0,0 +1,623 @@
+import asyncio
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from dataclasses import dataclass, field
+from typing import List, Optional
+import json
+import tempfile
+import time
+
+from dynamic_graph_agent_framework.ai_tools import (
+    AIConfig, OpenAIClient, UserMessage, json_call, text_call, close_shared_sessions,
+    MemoryCache, SQLiteCache, TieredCache, APIError, RateLimiter, AdaptiveConcurrency,
+    SSEDecoder, StreamDelta, SystemMessage, AIMessage, Context, Prompt,
+    SchemaValidationError, compile_schema
+)
+from dynamic_graph_agent_framework.graph import Node, Graph, TransitionCommand, Budget, STOP_MAX_TOKENS, STOP_MAX_COST
+from dynamic_graph_agent_framework.ai_tools import codec
+from aiohttp import web
+from stub_server import StubServer, completion
+
+def make_config(server: StubServer, **overrides) -> AIConfig:
+    config = {"api_key": "test-key", "base_url": server.base_url, "max_retries": 0, "timeout": 10}
+    config.update(overrides)
+    return AIConfig.from_dict(config)
+
+def test_shared_session():
+    print("=== 测试共享连接池会话 ===")
+    
+    async def run():
+        async with StubServer(reply=lambda payload: completion('{"ok": true}')) as server:
+            config = make_config(server, shared_session=True, connector_limit=4)
+            first = OpenAIClient(config)
+            second = OpenAIClient(config)
+            
+            for client in (first, second, first):
+                async with client:
+                    result = await json_call(client, [UserMessage("ping")])
+                    assert result == {"ok": True}
+            
+            results = await asyncio.gather(*[json_call(first, [UserMessage("ping")]) for _ in range(8)])
+            assert all(result == {"ok": True} for result in results)
+            
+            await close_shared_sessions()
+            return server
+    
+    server = asyncio.run(run())
+    print(f"请求数: {len(server.requests)}, 连接数: {len(server.connections)}")
+    assert len(server.requests) == 11
+    assert len(server.connections) <= 4
+    
+    print("✓ 共享连接池会话测试通过\n")
+
+def echo(payload: dict) -> dict:
+    return completion('{"echo": "%s"}' % payload["messages"][-1]["content"])
+
+def test_batching_with_batch_endpoint():
+    print("=== 测试请求合批（批量接口） ===")
+    
+    async def run():
+        async with StubServer(reply=echo) as server:
+            config = make_config(
+                server,
+                batching=True,
+                batch_window=0.05,
+                max_batch_size=8,
+                batch_url=f"{server.base_url}/batch"
+            )
+            async with OpenAIClient(config) as client:
+                results = await asyncio.gather(*[json_call(client, [UserMessage(f"q{i}")]) for i in range(20)])
+                return server, client.batcher.stats, results
+    
+    server, stats, results = asyncio.run(run())
+    print(f"服务端批大小: {server.batches}, 统计: {stats.to_dict()}")
+    assert results == [{"echo": f"q{i}"} for i in range(20)]
+    assert sorted(server.batches) == [4, 8, 8]
+    assert stats.requests == 20 and stats.batches == 3
+    assert stats.max_batch_size == 8
+    
+    print("✓ 批量接口合批测试通过\n")
+
+def test_batching_in_flight_window():
+    print("=== 测试请求合批（并发窗口） ===")
+    
+    async def run():
+        async with StubServer(reply=echo, delay=0.05) as server:
+            config = make_config(server, batching=True, batch_window=0.01, max_in_flight=3)
+            async with OpenAIClient(config) as client:
+                results = await asyncio.gather(*[json_call(client, [UserMessage(f"q{i}")]) for i in range(9)])
+                return server, client.batcher.stats, results
+    
+    server, stats, results = asyncio.run(run())
+    print(f"最大并发请求: {server.max_in_flight}, 统计: {stats.to_dict()}")
+    assert results == [{"echo": f"q{i}"} for i in range(9)]
+    assert server.max_in_flight == 3
+    assert stats.requests == 9
+    
+    print("✓ 并发窗口合批测试通过\n")
+
+def stream_reply(payload: dict):
+    if payload.get("stream"):
+        return [{"choices": [{"index": 0, "delta": {"content": piece}}]} for piece in ["你", "好", "!"]]
+    return completion('{"n": %d}' % len(payload["messages"]))
+
+def test_response_cache():
+    print("=== 测试响应缓存 ===")
+    
+    async def run(cache):
+        async with StubServer(reply=stream_reply) as server:
+            async with OpenAIClient(make_config(server), cache=cache) as client:
+                first = await json_call(client, [UserMessage("a")])
+                second = await json_call(client, [UserMessage("a")])
+                streamed = [[chunk async for chunk in text_call(client, [UserMessage("s")])] for _ in range(2)]
+            return server, first, second, streamed
+    
+    cache = MemoryCache(max_entries=8)
+    server, first, second, streamed = asyncio.run(run(cache))
+    assert first == second == {"n": 1}
+    assert streamed == [["你", "好", "!"], ["你", "好", "!"]]
+    assert len(server.requests) == 2
+    assert cache.stats.hits == 2 and cache.stats.misses == 2
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cache.db")
+        disk = SQLiteCache(path)
+        asyncio.run(run(TieredCache(MemoryCache(), disk)))
+        disk.close()
+        
+        reopened = SQLiteCache(path)
+        server, first, _, streamed = asyncio.run(run(TieredCache(MemoryCache(), reopened)))
+        reopened.close()
+    
+    assert first == {"n": 1}
+    assert streamed[0] == ["你", "好", "!"]
+    assert len(server.requests) == 0
+    
+    print("✓ 响应缓存测试通过\n")
+
+def test_memory_cache_eviction():
+    print("=== 测试内存缓存淘汰 ===")
+    
+    cache = MemoryCache(max_entries=2)
+    cache.set("a", [1])
+    cache.set("b", [2])
+    assert cache.get("a") == [1]
+    cache.set("c", [3])
+    assert cache.get("b") is None
+    assert cache.get("a") == [1] and cache.get("c") == [3]
+    assert cache.stats.evictions == 1
+    
+    sized = MemoryCache(max_bytes=10)
+    sized.set("a", ["1234"])
+    sized.set("b", ["5678"])
+    assert len(sized) == 1 and sized.get("b") == ["5678"]
+    
+    expiring = MemoryCache(ttl=0.01)
+    expiring.set("a", [1])
+    time.sleep(0.02)
+    assert expiring.get("a") is None
+    
+    print("✓ 内存缓存淘汰测试通过\n")
+
+def test_single_flight():
+    print("=== 测试相同请求合并（single-flight） ===")
+    
+    async def run():
+        async with StubServer(reply=stream_reply, delay=0.05) as server:
+            async with OpenAIClient(make_config(server, single_flight=True)) as client:
+                results = await asyncio.gather(*[json_call(client, [UserMessage("same")]) for _ in range(5)])
+                
+                async def collect():
+                    return [chunk async for chunk in text_call(client, [UserMessage("stream")])]
+                streams = await asyncio.gather(*[collect() for _ in range(3)])
+                
+                again = await json_call(client, [UserMessage("same")])
+                return server, client.single_flight, results, streams, again
+    
+    server, single_flight, results, streams, again = asyncio.run(run())
+    print(f"上游请求数: {len(server.requests)}, 统计: {single_flight.stats}")
+    assert results == [{"n": 1}] * 5
+    assert streams == [["你", "好", "!"]] * 3
+    assert again == {"n": 1}
+    assert len(server.requests) == 3
+    assert single_flight.stats.shared == 6
+    assert len(single_flight) == 0
+    
+    print("✓ 相同请求合并测试通过\n")
+
+def test_single_flight_error():
+    print("=== 测试相同请求合并的错误传播 ===")
+    
+    async def run():
+        async with StubServer(reply=lambda payload: web.Response(status=500, text="boom"), delay=0.05) as server:
+            async with OpenAIClient(make_config(server, single_flight=True)) as client:
+                results = await asyncio.gather(
+                    *[json_call(client, [UserMessage("same")]) for _ in range(4)],
+                    return_exceptions=True
+                )
+                return server, results
+    
+    server, results = asyncio.run(run())
+    assert len(server.requests) == 1
+    assert all(isinstance(result, Exception) and "500" in str(result) for result in results)
+    
+    print("✓ 错误传播测试通过\n")
+
+def test_rate_limiter():
+    print("=== 测试限流器 ===")
+    
+    async def run_bucket():
+        limiter = RateLimiter(requests_per_minute=600)
+        start = time.monotonic()
+        for _ in range(15):
+            permit = await limiter.acquire()
+            limiter.release(permit)
+        return time.monotonic() - start
+    
+    elapsed = asyncio.run(run_bucket())
+    print(f"15个请求（600次/分钟）耗时: {elapsed:.2f}s")
+    assert elapsed >= 0.45
+    
+    window = AdaptiveConcurrency(maximum=8)
+    window.on_overload(0)
+    window.on_overload(0)
+    assert window.limit == 4
+    for _ in range(8):
+        window.on_success()
+    assert 5 <= window.limit <= 6
+    
+    print("✓ 限流器测试通过\n")
+
+def test_retry_after():
+    print("=== 测试429重试与Retry-After ===")
+    
+    responses = [
+        web.Response(status=429, text="slow down", headers={"Retry-After": "0.2"}),
+        completion('{"ok": true}')
+    ]
+    
+    async def run():
+        async with StubServer(reply=lambda payload: responses.pop(0)) as server:
+            config = make_config(server, max_retries=2, max_concurrency=4)
+            async with OpenAIClient(config) as client:
+                start = time.monotonic()
+                result = await json_call(client, [UserMessage("ping")])
+                return result, time.monotonic() - start, client.limiter
+    
+    result, elapsed, limiter = asyncio.run(run())
+    print(f"耗时: {elapsed:.2f}s, 并发窗口: {limiter.concurrency.limit:.2f}")
+    assert result == {"ok": True}
+    assert elapsed >= 0.2
+    assert 2 < limiter.concurrency.limit < 3
+    
+    async def run_bad_request():
+        async with StubServer(reply=lambda payload: web.Response(status=400, text="bad")) as server:
+            async with OpenAIClient(make_config(server, max_retries=3)) as client:
+                try:
+                    await json_call(client, [UserMessage("ping")])
+                except APIError as e:
+                    return server, e
+    
+    server, error = asyncio.run(run_bad_request())
+    assert error.status == 400 and not error.retryable
+    assert len(server.requests) == 1
+    
+    print("✓ 429重试测试通过\n")
+
+def test_sse_decoder():
+    print("=== 测试SSE解码器 ===")
+    
+    body = (
+        b': keep-alive\r\n\r\n'
+        b'data: {"choices":[{"delta":{"content":"\xe4\xbd\xa0"}}]}\r\n\r\n'
+        b'event: message\ndata: {"choices":[{"delta":\ndata: {"content":"\\u597d\\n"}}]}\n\n'
+        b'data: {"choices": [{"delta": {"role": "assistant", "content": "\\"!\\""}}]}\n\n'
+        b'data: {"choices":[{"delta":{"content":null},"finish_reason":"stop"}]}\n\n'
+        b'data: [DONE]\n\n'
+    )
+    
+    for size in (1, 3, 7, len(body)):
+        decoder = SSEDecoder()
+        events = []
+        for i in range(0, len(body), size):
+            events.extend(decoder.feed(body[i:i + size]))
+        events.extend(decoder.close())
+        
+        assert len(events) == 5 and events[-1] == b"[DONE]"
+        deltas = [StreamDelta.parse(data) for data in events[:-1]]
+        assert [delta.content for delta in deltas] == ["你", "好\n", '"!"', None]
+        assert deltas[2].role == "assistant"
+        assert deltas[3].finish_reason == "stop"
+    
+    decoder = SSEDecoder()
+    assert decoder.feed(b'data: {"choices":[]}') == []
+    assert decoder.close() == [b'{"choices":[]}']
+    assert StreamDelta.parse(b"not json") is None
+    
+    unterminated = (
+        b'data: {"choices":[{"delta":{"content":"ok"}}]}\n\n'
+        b'data: {"choices":[],"usage":{"prompt_tokens":7,"completion_tokens":1,"total_tokens":8}}'
+    )
+    
+    async def run():
+        async with StubServer(reply=lambda payload: web.Response(body=unterminated, content_type="text/event-stream")) as server:
+            async with OpenAIClient(make_config(server)) as client:
+                text = "".join([chunk async for chunk in text_call(client, [UserMessage("hi")], stream=True)])
+                return text, client.prefix_stats
+    
+    text, stats = asyncio.run(run())
+    assert text == "ok"
+    assert stats.requests == 1 and stats.prompt_tokens == 7
+    
+    print("✓ SSE解码器测试通过\n")
+
+def test_token_budget():
+    print("=== 测试token与费用预算 ===")
+    
+    async def run(budget, stream=False):
+        def reply(payload):
+            if payload.get("stream"):
+                return [{"choices": [{"delta": {"content": "x"}}]} for _ in range(4)]
+            return completion('{"ok": true}', {"prompt_tokens": 100, "completion_tokens": 50, "total_tokens": 150})
+        
+        async with StubServer(reply=reply) as server:
+            async with OpenAIClient(make_config(server, model="model-a")) as client:
+                async def on_enter_ask(node, graph):
+                    if stream:
+                        async for _ in text_call(client, [UserMessage("again")], stream=True):
+                            pass
+                    else:
+                        await json_call(client, [UserMessage("again")])
+                    return TransitionCommand(target="ask")
+                
+                ask = Node("ask", on_enter=on_enter_ask)
+                graph = Graph(ask)
+                graph.link(ask, ask)
+                reason = await graph.execute(budget=budget)
+                return reason, len(server.requests)
+    
+    reason, requests = asyncio.run(run(Budget(max_tokens=400)))
+    print(f"token预算: {reason} 用量 {reason.usage}")
+    assert reason.reason == STOP_MAX_TOKENS and requests == 3
+    assert reason.usage["prompt_tokens"] == 300 and reason.usage["total_tokens"] == 450
+    
+    reason, requests = asyncio.run(run(Budget(max_cost=0.5, prices={"model-a": (1000.0, 2000.0)})))
+    print(f"费用预算: {reason} 用量 {reason.usage}")
+    assert reason.reason == STOP_MAX_COST and requests == 3
+    assert abs(reason.usage["cost"] - 0.6) < 1e-9
+    
+    reason, requests = asyncio.run(run(Budget(max_tokens=10), stream=True))
+    assert reason.reason == STOP_MAX_TOKENS and requests == 2
+    assert reason.usage["completion_tokens"] == 8
+    
+    print("✓ token与费用预算测试通过\n")
+
+def test_cancellation():
+    print("=== 测试请求取消 ===")
+    
+    async def run():
+        async with StubServer(delay=1.0) as server:
+            async with OpenAIClient(make_config(server, max_concurrency=1)) as client:
+                async def on_enter_ask(node, graph):
+                    await json_call(client, [UserMessage("slow")])
+                    graph.global_memory.set("answered", True)
+                
+                ask = Node("ask", on_enter=on_enter_ask, timeout=0.05)
+                graph = Graph(ask)
+                began = time.perf_counter()
+                await graph.execute()
+                elapsed = time.perf_counter() - began
+                return graph, elapsed, client.limiter.concurrency.in_flight
+    
+    graph, elapsed, in_flight = asyncio.run(run())
+    print(f"超时取消用时 {elapsed:.3f}s, 占用并发 {in_flight}")
+    assert elapsed < 0.5 and in_flight == 0
+    assert not graph.global_memory.get("answered")
+    
+    async def cancel_waiting():
+        limiter = RateLimiter(tokens_per_minute=6000, max_concurrency=1)
+        first = await limiter.acquire(50)
+        waiting = asyncio.ensure_future(limiter.acquire(50))
+        await asyncio.sleep(0.01)
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        limiter.release(first)
+        return limiter
+    
+    limiter = asyncio.run(cancel_waiting())
+    assert limiter.tokens.available > 40
+    assert limiter.concurrency.in_flight == 0
+    
+    print("✓ 请求取消测试通过\n")
+
+def test_hedging():
+    print("=== 测试对冲请求 ===")
+    
+    async def run():
+        async with StubServer(reply=stream_reply) as primary, StubServer(reply=stream_reply) as backup:
+            config = make_config(
+                primary,
+                hedging=True,
+                hedge_min_samples=5,
+                hedge_min_delay=0.02,
+                hedge_max_ratio=0.1,
+                hedge_base_url=backup.base_url,
+                hedge_model="backup-model"
+            )
+            async with OpenAIClient(config) as client:
+                for _ in range(10):
+                    await json_call(client, [UserMessage("warm")])
+                    [chunk async for chunk in text_call(client, [UserMessage("warm")])]
+                warm_delay = client.hedger.delay(config.model)
+                
+                primary.delay = 0.5
+                began = time.perf_counter()
+                chunks = [chunk async for chunk in text_call(client, [UserMessage("stream")])]
+                stream_elapsed = time.perf_counter() - began
+                
+                began = time.perf_counter()
+                hedged = await json_call(client, [UserMessage("slow")])
+                hedged_elapsed = time.perf_counter() - began
+                
+                began = time.perf_counter()
+                denied = await json_call(client, [UserMessage("slow")])
+                denied_elapsed = time.perf_counter() - began
+                
+                return primary, backup, client.hedger, warm_delay, hedged, hedged_elapsed, denied, denied_elapsed, chunks, stream_elapsed
+    
+    primary, backup, hedger, warm_delay, hedged, hedged_elapsed, denied, denied_elapsed, chunks, stream_elapsed = asyncio.run(run())
+    print(f"对冲阈值 {warm_delay:.3f}s, 对冲用时 {hedged_elapsed:.3f}s, 预算耗尽用时 {denied_elapsed:.3f}s, 统计: {hedger.stats}")
+    assert warm_delay is not None and warm_delay >= 0.02
+    assert hedged == {"n": 1} and hedged_elapsed < 0.3
+    assert denied == {"n": 1} and denied_elapsed >= 0.5
+    assert chunks == ["你", "好", "!"] and stream_elapsed < 0.3
+    assert [payload["model"] for payload in backup.requests] == ["backup-model", "backup-model"]
+    assert hedger.stats.requests == 23
+    assert hedger.stats.hedged == 2 and hedger.stats.hedge_wins == 2
+    assert hedger.stats.denied == 1
+    
+    print("✓ 对冲请求测试通过\n")
+
+def test_prompt_prefix():
+    print("=== 测试稳定提示前缀 ===")
+    
+    schema = {"type": "object", "properties": {"n": {"type": "integer"}}}
+    
+    def reply(payload):
+        cached = 20 if len(reply.seen) else 0
+        reply.seen.append(payload)
+        return completion('{"n": 1}', {
+            "prompt_tokens": 30, "completion_tokens": 5, "total_tokens": 35,
+            "prompt_tokens_details": {"cached_tokens": cached}
+        })
+    reply.seen = []
+    
+    async def run():
+        async with StubServer(reply=reply) as server:
+            async with OpenAIClient(make_config(server)) as client:
+                messages = [SystemMessage("你是助手"), UserMessage("问题")]
+                for _ in range(3):
+                    assert await json_call(client, messages, schema=schema) == {"n": 1}
+                
+                prompt = Prompt(system="你是助手", schema={"properties": {"n": {"type": "integer"}}, "type": "object"})
+                context = Context()
+                context.append(UserMessage("第一轮"))
+                await json_call(client, prompt.render(context))
+                context.append(AIMessage("回答"))
+                context.append(UserMessage("第二轮"))
+                await json_call(client, prompt.render(context))
+                return messages, prompt, client.prefix_stats
+    
+    messages, prompt, stats = asyncio.run(run())
+    bodies = [json.dumps(payload["messages"], ensure_ascii=False) for payload in reply.seen]
+    print(f"前缀: {prompt}, 统计: {stats}")
+    assert len(messages) == 2
+    assert [m["role"] for m in reply.seen[0]["messages"]] == ["system", "system", "user"]
+    assert len(set(bodies[:3])) == 1
+    prefix = json.dumps(reply.seen[0]["messages"][:2], ensure_ascii=False)
+    assert all(body.startswith(prefix[:-1]) for body in bodies)
+    assert prompt.render([])[1] is prompt.prefix[1]
+    assert stats.requests == 5 and stats.hits == 4
+    assert stats.cached_tokens == 80 and abs(stats.cached_ratio - 80 / 150) < 1e-9
+    
+    print("✓ 稳定提示前缀测试通过\n")
+
+def test_codec():
+    print("=== 测试JSON编解码后端 ===")
+    
+    body = json.dumps({
+        "id": "chatcmpl-1",
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": "你好"}, "finish_reason": "stop", "logprobs": None}],
+        "usage": {"prompt_tokens": 3, "completion_tokens": 2, "total_tokens": 5},
+        "system_fingerprint": "fp"
+    }).encode("utf-8")
+    
+    async def run():
+        async with StubServer(reply=stream_reply) as server:
+            async with OpenAIClient(make_config(server)) as client:
+                result = await json_call(client, [UserMessage("编码")])
+                chunks = [chunk async for chunk in text_call(client, [UserMessage("流式")])]
+                return result, chunks, server.requests[0]["messages"]
+    
+    previous = codec.backend
+    try:
+        for backend in codec.available_backends():
+            codec.set_backend(backend)
+            print(f"后端: {backend}")
+            
+            value = {"text": "中文\u2028", "n": [1, 2.5, None, True], "big": 2 ** 70, 3: "int key"}
+            assert json.loads(codec.dumps(value)) == json.loads(json.dumps(value))
+            assert codec.dumps({"b": 1, "a": 2}, sort_keys=True) == b'{"a":2,"b":1}'
+            assert codec.loads(codec.dumps_str(["x"])) == ["x"]
+            try:
+                codec.loads(b'{"a": ')
+                assert False, "格式错误的JSON应当报错"
+            except json.JSONDecodeError:
+                pass
+            
+            completion = codec.completion_decoder.decode(body)
+            assert completion.choices[0].message.content == "你好"
+            assert completion.choices[0].finish_reason == "stop"
+            assert completion.usage["total_tokens"] == 5
+            assert completion.choices[0].delta is None
+            
+            delta = StreamDelta.parse(b'{"choices":[{"index":0,"delta":{"role":"assistant"},"finish_reason":null}]}')
+            assert delta.content is None and delta.role == "assistant" and delta.finish_reason is None
+            delta = StreamDelta.parse(b'{"choices":[],"usage":{"prompt_tokens":1,"completion_tokens":1,"total_tokens":2}}')
+            assert delta.usage["total_tokens"] == 2 and delta.finish_reason is None
+            assert StreamDelta.parse(b'[1, 2]') is None
+            
+            result, chunks, sent = asyncio.run(run())
+            assert result == {"n": 1} and chunks == ["你", "好", "!"]
+            assert sent == [{"role": "user", "content": "编码"}]
+    finally:
+        codec.set_backend(previous)
+    
+    try:
+        codec.set_backend("unknown")
+        assert False, "未知后端应当报错"
+    except ValueError:
+        pass
+    
+    print("✓ JSON编解码后端测试通过\n")
+
+@dataclass
+class Person:
+    name: str
+    age: int
+    tags: List[str] = field(default_factory=list)
+    email: Optional[str] = None
+
+def test_schema_validation():
+    print("=== 测试结构化输出校验与修复 ===")
+    
+    schema = {"type": "object", "properties": {"n": {"type": "integer", "minimum": 0}}, "required": ["n"]}
+    validator = compile_schema(schema)
+    assert compile_schema({"required": ["n"], "type": "object", "properties": {"n": {"minimum": 0, "type": "integer"}}}) is validator
+    assert validator.validate({"n": 3}) == []
+    assert validator.validate({"n": -1}) == ["$.n: -1 is less than 0"]
+    assert validator.validate({"n": True}) == ["$.n: expected integer, got boolean"]
+    assert validator.validate({}) == ["$: missing required property 'n'"]
+    
+    person = compile_schema(Person)
+    assert compile_schema(Person) is person
+    assert person.schema["required"] == ["name", "age"]
+    assert person.validate({"name": "张三", "age": 30, "tags": ["a"], "email": None}) == []
+    assert person.validate({"name": "张三", "age": "30", "tags": [1], "extra": 1}) == [
+        "$.age: expected integer, got string",
+        "$.tags[0]: expected string, got integer",
+        "$: unexpected property 'extra'"
+    ]
+    
+    replies = ['{"name": "张三", "age": "三十"}', '{"name": "张三", "age": 30}', '{"age": 1}', '{"age": 2}']
+    
+    async def run():
+        async with StubServer(reply=lambda payload: completion(replies[len(server.requests) - 1])) as server:
+            async with OpenAIClient(make_config(server)) as client:
+                messages = [UserMessage("介绍张三")]
+                result = await json_call(client, messages, schema=Person)
+                
+                try:
+                    await json_call(client, messages, schema=Person, max_repairs=1)
+                    failed = None
+                except SchemaValidationError as e:
+                    failed = e
+                return server.requests, messages, result, failed, client.validation_stats
+    
+    requests, messages, result, failed, stats = asyncio.run(run())
+    print(f"统计: {stats.to_dict()}")
+    assert result == {"name": "张三", "age": 30}
+    assert len(messages) == 1
+    repair = requests[1]["messages"]
+    assert repair[:2] == requests[0]["messages"]
+    assert [m["role"] for m in repair[2:]] == ["assistant", "user"]
+    assert repair[2]["content"] == replies[0]
+    assert "$.age: expected integer, got string" in repair[3]["content"] and "schema" not in repair[3]["content"].split("\n", 1)[1]
+    assert failed is not None and failed.errors == ["$: missing required property 'name'"]
+    assert len(requests) == 4
+    assert stats.calls == 2 and stats.first_pass == 0 and stats.repair_attempts == 2
+    assert stats.repaired == 1 and stats.failed == 1 and stats.retries_avoided == 1
+    
+    print("✓ 结构化输出校验与修复测试通过\n")
+
+if __name__ == "__main__":
+    test_shared_session()
+    test_batching_with_batch_endpoint()
+    test_batching_in_flight_window()
+    test_response_cache()
+    test_memory_cache_eviction()
+    test_single_flight()
+    test_single_flight_error()
+    test_rate_limiter()
+    test_retry_after()
+    test_sse_decoder()
+    test_token_budget()
+    test_cancellation()
+    test_hedging()
+    test_prompt_prefix()
+    test_codec()
+    test_schema_validation()
+    print("所有客户端测试通过！")
@@ -0,0 +1,177 @@
+import asyncio
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+import pickle
+
+from dynamic_graph_agent_framework.ai_tools import (
+    Context, SystemMessage, UserMessage, AIMessage, ToolMessage, CustomMessage,
+    FIT_SLIDING_WINDOW, FIT_PIN_SYSTEM, count_tokens, encode_messages
+)
+
+def test_messages():
+    print("=== 测试消息缓存序列化 ===")
+    
+    message = UserMessage("你好")
+    data = message.to_dict()
+    assert message.to_dict() == data and message.to_dict() is not data
+    data["content"] = "篡改"
+    assert message.to_json() == '{"role":"user","content":"你好"}'
+    assert message.to_dict()["content"] == "你好"
+    assert CustomMessage("".join(["us", "er"]), "x").role is message.role
+    
+    message.content = "再见"
+    assert message.to_dict()["content"] == "再见"
+    assert message.to_json() == '{"role":"user","content":"再见"}'
+    assert message == UserMessage("再见") and message != SystemMessage("再见")
+    
+    tool = ToolMessage("结果", tool_call_id="call_1")
+    assert tool.to_dict() == {"role": "tool", "content": "结果", "tool_call_id": "call_1"}
+    tool.tool_call_id = None
+    assert tool.to_dict() == {"role": "tool", "content": "结果"}
+    
+    custom = CustomMessage("user", "hi", name="ada")
+    assert custom.name == "ada" and custom.to_dict()["name"] == "ada"
+    custom.name = "bob"
+    assert custom.to_dict() == {"role": "user", "content": "hi", "name": "bob"}
+    assert custom != CustomMessage("user", "hi", name="bob") and custom in {custom}
+    assert not hasattr(UserMessage("x"), "__dict__")
+    
+    for original in [message, tool, ToolMessage("x", "id")]:
+        restored = pickle.loads(pickle.dumps(original))
+        assert restored == original and type(restored) is type(original)
+    restored = pickle.loads(pickle.dumps(custom))
+    assert restored.to_dict() == custom.to_dict() and type(restored) is CustomMessage
+    
+    context = Context()
+    context.extend([SystemMessage("系统"), message, tool, custom])
+    assert json.loads(encode_messages(context)) == context.to_messages()
+    assert encode_messages([]) == "[]"
+    
+    print("✓ 消息缓存序列化测试通过\n")
+
+def word_tokenizer(text: str) -> int:
+    return len(text.split())
+
+def test_token_count():
+    print("=== 测试上下文token计数 ===")
+    
+    assert count_tokens("") == 0
+    assert count_tokens("hello world") == 2
+    assert count_tokens("你好，世界") == 5
+    
+    calls = []
+    def counting(text):
+        calls.append(text)
+        return word_tokenizer(text)
+    
+    context = Context(tokenizer=counting, message_overhead=1)
+    context.append(SystemMessage("be brief"))
+    context.append(UserMessage("one two three"))
+    assert context.token_count == 3 + 4
+    assert context.message_tokens(1) == 4
+    
+    context.append(AIMessage("four"))
+    assert context.token_count == 9
+    assert len(calls) == 3
+    
+    first = context.to_messages()
+    again = context.to_messages()
+    assert first == [
+        {"role": "system", "content": "be brief"},
+        {"role": "user", "content": "one two three"},
+        {"role": "assistant", "content": "four"}
+    ]
+    assert again == first and not any(a is b for a, b in zip(first, again))
+    assert len(calls) == 3
+    
+    context.messages[1] = UserMessage("replaced")
+    assert context.token_count == 3 + 2 + 2
+    assert context.to_messages()[0] == first[0] and context.to_messages()[2] == first[2]
+    assert context._entries[2].data is context.messages[2]._data()
+    
+    context.messages[2].content = "four five six"
+    assert context.token_count == 3 + 2 + 4
+    assert context.to_messages()[2] == {"role": "assistant", "content": "four five six"}
+    
+    del context.messages[0]
+    assert context.token_count == 6
+    context.clear()
+    assert context.token_count == 0
+    
+    print(f"分词器调用次数: {len(calls)}")
+    print("✓ 上下文token计数测试通过\n")
+
+def make_context() -> Context:
+    context = Context(tokenizer=word_tokenizer, message_overhead=0)
+    context.append(SystemMessage("system prompt"))
+    for i in range(5):
+        context.append(UserMessage(f"question {i}"))
+        context.append(AIMessage(f"answer {i} a b"))
+    return context
+
+def test_fit():
+    print("=== 测试按token预算裁剪上下文 ===")
+    
+    context = make_context()
+    assert context.token_count == 2 + 5 * (2 + 4)
+    assert context.fit(100) == context.messages
+    
+    fitted = context.fit(12)
+    print(f"固定系统消息: {[m.content for m in fitted]}")
+    assert [m.content for m in fitted] == ["system prompt", "answer 3 a b", "question 4", "answer 4 a b"]
+    
+    window = context.fit(14, FIT_SLIDING_WINDOW)
+    assert [m.content for m in window] == ["question 3", "answer 3 a b", "question 4", "answer 4 a b"]
+    assert context.get_last_tokens(14) == window
+    
+    assert [m["content"] for m in context.to_messages(max_tokens=6, policy=FIT_PIN_SYSTEM)] == ["system prompt", "answer 4 a b"]
+    
+    def last_user_only(ctx, max_tokens):
+        return [max(i for i, m in enumerate(ctx.messages) if m.role == "user")]
+    assert [m.content for m in context.fit(14, last_user_only)] == ["question 4"]
+    
+    try:
+        context.fit(1)
+        assert False, "系统消息超出预算时应当报错"
+    except ValueError:
+        pass
+    try:
+        context.fit(14, "unknown")
+        assert False, "未知策略应当报错"
+    except ValueError:
+        pass
+    
+    print("✓ 上下文裁剪测试通过\n")
+
+def test_compact():
+    print("=== 测试上下文压缩 ===")
+    
+    async def summarize(messages):
+        await asyncio.sleep(0)
+        return AIMessage(f"summary of {len(messages)}")
+    
+    context = make_context()
+    assert not asyncio.run(context.compact(100, summarize))
+    
+    assert asyncio.run(context.compact(20, summarize, summary_tokens=3))
+    contents = [m.content for m in context.messages]
+    print(f"压缩后: {contents}")
+    assert contents == ["system prompt", "summary of 6", "question 3", "answer 3 a b", "question 4", "answer 4 a b"]
+    assert context.token_count <= 20
+    
+    context.append(UserMessage("question 5"))
+    assert context.to_messages()[-1] == {"role": "user", "content": "question 5"}
+    assert context.token_count == 2 + 3 + 12 + 2
+    
+    print("✓ 上下文压缩测试通过\n")
+
+if __name__ == "__main__":
+    test_messages()
+    test_token_count()
+    test_fit()
+    test_compact()
+    print("所有上下文测试通过！")
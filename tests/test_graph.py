@@ -4,7 +4,28 @@ import os
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from dynamic_graph_agent_framework.graph import Node, Graph, TransitionCommand, END, Memory
+import tempfile
+import time
+import warnings
+
+from dynamic_graph_agent_framework.graph.executor import RaceGroup
+from dynamic_graph_agent_framework.graph import (
+    Node, Graph, TransitionCommand, END, Memory, SCHEDULER_QUEUE,
+    EXECUTION_THREAD, EXECUTION_PROCESS, shutdown_pools,
+    MergeConflictError, MERGE_FIRST_WRITER_WINS, MERGE_RAISE, DELETED,
+    Checkpointer, FileCheckpointStore, SQLiteCheckpointStore,
+    Budget, STOP_COMPLETED, STOP_MAX_STEPS, STOP_MAX_VISITS, STOP_DEADLINE
+)
+
+def score_in_process(node, graph):
+    total = sum(i * i for i in range(graph.global_memory.get("n")))
+    node.local_memory.set("pid", os.getpid())
+    graph.global_memory.set("score", total)
+    graph.global_memory.delete("n")
+    return TransitionCommand(target=END, update_global={"scored_by": node.name})
+
+class Crash(BaseException):
+    pass
 
 def test_graph_basic():
     print("=== 测试图框架基础功能 ===")
@@ -106,8 +127,797 @@ def test_node_dynamic_binding():
     
     print("✓ 动态绑定测试通过\n")
 
+def test_graph_node_index():
+    print("=== 测试节点索引 ===")
+    
+    node_a = Node("A")
+    node_b = Node("B")
+    node_c = Node("C")
+    
+    graph = Graph(node_a, unique_names=True)
+    graph.link(node_a, node_b)
+    graph.link(node_b, node_c)
+    graph.add_node(node_b)
+    
+    assert graph.nodes == (node_a, node_b, node_c)
+    try:
+        graph.nodes.append(Node("E"))
+        assert False, "graph.nodes 应当只读"
+    except AttributeError:
+        pass
+    assert graph.get_node_by_id(node_c.node_id) is node_c
+    assert graph.get_node_by_name("B") is node_b
+    assert node_c in graph
+    
+    try:
+        graph.add_node(Node("B"))
+        assert False, "重名节点应当被拒绝"
+    except ValueError:
+        pass
+    
+    node_d = Node("D")
+    graph.link(node_a, node_c, "shortcut")
+    node_b.link(node_d, "shortcut")
+    assert graph.predecessors(node_c) == [node_b, node_a]
+    node_a.link(node_d, "shortcut")
+    assert graph.predecessors(node_c) == [node_b]
+    assert graph.predecessors(node_d) == [node_b, node_a]
+    node_a.unlink("shortcut")
+    assert graph.predecessors(node_d) == [node_b]
+    node_b.unlink(node_d)
+    
+    removed = graph.remove_node(node_b.node_id)
+    assert removed is node_b
+    assert len(graph) == 2
+    assert graph.get_node_by_name("B") is None
+    assert graph.get_node_by_id(node_b.node_id) is None
+    assert node_a.get_linked_node("B") is None
+    assert graph.predecessors(node_c) == []
+    
+    try:
+        graph.remove_node(node_a)
+        assert False, "入口节点不可删除"
+    except ValueError:
+        pass
+    
+    print("✓ 节点索引测试通过\n")
+
+def test_graph_duplicate_names():
+    print("=== 测试允许重名节点 ===")
+    
+    first = Node("worker")
+    second = Node("worker")
+    
+    graph = Graph(Node("root"))
+    graph.add_node(first)
+    graph.add_node(second)
+    
+    assert graph.get_node_by_name("worker") is first
+    assert graph.get_nodes_by_name("worker") == [first, second]
+    
+    graph.remove_node(first)
+    assert graph.get_node_by_name("worker") is second
+    
+    print("✓ 重名节点测试通过\n")
+
+def test_graph_compile():
+    print("=== 测试图编译 ===")
+    
+    call_log = []
+    
+    def on_enter_a(node, graph):
+        call_log.append(node.name)
+        return [TransitionCommand(target="to_b"), TransitionCommand(target=node_c.node_id)]
+    
+    def on_enter_b(node, graph):
+        call_log.append(node.name)
+        return TransitionCommand(target=END)
+    
+    def on_enter_c(node, graph):
+        call_log.append(node.name)
+        return TransitionCommand(target="missing")
+    
+    node_a = Node("A", on_enter=on_enter_a)
+    node_b = Node("B", on_enter=on_enter_b)
+    node_c = Node("C", on_enter=on_enter_c)
+    
+    graph = Graph(node_a)
+    graph.link(node_a, node_b, "to_b")
+    graph.link(node_a, node_c)
+    
+    assert graph.compile() is graph
+    assert graph.is_compiled
+    assert graph.resolve_target(node_a, "to_b") is node_b
+    assert graph.resolve_target(node_a, node_c.node_id) is node_c
+    assert graph.resolve_target(node_b, "C") is node_c
+    
+    try:
+        graph.add_node(Node("D"))
+        assert False, "编译后的图不可修改"
+    except RuntimeError:
+        pass
+    
+    try:
+        asyncio.run(graph.execute())
+        assert False, "未知转移目标应当报错"
+    except ValueError:
+        pass
+    
+    assert call_log == ["A", "B", "C"]
+    
+    dangling = Node("dangling")
+    node_x = Node("X")
+    node_x.link(dangling)
+    try:
+        Graph(node_x).compile()
+        assert False, "指向图外节点的链接应当在编译时被拒绝"
+    except ValueError:
+        pass
+    
+    print("✓ 图编译测试通过\n")
+
+def test_queue_scheduler():
+    print("=== 测试队列调度器 ===")
+    
+    call_log = []
+    
+    async def on_enter_start(node, graph):
+        return [TransitionCommand(target="slow"), TransitionCommand(target="fast_1")]
+    
+    async def on_enter_slow(node, graph):
+        await asyncio.sleep(0.2)
+        call_log.append(node.name)
+        return TransitionCommand(target=END)
+    
+    def make_fast(next_target):
+        async def on_enter_fast(node, graph):
+            await asyncio.sleep(0.01)
+            call_log.append(node.name)
+            return TransitionCommand(target=next_target)
+        return on_enter_fast
+    
+    start = Node("start", on_enter=on_enter_start)
+    slow = Node("slow", on_enter=on_enter_slow)
+    fast_1 = Node("fast_1", on_enter=make_fast("fast_2"))
+    fast_2 = Node("fast_2", on_enter=make_fast("fast_3"))
+    fast_3 = Node("fast_3", on_enter=make_fast(END))
+    
+    graph = Graph(start, scheduler=SCHEDULER_QUEUE, max_concurrency=4)
+    graph.link(start, slow)
+    graph.link(start, fast_1)
+    graph.link(fast_1, fast_2)
+    graph.link(fast_2, fast_3)
+    
+    asyncio.run(graph.execute())
+    
+    print(f"调用日志: {call_log}")
+    assert call_log == ["fast_1", "fast_2", "fast_3", "slow"]
+    
+    print("✓ 队列调度器测试通过\n")
+
+def test_execution_policies():
+    print("=== 测试节点执行策略 ===")
+    
+    call_log = []
+    
+    def on_enter_start(node, graph):
+        return [TransitionCommand(target="blocking"), TransitionCommand(target="async_branch")]
+    
+    def on_enter_blocking(node, graph):
+        time.sleep(0.2)
+        call_log.append(node.name)
+        return TransitionCommand(target="score")
+    
+    async def on_enter_async_branch(node, graph):
+        await asyncio.sleep(0.01)
+        call_log.append(node.name)
+        return TransitionCommand(target=END)
+    
+    start = Node("start", on_enter=on_enter_start)
+    blocking = Node("blocking", on_enter=on_enter_blocking, execution=EXECUTION_THREAD)
+    async_branch = Node("async_branch", on_enter=on_enter_async_branch)
+    score = Node("score", on_enter=score_in_process, execution=EXECUTION_PROCESS)
+    
+    graph = Graph(start, parallel_execution=True)
+    graph.link(start, blocking)
+    graph.link(start, async_branch)
+    graph.link(blocking, score)
+    
+    try:
+        asyncio.run(graph.execute({"n": 1000}))
+    finally:
+        shutdown_pools()
+    
+    print(f"调用日志: {call_log}")
+    assert call_log == ["async_branch", "blocking"]
+    assert graph.global_memory.get("score") == sum(i * i for i in range(1000))
+    assert graph.global_memory.get("scored_by") == "score"
+    assert "n" not in graph.global_memory
+    assert score.local_memory.get("pid") != os.getpid()
+    
+    try:
+        Node("bad", execution="gpu")
+        assert False, "未知执行策略应当被拒绝"
+    except ValueError:
+        pass
+    
+    closure = Node("closure", on_enter=lambda node, graph: graph.global_memory.set("ran", True), execution=EXECUTION_PROCESS)
+    fallback = Graph(closure)
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        try:
+            asyncio.run(fallback.execute())
+        finally:
+            shutdown_pools()
+    assert fallback.global_memory.get("ran") is True
+    assert any(issubclass(w.category, RuntimeWarning) and "closure" in str(w.message) for w in caught)
+    
+    print("✓ 节点执行策略测试通过\n")
+
+def test_memory_snapshot():
+    print("=== 测试记忆快照与变更日志 ===")
+    
+    memory = Memory()
+    memory.update({"a": 1, "b": 2})
+    snapshot = memory.snapshot()
+    version = memory.version
+    
+    memory.set("a", 10)
+    memory.delete("b")
+    memory.set("c", 3)
+    assert snapshot.to_dict() == {"a": 1, "b": 2}
+    assert snapshot.version == version
+    assert memory.to_dict() == {"a": 10, "c": 3}
+    assert memory.changes_since(version) == {"a": 10, "b": DELETED, "c": 3}
+    assert memory.changes_since(memory.version) == {}
+    
+    branch = memory.branch()
+    branch.set("a", 20)
+    branch.delete("c")
+    branch.set("d", 4)
+    assert branch.get("a") == 20 and "c" not in branch and branch.get("d") == 4
+    assert memory.to_dict() == {"a": 10, "c": 3}
+    assert branch.to_dict() == {"a": 20, "d": 4}
+    assert branch.changes() == {"a": 20, "c": DELETED, "d": 4}
+    
+    branch.clear()
+    assert branch.to_dict() == {} and branch.get("a", "默认") == "默认"
+    
+    bounded = Memory(log_limit=4)
+    for i in range(10):
+        bounded.set(f"k{i}", i)
+    assert bounded.changes_since(9) == {"k9": 9}
+    try:
+        bounded.changes_since(0)
+        assert False, "已截断的变更日志应当报错"
+    except ValueError:
+        pass
+    
+    print("✓ 记忆快照与变更日志测试通过\n")
+
+def test_memory_merge():
+    print("=== 测试分支记忆合并 ===")
+    
+    memory = Memory()
+    memory.set("count", 0)
+    first, second = memory.branch(), memory.branch()
+    first.update({"count": 1, "left": True})
+    second.update({"count": 2, "right": True})
+    memory.merge([first, second])
+    assert memory.to_dict() == {"count": 2, "left": True, "right": True}
+    
+    first, second = memory.branch(), memory.branch()
+    first.set("count", 3)
+    second.set("count", 4)
+    memory.merge([first, second], MERGE_FIRST_WRITER_WINS)
+    assert memory.get("count") == 3
+    
+    first, second = memory.branch(), memory.branch()
+    first.set("count", 5)
+    second.set("count", 6)
+    try:
+        memory.merge([first, second], MERGE_RAISE)
+        assert False, "冲突写入应当报错"
+    except MergeConflictError as e:
+        assert e.key == "count" and e.values == [5, 6]
+    assert memory.get("count") == 3
+    
+    first, second = memory.branch(), memory.branch()
+    first.set("count", 5)
+    second.set("count", 6)
+    memory.merge([first, second], MERGE_RAISE, {"count": lambda key, values: sum(values)})
+    assert memory.get("count") == 11
+    
+    stale = memory.branch()
+    memory.set("count", 100)
+    stale.set("count", 7)
+    memory.merge([stale], MERGE_FIRST_WRITER_WINS)
+    assert memory.get("count") == 100
+    
+    # 变更日志被截断后，早于日志起点的分支仍可合并并识别并发写入
+    memory = Memory(log_limit=4)
+    memory.update({"count": 0, "name": "a"})
+    stale = memory.branch()
+    for i in range(10):
+        memory.set("step", i)
+    memory.set("count", 100)
+    stale.update({"count": 7, "name": "b"})
+    memory.merge([stale], MERGE_FIRST_WRITER_WINS)
+    assert memory.to_dict() == {"count": 100, "name": "b", "step": 9}
+    
+    print("✓ 分支记忆合并测试通过\n")
+
+def test_isolated_branches():
+    print("=== 测试并行分支隔离 ===")
+    
+    seen = {}
+    
+    def on_enter_start(node, graph):
+        graph.global_memory.set("items", [])
+        return [TransitionCommand(target="left"), TransitionCommand(target="right")]
+    
+    def make_branch(value):
+        async def on_enter_branch(node, graph):
+            graph.global_memory.set("items", graph.global_memory.get("items") + [value])
+            await asyncio.sleep(0.01)
+            seen[node.name] = graph.global_memory.get("items")
+            return TransitionCommand(target="join", update_global={f"{node.name}_done": True})
+        return on_enter_branch
+    
+    def on_enter_join(node, graph):
+        seen["join"] = graph.global_memory.get("items")
+        return TransitionCommand(target=END)
+    
+    def build(**options):
+        start = Node("start", on_enter=on_enter_start)
+        left = Node("left", on_enter=make_branch("L"))
+        right = Node("right", on_enter=make_branch("R"))
+        join = Node("join", on_enter=on_enter_join)
+        graph = Graph(start, parallel_execution=True, isolate_branches=True, **options)
+        graph.link(start, left)
+        graph.link(start, right)
+        graph.link(left, join)
+        graph.link(right, join)
+        return graph
+    
+    graph = build(key_merge_policies={"items": lambda key, values: sorted(sum(values, []))})
+    asyncio.run(graph.execute())
+    print(f"分支视图: {seen}")
+    assert seen["left"] == ["L"] and seen["right"] == ["R"]
+    assert seen["join"] == ["L", "R"]
+    assert graph.global_memory.get("left_done") and graph.global_memory.get("right_done")
+    
+    try:
+        asyncio.run(build(merge_policy=MERGE_RAISE).execute())
+        assert False, "冲突写入应当报错"
+    except MergeConflictError as e:
+        assert e.key == "items"
+    
+    try:
+        Graph(Node("bad"), merge_policy="random")
+        assert False, "未知合并策略应当被拒绝"
+    except ValueError:
+        pass
+    
+    print("✓ 并行分支隔离测试通过\n")
+
+def test_checkpoint_resume():
+    print("=== 测试检查点与恢复执行 ===")
+    
+    def build(calls, crash_at=None):
+        def make_step(next_target):
+            def on_enter(node, graph):
+                if node.name == crash_at:
+                    raise Crash()
+                calls.append(node.name)
+                node.local_memory.set("ran", True)
+                graph.global_memory.set("trail", graph.global_memory.get("trail", []) + [node.name])
+                graph.global_memory.delete("scratch")
+                return TransitionCommand(target=next_target, update_global={"scratch": node.name})
+            return on_enter
+        
+        names = ["a", "b", "c", "d"]
+        nodes = [Node(name, on_enter=make_step(next_name)) for name, next_name in zip(names, names[1:] + [END])]
+        graph = Graph(nodes[0])
+        for source, target in zip(nodes, nodes[1:]):
+            graph.link(source, target)
+        return graph
+    
+    with tempfile.TemporaryDirectory() as directory:
+        stores = [
+            FileCheckpointStore(os.path.join(directory, "files")),
+            SQLiteCheckpointStore(os.path.join(directory, "checkpoints.db"))
+        ]
+        for store in stores:
+            first_calls = []
+            try:
+                asyncio.run(build(first_calls, crash_at="c").execute(
+                    {"trail": []}, checkpointer=Checkpointer(store, "run-1", compact_every=10)
+                ))
+                assert False, "应当模拟进程崩溃"
+            except Crash:
+                pass
+            assert first_calls == ["a", "b"]
+            assert len(store.load("run-1")) == 2
+            
+            calls = []
+            graph = build(calls)
+            run = asyncio.run(graph.resume(Checkpointer(store, "run-1", compact_every=10)))
+            print(f"{type(store).__name__} 恢复后执行: {calls}")
+            assert calls == ["c", "d"]
+            assert run.run_id == "run-1" and run.stop_reason.completed
+            assert run.global_memory.get("trail") == ["a", "b", "c", "d"]
+            assert run.global_memory.get("scratch") == "d"
+            assert run.local_memory(graph.get_node_by_name("b")).get("ran")
+            assert len(store.load("run-1")) == 5
+            # 恢复执行写入本次运行的上下文，不触碰图共享的全局/节点记忆
+            assert graph.global_memory.to_dict() == {}
+            assert all(node.local_memory.to_dict() == {} for node in graph.nodes)
+            
+            compacted = Checkpointer(store, "run-1", compact_every=1)
+            asyncio.run(build([]).resume(compacted))
+            assert len(store.load("run-1")) == 1
+            
+            store.delete("run-1")
+            try:
+                asyncio.run(build([]).resume(Checkpointer(store, "run-1")))
+                assert False, "不存在的检查点应当报错"
+            except KeyError:
+                pass
+        stores[1].close()
+    
+    print("✓ 检查点与恢复执行测试通过\n")
+
+def test_concurrent_runs():
+    print("=== 测试同一图的并发执行 ===")
+    
+    async def on_enter_start(node, graph):
+        user = graph.global_memory.get("user")
+        node.local_memory.set("user", user)
+        await asyncio.sleep(0.01)
+        assert node.local_memory.get("user") == user
+        return TransitionCommand(target="even" if user % 2 == 0 else "odd")
+    
+    def make_branch(label):
+        def on_enter_branch(node, graph):
+            graph.global_memory.set("result", f"{label}-{graph.global_memory.get('user')}")
+            return TransitionCommand(target="finish", update_local={"seen": True})
+        return on_enter_branch
+    
+    def on_enter_finish(node, graph):
+        time.sleep(0.001)
+        graph.global_memory.set("finished_by", node.name)
+        return TransitionCommand(target=END)
+    
+    start = Node("start", on_enter=on_enter_start)
+    even = Node("even", on_enter=make_branch("even"))
+    odd = Node("odd", on_enter=make_branch("odd"))
+    finish = Node("finish", on_enter=on_enter_finish, execution=EXECUTION_THREAD)
+    unused = [Node(f"unused_{i}") for i in range(50)]
+    
+    graph = Graph(start)
+    graph.link(start, even)
+    graph.link(start, odd)
+    graph.link(even, finish)
+    graph.link(odd, finish)
+    for node in unused:
+        graph.add_node(node)
+    graph.compile()
+    
+    async def run_all():
+        return await asyncio.gather(*[graph.run({"user": user}, run_id=user) for user in range(200)])
+    
+    try:
+        runs = asyncio.run(run_all())
+    finally:
+        shutdown_pools()
+    
+    for user, run in enumerate(runs):
+        label = "even" if user % 2 == 0 else "odd"
+        assert run.run_id == user
+        assert run.global_memory.get("result") == f"{label}-{user}"
+        assert run.global_memory.get("finished_by") == "finish"
+        assert run.local_memory(start).get("user") == user
+        assert run.local_memory(graph.get_node_by_name(label)).get("seen")
+        assert len(list(run.local_memories())) == 3
+    print(f"第一个执行: {runs[0]}")
+    
+    assert graph.global_memory.to_dict() == {}
+    assert start.local_memory.to_dict() == {}
+    
+    print("✓ 同一图的并发执行测试通过\n")
+
+def test_join_nodes():
+    print("=== 测试汇合节点 ===")
+    
+    def build(scheduler, quorum=None, skip_slow=False):
+        calls = []
+        
+        def on_enter_start(node, graph):
+            return [TransitionCommand(target="fast"), TransitionCommand(target="slow")]
+        
+        def on_enter_fast(node, graph):
+            return TransitionCommand(target="join", result="fast-result")
+        
+        def on_enter_slow(node, graph):
+            if skip_slow:
+                return TransitionCommand(target=END)
+            return TransitionCommand(target="slower")
+        
+        def on_enter_slower(node, graph):
+            return TransitionCommand(target="join", result="slower-result")
+        
+        def on_enter_join(node, graph):
+            calls.append(dict(node.join_results))
+            return TransitionCommand(target=END)
+        
+        start = Node("start", on_enter=on_enter_start)
+        fast = Node("fast", on_enter=on_enter_fast)
+        slow = Node("slow", on_enter=on_enter_slow)
+        slower = Node("slower", on_enter=on_enter_slower)
+        join = Node("join", on_enter=on_enter_join, join=True, quorum=quorum)
+        graph = Graph(start, scheduler=scheduler)
+        graph.link(start, fast)
+        graph.link(start, slow)
+        graph.link(slow, slower)
+        graph.link(fast, join)
+        graph.link(slower, join)
+        return graph, calls
+    
+    for scheduler in ("bfs", SCHEDULER_QUEUE):
+        graph, calls = build(scheduler)
+        asyncio.run(graph.execute())
+        print(f"{scheduler}: 汇合结果 {calls}")
+        assert calls == [{"fast": "fast-result", "slower": "slower-result"}]
+        
+        graph, calls = build(scheduler, quorum=1)
+        asyncio.run(graph.execute())
+        assert calls == [{"fast": "fast-result"}]
+        
+        graph, calls = build(scheduler, skip_slow=True)
+        asyncio.run(graph.execute())
+        assert calls == [{"fast": "fast-result"}]
+    
+    counts = {}
+    
+    def on_enter_split(node, graph):
+        return [TransitionCommand(target="left"), TransitionCommand(target="right")]
+    
+    def to_merge(node, graph):
+        return TransitionCommand(target="merge")
+    
+    def on_enter_merge(node, graph):
+        counts["merge"] = counts.get("merge", 0) + 1
+        return TransitionCommand(target=END)
+    
+    split = Node("split", on_enter=on_enter_split)
+    left = Node("left", on_enter=to_merge)
+    right = Node("right", on_enter=to_merge)
+    merge = Node("merge", on_enter=on_enter_merge)
+    graph = Graph(split, parallel_execution=True)
+    graph.link(split, left)
+    graph.link(split, right)
+    graph.link(left, merge)
+    graph.link(right, merge)
+    asyncio.run(graph.execute())
+    assert counts["merge"] == 1
+    assert graph.predecessors(merge) == [left, right]
+    assert graph.compile().predecessors(merge) == [left, right]
+    
+    print("✓ 汇合节点测试通过\n")
+
+def test_budgets():
+    print("=== 测试执行预算 ===")
+    
+    def build(scheduler="bfs", parallel=False):
+        def on_enter_ping(node, graph):
+            return TransitionCommand(target="pong")
+        
+        def on_enter_pong(node, graph):
+            return TransitionCommand(target="ping")
+        
+        ping = Node("ping", on_enter=on_enter_ping)
+        pong = Node("pong", on_enter=on_enter_pong)
+        graph = Graph(ping, scheduler=scheduler, parallel_execution=parallel)
+        graph.link(ping, pong)
+        graph.link(pong, ping)
+        return graph
+    
+    reason = asyncio.run(build().execute(budget=Budget(max_visits=5)))
+    print(f"节点访问上限: {reason}")
+    assert reason.reason == STOP_MAX_VISITS and reason.node == "ping" and reason.limit == 5
+    assert reason.steps == 10
+    
+    for scheduler, parallel in (("bfs", True), (SCHEDULER_QUEUE, False)):
+        reason = asyncio.run(build(scheduler, parallel).execute(budget=Budget(max_steps=20)))
+        assert reason.reason == STOP_MAX_STEPS and reason.steps == 20
+    
+    def on_enter_fan_out(node, graph):
+        return [TransitionCommand(target=name) for name in ("a", "b", "c")]
+    
+    def on_enter_leaf(node, graph):
+        graph.global_memory.set(node.name, True)
+        return TransitionCommand(target=END)
+    
+    fan_out = Node("fan_out", on_enter=on_enter_fan_out)
+    graph = Graph(fan_out, parallel_execution=True)
+    for name in ("a", "b", "c"):
+        graph.link(fan_out, Node(name, on_enter=on_enter_leaf))
+    reason = asyncio.run(graph.execute(budget=Budget(max_steps=3)))
+    assert reason.reason == STOP_MAX_STEPS and reason.steps == 3
+    assert graph.global_memory.get("a") and graph.global_memory.get("b")
+    assert "c" not in graph.global_memory
+    
+    graph = build()
+    graph.budget = Budget(max_steps=3)
+    run = asyncio.run(graph.run())
+    assert run.stop_reason.reason == STOP_MAX_STEPS
+    assert not run.stop_reason.completed
+    
+    cancelled = []
+    
+    def on_enter_start(node, graph):
+        return [TransitionCommand(target="fast"), TransitionCommand(target="stuck")]
+    
+    def on_enter_fast(node, graph):
+        graph.global_memory.set("fast", True)
+        return TransitionCommand(target=END)
+    
+    async def on_enter_stuck(node, graph):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(node.name)
+            raise
+    
+    start = Node("start", on_enter=on_enter_start)
+    fast = Node("fast", on_enter=on_enter_fast)
+    stuck = Node("stuck", on_enter=on_enter_stuck)
+    for scheduler in ("bfs", SCHEDULER_QUEUE):
+        graph = Graph(start, parallel_execution=True, scheduler=scheduler)
+        graph.link(start, fast)
+        graph.link(start, stuck)
+        reason = asyncio.run(graph.execute(budget=Budget(deadline=0.05)))
+        print(f"{scheduler}: {reason}")
+        assert reason.reason == STOP_DEADLINE and reason.elapsed < 1.0
+        assert graph.global_memory.get("fast")
+    assert cancelled == ["stuck", "stuck"]
+    
+    def on_enter_done(node, graph):
+        return TransitionCommand(target=END)
+    
+    reason = asyncio.run(Graph(Node("done", on_enter=on_enter_done)).execute())
+    assert reason.reason == STOP_COMPLETED and reason.steps == 1
+    
+    try:
+        Budget(max_cost=1.0)
+        assert False, "应抛出 ValueError"
+    except ValueError:
+        pass
+    
+    print("✓ 执行预算测试通过\n")
+
+def test_timeouts_and_races():
+    print("=== 测试节点超时与竞速转移 ===")
+    
+    cancelled = []
+    
+    async def on_enter_hang(node, graph):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(node.name)
+            raise
+        return TransitionCommand(target="after_hang")
+    
+    def on_enter_start(node, graph):
+        return [TransitionCommand(target="hang"), TransitionCommand(target="quick")]
+    
+    def on_enter_quick(node, graph):
+        graph.global_memory.set("quick", True)
+    
+    def on_enter_after_hang(node, graph):
+        graph.global_memory.set("after_hang", True)
+    
+    for node_timeout, hang_timeout in ((None, 0.05), (0.05, None)):
+        start = Node("start", on_enter=on_enter_start)
+        hang = Node("hang", on_enter=on_enter_hang, timeout=hang_timeout)
+        quick = Node("quick", on_enter=on_enter_quick)
+        after_hang = Node("after_hang", on_enter=on_enter_after_hang)
+        graph = Graph(start, parallel_execution=True, node_timeout=node_timeout)
+        graph.link(start, hang)
+        graph.link(start, quick)
+        graph.link(hang, after_hang)
+        
+        began = time.perf_counter()
+        reason = asyncio.run(graph.execute())
+        elapsed = time.perf_counter() - began
+        print(f"超时: 用时 {elapsed:.3f}s, {reason}")
+        assert reason.completed and elapsed < 1.0
+        assert graph.global_memory.get("quick") and not graph.global_memory.get("after_hang")
+    assert cancelled == ["hang", "hang"]
+    
+    def build(scheduler, parallel, broken_only=False):
+        def on_enter_ask(node, graph):
+            targets = ["broken"] if broken_only else ["slow", "fast", "broken"]
+            return TransitionCommand(target=targets, race=True, update_global={"asked": True})
+        
+        async def on_enter_slow(node, graph):
+            graph.global_memory.set("answer", "slow")
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                cancelled.append(node.name)
+                raise
+            return TransitionCommand(target="done")
+        
+        async def on_enter_fast(node, graph):
+            await asyncio.sleep(0.01)
+            graph.global_memory.set("answer", "fast")
+            return TransitionCommand(target="done")
+        
+        def on_enter_broken(node, graph):
+            raise RuntimeError("boom")
+        
+        def on_enter_done(node, graph):
+            graph.global_memory.set("done_after", graph.global_memory.get("answer"))
+        
+        ask = Node("ask", on_enter=on_enter_ask)
+        done = Node("done", on_enter=on_enter_done)
+        graph = Graph(ask, scheduler=scheduler, parallel_execution=parallel)
+        for name, callback in (("slow", on_enter_slow), ("fast", on_enter_fast), ("broken", on_enter_broken)):
+            racer = Node(name, on_enter=callback)
+            graph.link(ask, racer)
+            graph.link(racer, done)
+        return graph
+    
+    cancelled.clear()
+    for scheduler, parallel in (("bfs", False), ("bfs", True), (SCHEDULER_QUEUE, False)):
+        graph = build(scheduler, parallel)
+        began = time.perf_counter()
+        asyncio.run(graph.execute())
+        elapsed = time.perf_counter() - began
+        print(f"{scheduler}{'（并行）' if parallel else ''}: 竞速用时 {elapsed:.3f}s, 记忆 {graph.global_memory.to_dict()}")
+        assert elapsed < 0.5
+        assert graph.global_memory.to_dict() == {"asked": True, "answer": "fast", "done_after": "fast"}
+    assert cancelled == ["slow", "slow", "slow"]
+    
+    graph = build("bfs", False, broken_only=True)
+    reason = asyncio.run(graph.execute())
+    assert reason.completed and "done_after" not in graph.global_memory
+    
+    try:
+        TransitionCommand(target="fast", race=True)
+        assert False, "应抛出 ValueError"
+    except ValueError:
+        pass
+    
+    with tempfile.TemporaryDirectory() as directory:
+        graph = build("bfs", False)
+        store = FileCheckpointStore(directory)
+        race = RaceGroup([graph.get_node_by_name("slow"), graph.get_node_by_name("fast")])
+        Checkpointer(store, "race").save(graph, [(race, graph.entry_node)], {})
+        frontier, _, _ = Checkpointer(store, "race").restore(graph)
+        assert [node.name for node in frontier[0][0].nodes] == ["slow", "fast"]
+        assert frontier[0][1] is graph.entry_node
+    
+    print("✓ 节点超时与竞速转移测试通过\n")
+
 if __name__ == "__main__":
     test_graph_basic()
     test_graph_parallel()
     test_node_dynamic_binding()
+    test_graph_node_index()
+    test_graph_duplicate_names()
+    test_graph_compile()
+    test_queue_scheduler()
+    test_execution_policies()
+    test_memory_snapshot()
+    test_memory_merge()
+    test_isolated_branches()
+    test_checkpoint_resume()
+    test_concurrent_runs()
+    test_join_nodes()
+    test_budgets()
+    test_timeouts_and_races()
     print("所有图框架测试通过！")
@@ -0,0 +1,80 @@
+import asyncio
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from dynamic_graph_agent_framework.ai_tools import (
+    AIConfig, OpenAIClient, UserMessage, IncrementalJSONParser, JSONStreamError, json_stream_call
+)
+from stub_server import StubServer
+
+def test_incremental_parser():
+    print("=== 测试增量JSON解析 ===")
+    
+    text = '```json\n{"name": "Ada \\"L\\"", "age": 36, "tags": ["x", {"y": [1, 2]}], "ok": true, "none": null}\n```'
+    parser = IncrementalJSONParser()
+    events = []
+    for i in range(0, len(text), 3):
+        for key, value in parser.feed(text[i:i + 3]):
+            events.append((i, key, value))
+    
+    print(f"字段事件: {events}")
+    assert [key for _, key, _ in events] == ["name", "age", "tags", "ok", "none"]
+    assert events[0][0] < events[-1][0]
+    assert parser.close() == {"name": 'Ada "L"', "age": 36, "tags": ["x", {"y": [1, 2]}], "ok": True, "none": None}
+    
+    partial = IncrementalJSONParser()
+    partial.feed('{"a": 1, "b": [1, 2')
+    assert partial.snapshot() == {"a": 1}
+    try:
+        partial.close()
+        assert False, "截断的JSON应当报错"
+    except JSONStreamError:
+        pass
+    
+    for bad in ['Sure! {"a": 1}', '{"a" 1}', '{"a": [1}', '{"a": 1} trailing', '{"a": 1,}']:
+        parser = IncrementalJSONParser()
+        try:
+            parser.feed(bad)
+            parser.close()
+            assert False, f"应当检测到格式错误: {bad}"
+        except JSONStreamError as e:
+            print(f"  {bad!r} -> {e}")
+    
+    early = IncrementalJSONParser()
+    try:
+        early.feed("I think")
+        assert False, "非JSON前缀应当立即报错"
+    except JSONStreamError:
+        pass
+    
+    print("✓ 增量JSON解析测试通过\n")
+
+def test_json_stream_call():
+    print("=== 测试流式JSON调用 ===")
+    
+    def deltas(text):
+        return [{"choices": [{"index": 0, "delta": {"content": text[i:i + 4]}}]} for i in range(0, len(text), 4)]
+    
+    replies = [deltas("Here is the JSON you asked for: {}"), deltas('{"city": "Paris", "population": 2100000}')]
+    
+    async def run():
+        async with StubServer(reply=lambda payload: replies.pop(0)) as server:
+            config = AIConfig.from_dict({"api_key": "test-key", "base_url": server.base_url, "max_retries": 1})
+            async with OpenAIClient(config) as client:
+                fields = [field async for field in json_stream_call(client, [UserMessage("city?")])]
+                return server, fields
+    
+    server, fields = asyncio.run(run())
+    print(f"字段: {fields}")
+    assert fields == [("city", "Paris"), ("population", 2100000)]
+    assert len(server.requests) == 2
+    assert all(request["stream"] and request["response_format"] == {"type": "json_object"} for request in server.requests)
+    
+    print("✓ 流式JSON调用测试通过\n")
+
+if __name__ == "__main__":
+    test_incremental_parser()
+    test_json_stream_call()
+    print("所有流式JSON测试通过！")
@@ -0,0 +1,128 @@
+import asyncio
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+import tempfile
+
+from dynamic_graph_agent_framework import (
+    AIConfig, OpenAIClient, UserMessage, json_call, text_call,
+    Node, Graph, TransitionCommand, END,
+    HistogramTracer, JSONLTracer, add_tracer, remove_tracer
+)
+from dynamic_graph_agent_framework.tracing import Histogram, Span, SPAN_GRAPH, SPAN_LLM
+from stub_server import StubServer, completion
+
+def test_histogram():
+    print("=== 测试直方图 ===")
+    
+    histogram = Histogram()
+    for i in range(1, 1001):
+        histogram.record(i / 1000)
+    
+    summary = histogram.to_dict()
+    print(f"摘要: {summary}")
+    assert summary["count"] == 1000
+    assert abs(summary["mean"] - 0.5005) < 1e-9
+    assert 0.5 <= summary["p50"] <= 0.5 * 2 ** (1 / 8) + 1e-9
+    assert 0.99 <= summary["p99"] <= 1.0
+    assert summary["min"] == 0.001 and summary["max"] == 1.0
+    
+    tracer = HistogramTracer()
+    tracer.MAX_PENDING_PARENTS = 8
+    def finish(span):
+        span.end_ns = span.start_ns + 1000
+        tracer.span_ended(span)
+    graph_span = Span("run", SPAN_GRAPH, None, {})
+    finish(Span("model", SPAN_LLM, graph_span, {}))
+    finish(graph_span)
+    assert not tracer._child_time
+    for _ in range(20):
+        finish(Span("model", SPAN_LLM, Span("never_ended", SPAN_GRAPH, None, {}), {}))
+    assert len(tracer._child_time) == 8
+    
+    print("✓ 直方图测试通过\n")
+
+def test_graph_tracing():
+    print("=== 测试图执行追踪 ===")
+    
+    replies = iter([completion("not json"), completion('{"ok": true}')])
+    
+    def reply(payload):
+        if payload.get("stream"):
+            return [
+                {"choices": [{"delta": {"content": "hi"}}]},
+                {"choices": [], "usage": {"prompt_tokens": 3, "completion_tokens": 1, "total_tokens": 4}}
+            ]
+        return next(replies)
+    
+    async def run(path):
+        histograms = add_tracer(HistogramTracer())
+        jsonl = add_tracer(JSONLTracer(path))
+        try:
+            async with StubServer(reply=reply) as server:
+                config = AIConfig.from_dict({"api_key": "test-key", "base_url": server.base_url, "max_retries": 1})
+                async with OpenAIClient(config) as client:
+                    async def on_enter_ask(node, graph):
+                        graph.global_memory.set("answer", await json_call(client, [UserMessage("ping")]))
+                        return [TransitionCommand(target="stream"), TransitionCommand(target="local")]
+                    
+                    async def on_enter_stream(node, graph):
+                        chunks = [chunk async for chunk in text_call(client, [UserMessage("hi")], stream=True)]
+                        graph.global_memory.set("streamed", "".join(chunks))
+                        return TransitionCommand(target=END)
+                    
+                    def on_enter_local(node, graph):
+                        raise RuntimeError("boom")
+                    
+                    ask = Node("ask", on_enter=on_enter_ask)
+                    stream = Node("stream", on_enter=on_enter_stream)
+                    local = Node("local", on_enter=on_enter_local)
+                    graph = Graph(ask, parallel_execution=True)
+                    graph.link(ask, stream)
+                    graph.link(ask, local)
+                    await graph.execute()
+                    return graph, histograms
+        finally:
+            remove_tracer(histograms)
+            remove_tracer(jsonl)
+            jsonl.close()
+    
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "trace.jsonl")
+        graph, histograms = asyncio.run(run(path))
+        with open(path, encoding="utf-8") as file:
+            records = [json.loads(line) for line in file]
+    
+    assert graph.global_memory.get("answer") == {"ok": True}
+    assert graph.global_memory.get("streamed") == "hi"
+    
+    summary = histograms.summary()
+    print(f"计数器: {summary['counters']}")
+    assert summary["latency"]["node:ask"]["count"] == 1
+    assert summary["latency"]["llm:chat.completions"]["count"] == 3
+    assert summary["latency"]["graph:execute"]["count"] == 1
+    assert summary["self_time"]["ask"]["max"] <= summary["latency"]["node:ask"]["max"]
+    assert summary["counters"]["retry"] == 1
+    assert summary["counters"]["transition:ask"] == 2
+    assert summary["counters"]["error:node"] == 1
+    assert summary["counters"]["wave"] == 2
+    assert summary["tokens"] == {"prompt_tokens": 23, "completion_tokens": 11}
+    assert summary["queue_depth"]["max"] == 2
+    
+    spans = {record["spanId"]: record for record in records if record["type"] == "span"}
+    names = {record["name"]: record for record in spans.values()}
+    llm = [record for record in spans.values() if record["name"] == "chat.completions"]
+    assert all(spans[record["parentSpanId"]]["name"] in ("ask", "stream") for record in llm)
+    assert all(spans[names[name]["parentSpanId"]]["name"] == "execute" for name in ("ask", "stream", "local"))
+    assert names["local"]["status"]["code"] == 2
+    assert all(record["traceId"] == names["ask"]["traceId"] for record in spans.values())
+    
+    print("✓ 图执行追踪测试通过\n")
+
+if __name__ == "__main__":
+    test_histogram()
+    test_graph_tracing()
+    print("所有追踪测试通过！")